@@ -1,87 +1,52 @@
-import fitz
 import os
 import json
 
+from core import header_analysis
+
+PT_PARA_MM = 0.352778
+
+
 def analyze_pdf_header(pdf_path):
-    doc = fitz.open(pdf_path)
-    page = doc[0]
-    
-    # Extrair informações do cabeçalho (primeiros 25% da página)
-    header_height = page.rect.height * 0.25
-    header_rect = fitz.Rect(0, 0, page.rect.width, header_height)
-    
-    # Extrair texto e suas propriedades
-    header_dict = page.get_text("dict", clip=header_rect)
+    # Mesma análise (memorizada) usada pelo leitor, visualizador e importadores
+    analise = header_analysis.analisar_cabecalho(pdf_path)
+    header_height = analise.altura_cabecalho
     
-    # Extrair imagens
+    # Imagens que começam no cabeçalho (primeiros 25% da página)
     images = []
-    for img_index, img in enumerate(page.get_images(full=True)):
-        xref = img[0]
-        if xref:
-            pix = fitz.Pixmap(doc, xref)
-            if pix.width > 0 and pix.height > 0:
-                # Obter informações posicionais da imagem
-                for item in page.get_image_info():
-                    if item.get('xref') == xref:
-                        # Verificar se a imagem está no cabeçalho
-                        if item['bbox'][1] <= header_height:
-                            images.append({
-                                'xref': xref,
-                                'bbox': item['bbox'],
-                                'width': pix.width,
-                                'height': pix.height,
-                                'position_mm': {
-                                    'x': item['bbox'][0] * 0.352778,  # Converter para mm
-                                    'y': item['bbox'][1] * 0.352778,
-                                    'width': (item['bbox'][2] - item['bbox'][0]) * 0.352778,
-                                    'height': (item['bbox'][3] - item['bbox'][1]) * 0.352778
-                                }
-                            })
+    for img in analise.imagens:
+        if img['xref'] and img['bbox'][1] <= header_height:
+            bbox = img['bbox']
+            images.append({
+                'xref': img['xref'],
+                'bbox': list(bbox),
+                'width': img['width'],
+                'height': img['height'],
+                'position_mm': {
+                    'x': bbox[0] * PT_PARA_MM,  # Converter para mm
+                    'y': bbox[1] * PT_PARA_MM,
+                    'width': (bbox[2] - bbox[0]) * PT_PARA_MM,
+                    'height': (bbox[3] - bbox[1]) * PT_PARA_MM
+                }
+            })
     
     # Formatar informações do cabeçalho para análise
     header_info = {
         'page_size': {
-            'width': page.rect.width,
-            'height': page.rect.height,
-            'width_mm': page.rect.width * 0.352778,
-            'height_mm': page.rect.height * 0.352778
+            'width': analise.largura,
+            'height': analise.altura,
+            'width_mm': analise.largura * PT_PARA_MM,
+            'height_mm': analise.altura * PT_PARA_MM
         },
         'header_height': header_height,
         'blocks': [],
         'images': images
     }
     
-    # Extrair informações detalhadas de cada bloco de texto
-    for block in header_dict.get('blocks', []):
-        if block.get('type', -1) == 0:  # Bloco de texto
-            block_info = {
-                'bbox': block.get('bbox', []),
-                'lines': []
-            }
-            
-            for line in block.get('lines', []):
-                line_info = {
-                    'bbox': line.get('bbox', []),
-                    'spans': []
-                }
-                
-                for span in line.get('spans', []):
-                    span_info = {
-                        'text': span.get('text', ''),
-                        'font': span.get('font', ''),
-                        'size': span.get('size', 0),
-                        'flags': span.get('flags', 0),  # 1=bold, 2=italic, 4=underline
-                        'color': span.get('color', 0),
-                        'origin': span.get('origin', []),
-                        'bbox': span.get('bbox', [])
-                    }
-                    line_info['spans'].append(span_info)
-                
-                block_info['lines'].append(line_info)
-            
-            header_info['blocks'].append(block_info)
+    # Blocos de texto que começam no cabeçalho
+    for block in analise.blocos:
+        if block['bbox'] and block['bbox'][1] < header_height:
+            header_info['blocks'].append(block)
     
-    doc.close()
     return header_info
 
 def main():
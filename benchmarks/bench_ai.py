@@ -0,0 +1,73 @@
+"""Benchmark: reescrita com IA de uma prova de 30 questões contra o servidor falso.
+
+Compara o laço antigo (um ``requests.post`` novo por questão, em sequência)
+com core.ai_helper.ClienteIA (sessão persistente, requisições em paralelo),
+com e sem o limite de taxa padrão, com erros transitórios, em lotes (com
+e sem itens inválidos na resposta) e com o cache de reescritas
+(core.ai_cache) já preenchido.
+
+Uso: python -m benchmarks.bench_ai [latência em segundos]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks import fake_gemini
+from core import ai_cache, ai_helper
+
+QUESTOES = 30
+
+
+def antigo(url, textos):
+    resultados = []
+    for texto in textos:
+        response = requests.post(f"{url}/v1beta/models/{ai_helper.MODELO}:generateContent?key=teste",
+                                 headers={"Content-Type": "application/json"},
+                                 json={"contents": [{"parts": [{"text": ai_helper.PROMPT.format(texto=texto)}]}]})
+        resultados.append(response.json()["candidates"][0]["content"]["parts"][0]["text"])
+    return resultados
+
+
+def main():
+    latencia = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    textos = [f"Questão {i}: qual alternativa descreve corretamente o processo?" for i in range(QUESTOES)]
+    esperado = [fake_gemini.reescrever(t) for t in textos]
+
+    def cliente(url, **opcoes):
+        opcoes = {'taxa': 1000, 'rajada': 1000, 'cache': False, 'tamanho_lote': 1, **opcoes}
+        return ai_helper.ClienteIA("teste", base_url=url, **opcoes).reescrever_varios(textos)
+
+    tmp = tempfile.TemporaryDirectory()
+    cache = ai_cache.CacheIA(os.path.join(tmp.name, "ai_cache.sqlite3"))
+    # (nome, fração de erros, fração de itens de lote inválidos, execução)
+    casos = [
+        ("antigo (sequencial)", 0.0, 0.0, lambda url: antigo(url, textos)),
+        ("cliente, limite padrão", 0.0, 0.0,
+         lambda url: cliente(url, taxa=ai_helper.TAXA, rajada=ai_helper.RAJADA)),
+        ("cliente, sem limite", 0.0, 0.0, cliente),
+        ("cliente, 10% de erros", 0.1, 0.0, cliente),
+        ("lotes de 10", 0.0, 0.0, lambda url: cliente(url, tamanho_lote=10)),
+        ("lotes, 10% inválidos", 0.0, 0.1, lambda url: cliente(url, tamanho_lote=10)),
+        ("lotes, cache frio", 0.0, 0.0, lambda url: cliente(url, tamanho_lote=10, cache=cache)),
+        ("lotes, cache quente", 0.0, 0.0, lambda url: cliente(url, tamanho_lote=10, cache=cache)),
+    ]
+
+    print(f"{QUESTOES} questões, latência do servidor {latencia * 1000:.0f} ms")
+    print(f"{'modo':>24} {'tempo (s)':>10} {'requisições':>12} {'ok':>4}")
+    for nome, erros, falhas_lote, executar in casos:
+        servidor, url = fake_gemini.iniciar(latencia=latencia, erros=erros, falhas_lote=falhas_lote)
+        inicio = time.perf_counter()
+        resultados = executar(url)
+        segundos = time.perf_counter() - inicio
+        servidor.shutdown()
+        print(f"{nome:>24} {segundos:>10.2f} {servidor.config['requisicoes']:>12} "
+              f"{'sim' if resultados == esperado else 'não':>4}")
+    cache.fechar()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: backends ReportLab x PyMuPDF num lote de 40 variantes.
+
+Mede páginas por segundo e tamanho médio dos PDFs gerados em memória.
+Uso: python -m benchmarks.bench_backends [arquivo.pdf|arquivo.docx]
+(sem argumento, usa uma prova sintética de 30 questões)
+"""
+import io
+import random
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+from core import generator, randomizer
+
+VARIANTES = 40
+
+
+def prova_sintetica(n_questoes=30, seed=7):
+    rnd = random.Random(seed)
+    palavras = ("qual alternativa apresenta corretamente a relação entre o processo "
+                "histórico descrito no texto e suas consequências sociais econômicas").split()
+    questoes = []
+    for i in range(1, n_questoes + 1):
+        enunciado = f"{i}. " + " ".join(rnd.choice(palavras) for _ in range(rnd.randint(20, 90)))
+        alternativas = [f"{letra}) " + " ".join(rnd.choice(palavras) for _ in range(rnd.randint(4, 25)))
+                        for letra in "abcd"]
+        questoes.append((enunciado, alternativas))
+    return questoes, {}
+
+
+def carregar_prova(caminho):
+    from ui.controller import ProvaController
+    controller = ProvaController(ui=None)
+    questoes = controller.carregar_prova(caminho)
+    return questoes, controller.formato_original
+
+
+def medir(backend, questoes, formato_original):
+    random.seed(123)
+    paginas = 0
+    tamanhos = []
+    inicio = time.perf_counter()
+    for v in range(VARIANTES):
+        variante = randomizer.embaralhar_tudo(questoes)
+        pdf = generator.PDFGenerator(variante, options={'qr_data': f"variante-{v}", 'backend': backend})
+        buffer = io.BytesIO()
+        pdf.generate_pdf(buffer, {'title': f"variante_{v}", 'formato_original': formato_original})
+        tamanhos.append(buffer.tell())
+        with fitz.open(stream=buffer.getvalue(), filetype="pdf") as doc:
+            paginas += doc.page_count
+    segundos = time.perf_counter() - inicio
+    return paginas, segundos, sum(tamanhos) / len(tamanhos)
+
+
+def main():
+    if len(sys.argv) > 1:
+        questoes, formato_original = carregar_prova(sys.argv[1])
+    else:
+        questoes, formato_original = prova_sintetica()
+
+    print(f"{len(questoes)} questões, {VARIANTES} variantes")
+    print(f"{'backend':>10} {'páginas':>8} {'tempo (s)':>10} {'pág/s':>8} {'KB/PDF':>8}")
+    for backend in generator.BACKENDS:
+        medir(backend, questoes[:2], formato_original)  # Aquecer fontes e caches
+        paginas, segundos, tamanho = medir(backend, questoes, formato_original)
+        print(f"{backend:>10} {paginas:>8} {segundos:>10.2f} {paginas / segundos:>8.1f} {tamanho / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark: memória e tempo da pré-visualização de uma prova de 20 páginas.
+
+Compara a renderização antiga do PDFHeaderViewer (todas as páginas com
+``pix.samples`` -> QImage -> QPixmap e reescala) com a conversão de
+core.pdf_viewer.pixmap_to_qimage, tanto para todas as páginas quanto para o
+caso sob demanda (página visível e vizinhas). Cada modo roda num processo
+separado para que o pico de memória (VmHWM) não se misture.
+
+Uso: python -m benchmarks.bench_preview_memory [arquivo.pdf]
+(sem argumento, usa um PDF sintético de 20 páginas)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PAGINAS = 20
+MODOS = ("antigo", "helper_todas", "helper_sob_demanda")
+
+
+def pdf_sintetico(caminho, paginas=PAGINAS):
+    import fitz  # PyMuPDF
+    texto = ("Qual alternativa apresenta corretamente a relação entre o processo histórico "
+             "descrito no texto e suas consequências sociais e econômicas? ") * 12
+    with fitz.open() as doc:
+        for i in range(paginas):
+            page = doc.new_page()
+            page.insert_text((50, 60), f"Questões {i * 5 + 1} a {i * 5 + 5}", fontname="hebo", fontsize=14)
+            page.insert_textbox(fitz.Rect(50, 80, 545, 790), texto, fontname="helv", fontsize=10)
+            page.draw_rect(fitz.Rect(50, 700, 545, 780), color=(0, 0, 0), fill=(0.9, 0.9, 0.9))
+        doc.save(caminho)
+
+
+def memoria_kb():
+    """(RSS atual, pico de RSS) do processo em KB"""
+    try:
+        with open("/proc/self/status") as f:
+            campos = dict(linha.split(":", 1) for linha in f if ":" in linha)
+        return int(campos["VmRSS"].split()[0]), int(campos["VmHWM"].split()[0])
+    except (OSError, KeyError):
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico, pico
+
+
+def executar(modo, caminho):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import fitz  # PyMuPDF
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QImage, QPixmap
+    from PyQt6.QtWidgets import QApplication
+
+    from core.pdf_viewer import IDEAL_WIDTH, pixmap_to_qimage
+
+    app = QApplication([])
+    rss_inicial, _ = memoria_kb()
+    inicio = time.perf_counter()
+    imagens = []
+    with fitz.open(caminho) as doc:
+        if modo == "antigo":
+            for page in doc:
+                pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
+                img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
+                imagens.append(QPixmap.fromImage(img))
+            escala = IDEAL_WIDTH / imagens[0].width()
+            imagens = [p.scaled(int(p.width() * escala), int(p.height() * escala),
+                                Qt.AspectRatioMode.KeepAspectRatio,
+                                Qt.TransformationMode.SmoothTransformation) for p in imagens]
+        else:
+            paginas = range(len(doc)) if modo == "helper_todas" else range(min(2, len(doc)))
+            for n in paginas:
+                pix = doc[n].get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
+                imagens.append(pixmap_to_qimage(pix))
+                del pix
+        paginas = len(doc)
+    segundos = time.perf_counter() - inicio
+    rss_final, pico = memoria_kb()
+    mantido = sum(i.sizeInBytes() if isinstance(i, QImage) else i.toImage().sizeInBytes()
+                  for i in imagens) // 1024
+    print(f"{modo:>20} {paginas:>8} {segundos * 1000:>9.0f} {mantido:>12} "
+          f"{rss_final - rss_inicial:>12} {pico - rss_inicial:>12}")
+    app.quit()
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--modo":
+        executar(sys.argv[2], sys.argv[3])
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if len(sys.argv) > 1:
+            caminho = sys.argv[1]
+        else:
+            caminho = os.path.join(tmp, "prova_20_paginas.pdf")
+            pdf_sintetico(caminho)
+
+        print(f"{'modo':>20} {'páginas':>8} {'tempo (ms)':>9} {'imagens (KB)':>12} "
+              f"{'ΔRSS (KB)':>12} {'Δpico (KB)':>12}")
+        for modo in MODOS:
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_preview_memory", "--modo", modo, caminho],
+                           check=True)
+
+
+if __name__ == "__main__":
+    main()
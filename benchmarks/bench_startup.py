@@ -0,0 +1,97 @@
+"""Benchmark: tempo de inicialização do main.py, com orçamento.
+
+Mede, em processos novos, (1) o tempo de importação de ``main`` com
+``python -X importtime`` e (2) o tempo até a janela principal estar
+visível. Também verifica que os módulos pesados, que devem ser importados
+só no primeiro uso, não foram carregados na abertura. Sai com código 1 se
+algum orçamento for estourado.
+
+Uso: python -m benchmarks.bench_startup [repetições]
+"""
+import os
+import subprocess
+import sys
+import time
+
+# Orçamentos em milissegundos (mediana das repetições)
+ORCAMENTO_IMPORTACAO_MS = 400
+ORCAMENTO_JANELA_MS = 1200
+# Só devem ser carregados quando a prova é lida, gerada ou visualizada
+MODULOS_PESADOS = ("fitz", "reportlab", "requests", "docx", "qrcode", "PIL", "numpy",
+                   "core.reader", "core.generator", "core.ai_helper", "core.pdf_viewer")
+MAIS_LENTOS = 10
+
+
+def _ambiente():
+    return {**os.environ, "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen")}
+
+
+def importtime():
+    """(total em ms, [(cumulativo em ms, módulo)] dos imports de primeiro nível)"""
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                           capture_output=True, text=True, env=_ambiente(), check=True).stderr
+    modulos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|")
+        if not nome.startswith("  "):  # Só os imports de primeiro nível somam ao total
+            modulos.append((int(cumulativo) / 1000, nome.strip()))
+    return sum(ms for ms, _ in modulos), sorted(modulos, reverse=True)
+
+
+def janela():
+    """Executado num processo novo: importa main, abre a janela e informa o tempo"""
+    inicio = time.perf_counter()
+    import main
+    from PyQt6 import QtWidgets
+    main.configurar_logging()
+    app = QtWidgets.QApplication([])
+    window = main.MainController()
+    window.show()
+    app.processEvents()
+    ms = (time.perf_counter() - inicio) * 1000
+    carregados = [m for m in MODULOS_PESADOS if m in sys.modules]
+    print(f"{ms:.0f} {','.join(carregados)}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--janela":
+        janela()
+        return
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    totais, tempos_janela, pesados = [], [], set()
+    modulos = []
+    for _ in range(repeticoes):
+        total, modulos = importtime()
+        totais.append(total)
+        saida = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--janela"],
+                               capture_output=True, text=True, env=_ambiente(), check=True).stdout.split()
+        tempos_janela.append(float(saida[0]))
+        if len(saida) > 1:
+            pesados.update(saida[1].split(","))
+
+    mediana = lambda valores: sorted(valores)[len(valores) // 2]
+    print(f"Imports de primeiro nível mais lentos (última execução):")
+    for ms, nome in modulos[:MAIS_LENTOS]:
+        print(f"{ms:>10.1f} ms  {nome}")
+    print()
+    importacao, abertura = mediana(totais), mediana(tempos_janela)
+    print(f"{'importação de main':>24} {importacao:>8.0f} ms (orçamento {ORCAMENTO_IMPORTACAO_MS} ms)")
+    print(f"{'janela visível':>24} {abertura:>8.0f} ms (orçamento {ORCAMENTO_JANELA_MS} ms)")
+
+    falhas = []
+    if importacao > ORCAMENTO_IMPORTACAO_MS:
+        falhas.append("importação acima do orçamento")
+    if abertura > ORCAMENTO_JANELA_MS:
+        falhas.append("abertura da janela acima do orçamento")
+    if pesados:
+        falhas.append(f"módulos pesados carregados na abertura: {', '.join(sorted(pesados))}")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
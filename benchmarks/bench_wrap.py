@@ -0,0 +1,63 @@
+"""Micro-benchmark: quebra de linhas antiga (stringWidth por prefixo) x core.layout.
+
+Uso: python -m benchmarks.bench_wrap
+"""
+import random
+import timeit
+
+from reportlab.pdfbase import pdfmetrics
+
+from core import fonts, layout
+
+FONTE = 'Arial'
+CORPO = 10
+LARGURA = 495  # A4 menos as margens de 50pt usadas pelo gerador
+
+PALAVRAS = ("análise questão alternativa correta enunciado texto leitura "
+            "interpretação histórico geografia matemática ciências período "
+            "revolução industrial século sociedade econômica política").split()
+
+
+def quebra_antiga(texto, font_name, font_size, largura):
+    """Laço usado anteriormente em generate_pdf (quadrático no tamanho da linha)"""
+    if pdfmetrics.stringWidth(texto, font_name, font_size) <= largura:
+        return [texto]
+    linhas = []
+    atual = ""
+    for palavra in texto.split():
+        teste = atual + " " + palavra if atual else palavra
+        if pdfmetrics.stringWidth(teste, font_name, font_size) <= largura:
+            atual = teste
+        else:
+            linhas.append(atual)
+            atual = palavra
+    if atual:
+        linhas.append(atual)
+    return linhas
+
+
+def gerar_paragrafo(n_palavras, seed=42):
+    rnd = random.Random(seed)
+    return " ".join(rnd.choice(PALAVRAS) for _ in range(n_palavras))
+
+
+def main():
+    fonts.registrar_fonte(FONTE)
+    layout.tabela_avancos(FONTE)  # Aquecer a tabela fora da medição
+
+    print(f"{'palavras':>9} {'antigo (ms)':>12} {'guloso (ms)':>12} {'ótimo (ms)':>12} {'ganho':>7}")
+    for n in (20, 80, 300, 1000):
+        texto = gerar_paragrafo(n)
+        repeticoes = max(5, 2000 // n)
+
+        assert quebra_antiga(texto, FONTE, CORPO, LARGURA) == layout.quebrar_linhas(texto, FONTE, CORPO, LARGURA)
+
+        antigo = timeit.timeit(lambda: quebra_antiga(texto, FONTE, CORPO, LARGURA), number=repeticoes) / repeticoes
+        guloso = timeit.timeit(lambda: layout.quebrar_linhas(texto, FONTE, CORPO, LARGURA), number=repeticoes) / repeticoes
+        otimo = timeit.timeit(lambda: layout.quebrar_linhas(texto, FONTE, CORPO, LARGURA, metodo='otimo'),
+                              number=repeticoes) / repeticoes
+        print(f"{n:>9} {antigo * 1000:>12.3f} {guloso * 1000:>12.3f} {otimo * 1000:>12.3f} {antigo / guloso:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
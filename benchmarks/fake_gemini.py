@@ -0,0 +1,122 @@
+"""Servidor HTTP local que imita o endpoint generateContent do Gemini.
+
+Responde a POST /v1beta/models/<modelo>:generateContent com o texto do
+pedido marcado como reescrito, depois de uma latência configurável. Pode
+também devolver erros transitórios (429/503) numa fração das requisições,
+para exercitar as novas tentativas do cliente.
+
+Pedidos com ``responseMimeType: application/json`` são tratados como lotes
+(core.ai_helper.PROMPT_LOTE): a resposta é a lista JSON de {id, texto}, da
+qual uma fração dos itens pode ser omitida ou corrompida (``--falhas-lote``)
+para exercitar o retorno às requisições individuais. Como a API real, o
+modelo ``gemini-pro`` recusa a resposta estruturada com 400.
+
+Uso: python -m benchmarks.fake_gemini [--porta 8765] [--latencia 0.2] [--erros 0.1] [--falhas-lote 0.1]
+e então GEMINI_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Modelo que não aceita responseMimeType/responseSchema
+MODELO_SEM_JSON = "gemini-pro"
+
+
+def reescrever(texto):
+    """Reescrita determinística usada nas respostas"""
+    return f"[reescrito] {texto}"
+
+
+class GeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como a API real
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status, corpo, headers=None):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        with config['lock']:
+            config['requisicoes'] += 1
+        time.sleep(config['latencia'])
+
+        if not self.path.startswith("/v1beta/models/") or ":generateContent" not in self.path:
+            self._responder(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+        if random.random() < config['erros']:
+            status = random.choice((429, 503))
+            self._responder(status, {"error": {"code": status, "message": "Tente novamente"}},
+                            headers={"Retry-After": "0"} if status == 429 else None)
+            return
+
+        try:
+            prompt = pedido["contents"][0]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            self._responder(400, {"error": {"code": 400, "message": "Pedido inválido"}})
+            return
+        config_geracao = pedido.get("generationConfig", {})
+        if config_geracao.get("responseMimeType") == "application/json":
+            if self.path.startswith(f"/v1beta/models/{MODELO_SEM_JSON}:"):
+                self._responder(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT",
+                                                "message": f"Json mode is not enabled for models/{MODELO_SEM_JSON}"}})
+                return
+            try:
+                itens = json.loads(prompt.split("Textos: ", 1)[1])
+            except (IndexError, ValueError):
+                self._responder(400, {"error": {"code": 400, "message": "Lote inválido"}})
+                return
+            resposta = []
+            for item in itens:
+                sorteio = random.random()
+                if sorteio < config['falhas_lote'] / 2:
+                    continue  # Item omitido
+                texto = "" if sorteio < config['falhas_lote'] else reescrever(item["texto"])
+                resposta.append({"id": item["id"], "texto": texto})
+            texto = json.dumps(resposta, ensure_ascii=False)
+        else:
+            texto = reescrever(prompt.split(": ", 1)[-1])
+        self._responder(200, {"candidates": [{"content": {"parts": [{"text": texto}], "role": "model"}}]})
+
+
+def iniciar(porta=0, latencia=0.2, erros=0.0, falhas_lote=0.0):
+    """Inicia o servidor numa thread daemon e retorna (servidor, url base)"""
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), GeminiHandler)
+    servidor.daemon_threads = True
+    servidor.config = {'latencia': latencia, 'erros': erros, 'falhas_lote': falhas_lote,
+                       'requisicoes': 0, 'lock': threading.Lock()}
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.2, help="segundos por requisição")
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 429/503")
+    parser.add_argument("--falhas-lote", type=float, default=0.0, help="fração de itens de lote inválidos")
+    args = parser.parse_args()
+    servidor, url = iniciar(args.porta, args.latencia, args.erros, args.falhas_lote)
+    print(f"Gemini falso em {url} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from config.settings import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = os.path.join(CACHE_DIR, "ai_cache.sqlite3")
+# Reescritas expiram depois de 30 dias
+TTL = 30 * 24 * 3600
+# Tamanho máximo dos textos guardados; acima disso os menos usados saem
+MAX_BYTES = 32 * 1024 * 1024
+# Gravações entre duas varreduras completas (expirados e soma exata, que
+# inclui o que outros processos gravaram); entre elas o total é estimado
+VARRER_A_CADA = 100
+
+
+def normalizar(texto):
+    """Forma canônica do texto: NFC e espaços colapsados (quebras de linha viram espaço)"""
+    return " ".join(unicodedata.normalize("NFC", texto).split())
+
+
+def chave(texto, prompt, modelo):
+    dados = json.dumps([normalizar(texto), prompt, modelo], ensure_ascii=False)
+    return hashlib.sha256(dados.encode("utf-8")).hexdigest()
+
+
+class CacheIA:
+    """Cache persistente de reescritas da IA em SQLite.
+
+    A chave é o hash do texto normalizado, do modelo de prompt e do modelo
+    da IA, então a mesma questão reaproveita a reescrita entre sessões e
+    entre provas. Entradas mais velhas que ``ttl`` são ignoradas e
+    removidas; quando o total passa de ``max_bytes``, saem as acessadas há
+    mais tempo. O total é mantido em memória a cada gravação e recalculado
+    a cada ``VARRER_A_CADA`` gravações. O banco usa WAL, podendo ser
+    compartilhado por processos.
+    """
+
+    def __init__(self, caminho=CACHE_DB, ttl=TTL, max_bytes=MAX_BYTES):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total = None
+        self._gravacoes = 0
+
+    def _conexao(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reescritas (
+                    chave TEXT PRIMARY KEY,
+                    texto TEXT NOT NULL,
+                    criado REAL NOT NULL,
+                    acessado REAL NOT NULL,
+                    tamanho INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_reescritas_acessado ON reescritas (acessado)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def obter(self, texto, prompt, modelo):
+        """Reescrita guardada para o texto, ou None"""
+        k = chave(texto, prompt, modelo)
+        agora = time.time()
+        try:
+            with self._lock:
+                conn = self._conexao()
+                linha = conn.execute("SELECT texto, criado, tamanho FROM reescritas WHERE chave = ?",
+                                     (k,)).fetchone()
+                if linha is None:
+                    return None
+                if agora - linha[1] > self.ttl:
+                    conn.execute("DELETE FROM reescritas WHERE chave = ?", (k,))
+                    conn.commit()
+                    if self._total is not None:
+                        self._total -= linha[2]
+                    return None
+                conn.execute("UPDATE reescritas SET acessado = ? WHERE chave = ?", (agora, k))
+                conn.commit()
+                return linha[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Cache da IA indisponível: {str(e)}")
+            return None
+
+    def gravar(self, texto, prompt, modelo, reescrita):
+        k = chave(texto, prompt, modelo)
+        agora = time.time()
+        try:
+            with self._lock:
+                conn = self._conexao()
+                tamanho = len(reescrita.encode("utf-8"))
+                anterior = conn.execute("SELECT tamanho FROM reescritas WHERE chave = ?", (k,)).fetchone()
+                conn.execute("INSERT OR REPLACE INTO reescritas VALUES (?, ?, ?, ?, ?)",
+                             (k, reescrita, agora, agora, tamanho))
+                if self._total is not None:
+                    self._total += tamanho - (anterior[0] if anterior else 0)
+                self._gravacoes += 1
+                self._despejar(conn, agora)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Não foi possível gravar no cache da IA: {str(e)}")
+
+    def _despejar(self, conn, agora):
+        """Remove expirados e, acima de max_bytes, os menos acessados (chamar com _lock)"""
+        if self._total is None or self._gravacoes >= VARRER_A_CADA:
+            conn.execute("DELETE FROM reescritas WHERE criado < ?", (agora - self.ttl,))
+            self._total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM reescritas").fetchone()[0]
+            self._gravacoes = 0
+        if self._total <= self.max_bytes:
+            return
+        excedente = self._total - self.max_bytes
+        removidas = []
+        for k, tamanho in conn.execute("SELECT chave, tamanho FROM reescritas ORDER BY acessado"):
+            if excedente <= 0:
+                break
+            removidas.append((k,))
+            excedente -= tamanho
+            self._total -= tamanho
+        conn.executemany("DELETE FROM reescritas WHERE chave = ?", removidas)
+
+    def limpar(self):
+        with self._lock:
+            conn = self._conexao()
+            conn.execute("DELETE FROM reescritas")
+            conn.commit()
+            self._total = 0
+
+    def fechar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._total = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_padrao():
+    """Cache compartilhado em output/cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheIA()
+        return _cache
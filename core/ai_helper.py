@@ -1,11 +1,318 @@
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import GEMINI_BASE_URL
+from core import ai_cache
+
+logger = logging.getLogger(__name__)
+
+# Os lotes pedem resposta estruturada (responseSchema), que o gemini-pro não aceita
+MODELO = "gemini-1.5-flash"
+PROMPT = "Troque por sinônimos mantendo o sentido: {texto}"
+# Vários textos por requisição, com resposta em JSON (ver ESQUEMA_LOTE)
+PROMPT_LOTE = (
+    "Troque por sinônimos mantendo o sentido cada um dos textos abaixo. "
+    "Responda com um item por texto, com o mesmo id.\n"
+    "Textos: {itens}"
+)
+ESQUEMA_LOTE = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"id": {"type": "INTEGER"}, "texto": {"type": "STRING"}},
+        "required": ["id", "texto"],
+    },
+}
+TAMANHO_LOTE = 10
+
+# Requisições simultâneas e conexões mantidas abertas
+MAX_CONCORRENCIA = 4
+# Token bucket: requisições por segundo e rajada máxima
+TAXA = 2.0
+RAJADA = 4
+# (conexão, leitura) em segundos
+TIMEOUT = (5, 30)
+MAX_TENTATIVAS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# Respostas que valem uma nova tentativa
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+
+class ErroIA(Exception):
+    """Erro ao reescrever um texto com a IA (``status``: código HTTP, se houve resposta)"""
+
+    def __init__(self, mensagem="", status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ReescritaCancelada(ErroIA):
+    """Reescrita interrompida pelo usuário"""
+    pass
+
+
+class TokenBucket:
+    """Limita a taxa de requisições, permitindo rajadas de até ``capacidade``"""
+
+    def __init__(self, taxa=TAXA, capacidade=RAJADA):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consumir(self):
+        """Bloqueia até haver um token disponível"""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class ClienteIA:
+    """Cliente da API do Gemini com sessão HTTP persistente.
+
+    As conexões são reaproveitadas entre requisições (keep-alive), no máximo
+    ``max_concorrencia`` requisições rodam ao mesmo tempo e todas passam pelo
+    mesmo token bucket. Falhas transitórias (timeout, conexão, 429 e 5xx)
+    são repetidas com backoff exponencial e jitter, respeitando Retry-After.
+
+    Em ``reescrever_varios`` os textos vão em lotes de ``tamanho_lote`` por
+    requisição, com resposta estruturada; itens ausentes ou inválidos na
+    resposta são refeitos um a um. Se o modelo recusar o lote (400, por
+    exemplo por não aceitar ``responseSchema``), os lotes são desligados
+    para o resto da sessão, sem gastar mais uma requisição em cada um.
+
+    Reescritas já feitas vêm do ``cache`` (por padrão o cache persistente
+    de core.ai_cache; ``cache=False`` desliga) sem tocar a rede.
+    """
+
+    def __init__(self, api_key, base_url=None, modelo=MODELO, max_concorrencia=MAX_CONCORRENCIA,
+                 taxa=TAXA, rajada=RAJADA, timeout=TIMEOUT, tentativas=MAX_TENTATIVAS, cache=None,
+                 tamanho_lote=TAMANHO_LOTE):
+        self.api_key = api_key
+        self.base_url = (base_url or GEMINI_BASE_URL).rstrip('/')
+        self.modelo = modelo
+        self.max_concorrencia = max_concorrencia
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.lotes = self.tamanho_lote > 1
+        self.limite = TokenBucket(taxa, rajada)
+        self.cache = ai_cache.cache_padrao() if cache is None else (cache or None)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concorrencia)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    @property
+    def url(self):
+        return f"{self.base_url}/v1beta/models/{self.modelo}:generateContent"
+
+    def _espera(self, tentativa, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(BACKOFF_MAX, float(retry_after))
+                except ValueError:
+                    pass
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** tentativa) * random.uniform(0.5, 1.0)
+
+    def _post(self, corpo, cancel_event=None):
+        """POST com limite de taxa e novas tentativas; retorna o JSON da resposta.
+
+        Com ``cancel_event`` definido, antes de cada tentativa e durante a
+        espera entre elas, lança ``ReescritaCancelada``.
+        """
+        for tentativa in range(self.tentativas):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ReescritaCancelada()
+            self.limite.consumir()
+            response = None
+            try:
+                response = self.session.post(self.url, params={"key": self.api_key},
+                                             json=corpo, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                erro = f"falha de rede: {str(e)}"
+            else:
+                if response.status_code not in STATUS_TRANSITORIOS:
+                    if not response.ok:
+                        raise ErroIA(f"Erro {response.status_code} da API: {response.text[:200]}",
+                                     response.status_code)
+                    try:
+                        return response.json()
+                    except ValueError:
+                        raise ErroIA(f"Resposta da API não é JSON: {response.text[:200]}")
+                erro = f"status {response.status_code}"
+
+            if tentativa + 1 < self.tentativas:
+                espera = self._espera(tentativa, response)
+                logger.warning(f"Requisição à IA falhou ({erro}); nova tentativa em {espera:.1f}s")
+                if cancel_event is None:
+                    time.sleep(espera)
+                elif cancel_event.wait(espera):
+                    raise ReescritaCancelada()
+        raise ErroIA(f"Requisição à IA falhou após {self.tentativas} tentativas ({erro})")
+
+    @staticmethod
+    def _texto_resposta(resposta):
+        try:
+            texto = resposta["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            raise ErroIA("Resposta da API em formato inesperado")
+        if not isinstance(texto, str) or not texto.strip():
+            raise ErroIA("Resposta da API sem texto")
+        return texto
+
+    def _do_cache(self, texto):
+        return self.cache.obter(texto, PROMPT, self.modelo) if self.cache is not None else None
+
+    def _para_cache(self, texto, reescrita):
+        # Lote e requisição individual pedem a mesma troca: compartilham a chave
+        if self.cache is not None:
+            self.cache.gravar(texto, PROMPT, self.modelo, reescrita)
+
+    def reescrever(self, texto, cancel_event=None):
+        """Reescreve ``texto`` trocando palavras por sinônimos"""
+        guardada = self._do_cache(texto)
+        if guardada is not None:
+            return guardada
+
+        corpo = {"contents": [{"parts": [{"text": PROMPT.format(texto=texto)}]}]}
+        reescrita = self._texto_resposta(self._post(corpo, cancel_event))
+        self._para_cache(texto, reescrita)
+        return reescrita
+
+    def reescrever_lote(self, textos, cancel_event=None):
+        """Reescreve vários textos numa única requisição.
+
+        Retorna uma lista na ordem de ``textos`` com None para os itens que
+        faltaram ou vieram inválidos na resposta; erros da requisição em si
+        (rede, status, JSON ilegível) lançam ``ErroIA``.
+        """
+        itens = json.dumps([{"id": i, "texto": texto} for i, texto in enumerate(textos)], ensure_ascii=False)
+        corpo = {
+            "contents": [{"parts": [{"text": PROMPT_LOTE.format(itens=itens)}]}],
+            "generationConfig": {"responseMimeType": "application/json", "responseSchema": ESQUEMA_LOTE},
+        }
+        try:
+            resposta = self._post(corpo, cancel_event)
+        except ErroIA as e:
+            if e.status == 400 and self.lotes:
+                self.lotes = False
+                logger.warning(f"O modelo {self.modelo} recusou o lote; enviando um a um nesta sessão")
+            raise
+        try:
+            dados = json.loads(self._texto_resposta(resposta))
+        except ValueError:
+            raise ErroIA("Resposta do lote não é JSON válido")
+        if not isinstance(dados, list):
+            raise ErroIA("Resposta do lote não é uma lista")
+
+        resultados = [None] * len(textos)
+        for item in dados:
+            if not isinstance(item, dict):
+                continue
+            i, reescrita = item.get("id"), item.get("texto")
+            if (isinstance(i, int) and not isinstance(i, bool) and 0 <= i < len(textos)
+                    and resultados[i] is None and isinstance(reescrita, str) and reescrita.strip()):
+                resultados[i] = reescrita
+        return resultados
+
+    def _reescrever_grupo(self, textos, cancel_event):
+        """Um lote com retorno individual para os itens que falharem (roda no pool)"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReescritaCancelada()
+        if len(textos) == 1:
+            return [self.reescrever(textos[0], cancel_event)]
+
+        resultados = [None] * len(textos)
+        if self.lotes:
+            try:
+                resultados = self.reescrever_lote(textos, cancel_event)
+            except ReescritaCancelada:
+                raise
+            except ErroIA as e:
+                logger.warning(f"Lote de {len(textos)} textos falhou ({str(e)}); enviando um a um")
+
+        faltando = resultados.count(None)
+        if 0 < faltando < len(textos):
+            logger.warning(f"{faltando} de {len(textos)} itens do lote inválidos; enviando um a um")
+        for i, texto in enumerate(textos):
+            if resultados[i] is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ReescritaCancelada()
+                resultados[i] = self.reescrever(texto, cancel_event)
+            else:
+                self._para_cache(texto, resultados[i])
+        return resultados
+
+    def reescrever_varios(self, textos, progress=None, cancel_event=None):
+        """Reescreve vários textos em lotes paralelos e retorna os resultados na mesma ordem.
+
+        Textos já no cache não geram requisição. ``progress(concluidos,
+        total)`` é chamado na thread de quem chamou; com ``cancel_event``
+        definido, as requisições pendentes são descartadas e
+        ``ReescritaCancelada`` é lançada.
+        """
+        textos = list(textos)
+        resultados = [self._do_cache(texto) for texto in textos]
+        pendentes = [i for i, r in enumerate(resultados) if r is None]
+        concluidos = len(textos) - len(pendentes)
+        if progress and concluidos:
+            progress(concluidos, len(textos))
+
+        tamanho = self.tamanho_lote if self.lotes else 1
+        grupos = [pendentes[n:n + tamanho] for n in range(0, len(pendentes), tamanho)]
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as pool:
+            futuros = {pool.submit(self._reescrever_grupo, [textos[i] for i in grupo], cancel_event): grupo
+                       for grupo in grupos}
+            try:
+                for futuro in as_completed(futuros):
+                    grupo = futuros[futuro]
+                    for i, reescrita in zip(grupo, futuro.result()):
+                        resultados[i] = reescrita
+                    concluidos += len(grupo)
+                    if progress:
+                        progress(concluidos, len(textos))
+            except BaseException:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+        return resultados
+
+    def fechar(self):
+        self.session.close()
+
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+
+def cliente(api_key):
+    """Cliente compartilhado (e sua sessão) para ``api_key``"""
+    with _clientes_lock:
+        if api_key not in _clientes:
+            _clientes[api_key] = ClienteIA(api_key)
+        return _clientes[api_key]
+
 
 def substituir_por_sinonimos(texto, api_key):
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key=" + api_key
-    headers = {"Content-Type": "application/json"}
-    data = {
-        "contents": [{"parts": [{"text": f"Troque por sinônimos mantendo o sentido: {texto}"}]}]
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-    return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+    return cliente(api_key).reescrever(texto)
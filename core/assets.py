@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+from config.settings import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = os.path.join(BASE_DIR, "output", "temp")
+# Orçamento do diretório: acima dele saem os arquivos usados há mais tempo
+MAX_BYTES = 64 * 1024 * 1024
+# Arquivos sem uso há mais de 7 dias são removidos
+MAX_IDADE = 7 * 24 * 3600
+# Arquivos usados há menos tempo que isto nunca são removidos (podem estar
+# no formato da prova aberta, esperando a geração)
+MIN_IDADE = 10 * 60
+
+
+class AssetStore:
+    """Arquivos temporários (imagens extraídas, cabeçalhos) nomeados pelo conteúdo.
+
+    O nome é o SHA-256 dos bytes, então a mesma imagem extraída de várias
+    provas (ou várias vezes da mesma) é gravada uma única vez. O último uso
+    de cada arquivo fica no atime (``tocar``), sem alterar o mtime, do qual
+    dependem os caches de imagens; a cada gravação, arquivos mais velhos
+    que ``max_idade`` e, acima de ``max_bytes``, os usados há mais tempo
+    são removidos. Os arquivos ``fixar``-ados (os do formato da prova
+    aberta) nunca são removidos, por mais tempo que a prova fique aberta.
+    """
+
+    def __init__(self, diretorio=ASSET_DIR, max_bytes=MAX_BYTES, max_idade=MAX_IDADE, min_idade=MIN_IDADE):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.max_idade = max_idade
+        self.min_idade = min_idade
+        self._lock = threading.Lock()
+        self._fixados = frozenset()
+
+    def fixar(self, caminhos):
+        """Protege ``caminhos`` da remoção, substituindo os fixados antes"""
+        self._fixados = frozenset(os.path.abspath(c) for c in caminhos if c)
+
+    def caminho(self, dados, extensao=""):
+        if extensao and not extensao.startswith("."):
+            extensao = f".{extensao}"
+        return os.path.join(self.diretorio, hashlib.sha256(dados).hexdigest()[:32] + extensao.lower())
+
+    def gravar(self, dados, extensao=""):
+        """Caminho de um arquivo com ``dados`` (reaproveita o existente)"""
+        caminho = self.caminho(dados, extensao)
+        if os.path.exists(caminho):
+            self.tocar(caminho)
+            return caminho
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        temp_path = f"{caminho}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(dados)
+            os.replace(temp_path, caminho)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self.despejar(protegidos=(caminho,))
+        return caminho
+
+    def tocar(self, caminho):
+        """Marca o arquivo como usado agora (só para arquivos deste armazenamento)"""
+        if os.path.dirname(os.path.abspath(caminho)) != os.path.abspath(self.diretorio):
+            return
+        try:
+            os.utime(caminho, (time.time(), os.stat(caminho).st_mtime))
+        except OSError:
+            pass
+
+    def despejar(self, protegidos=()):
+        """Aplica os limites de idade e tamanho; retorna quantos arquivos saíram"""
+        agora = time.time()
+        protegidos = {os.path.abspath(p) for p in protegidos} | self._fixados
+        with self._lock:
+            arquivos = []
+            try:
+                entradas = list(os.scandir(self.diretorio))
+            except OSError:
+                return 0
+            for entrada in entradas:
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue
+                if entrada.is_file():
+                    arquivos.append((max(info.st_atime, info.st_mtime), info.st_size, entrada.path))
+
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            removidos = 0
+            for uso, tamanho, caminho in sorted(arquivos):
+                idade = agora - uso
+                if idade < self.min_idade or os.path.abspath(caminho) in protegidos:
+                    continue
+                if idade <= self.max_idade and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    continue
+                total -= tamanho
+                removidos += 1
+        if removidos:
+            logger.info(f"{removidos} arquivos temporários removidos de {self.diretorio}")
+        return removidos
+
+
+_store = AssetStore()
+
+
+def gravar(dados, extensao=""):
+    """Grava ``dados`` no armazenamento compartilhado em output/temp e retorna o caminho"""
+    return _store.gravar(dados, extensao)
+
+
+def fixar(caminhos):
+    _store.fixar(caminhos)
+
+
+def tocar(caminho):
+    _store.tocar(caminho)
+
+
+def despejar():
+    return _store.despejar()
@@ -0,0 +1,75 @@
+import logging
+import os
+import uuid
+
+import fitz  # PyMuPDF
+from reportlab.lib.pagesizes import A4
+
+from core import documents
+
+logger = logging.getLogger(__name__)
+
+
+def _pagina_separadora(doc, titulo, largura, altura):
+    page = doc.new_page(width=largura, height=altura)
+    page.insert_text((72, altura / 2), titulo, fontname="hebo", fontsize=24)
+    return page
+
+
+def montar_caderno(caminhos, destino, duplex=True, separadores=False, rotulos=None):
+    """Junta as variantes num único PDF pronto para impressão.
+
+    As páginas são copiadas de cada arquivo (``insert_pdf``), sem nova
+    renderização, uma variante por vez: o custo é linear no número de
+    páginas e o mapa de objetos de cada origem é descartado ao terminar a
+    cópia. Com ``duplex`` cada variante (e cada separador) ocupa um número
+    par de páginas, para que toda variante comece na frente de uma folha.
+    ``rotulos`` dá o texto de cada separador (padrão: nome do arquivo).
+    O ``documents.fitz_lock`` é liberado entre uma variante e outra.
+    Retorna o número de páginas do caderno.
+    """
+    with documents.fitz_lock:
+        caderno = fitz.open()
+    largura, altura = A4
+    try:
+        for i, caminho in enumerate(caminhos):
+            with documents.fitz_lock:
+                if separadores:
+                    rotulo = rotulos[i] if rotulos else os.path.splitext(os.path.basename(caminho))[0]
+                    _pagina_separadora(caderno, rotulo, largura, altura)
+                    if duplex:
+                        caderno.new_page(width=largura, height=altura)
+
+                with fitz.open(caminho) as origem:
+                    if origem.page_count == 0:
+                        logger.warning(f"Variante sem páginas ignorada: {caminho}")
+                        continue
+                    largura, altura = origem[-1].rect.width, origem[-1].rect.height
+                    caderno.insert_pdf(origem, final=True)
+                    paginas = origem.page_count
+
+                # Página em branco para a próxima variante começar numa folha nova
+                if duplex and paginas % 2:
+                    caderno.new_page(width=largura, height=altura)
+
+        with documents.fitz_lock:
+            total = caderno.page_count
+        if total == 0:
+            raise ValueError("Nenhuma página para montar o caderno")
+
+        os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+        temp_path = f"{destino}.{uuid.uuid4().hex}.tmp"
+        try:
+            with documents.fitz_lock:
+                caderno.save(temp_path, garbage=1, deflate=True)
+            os.replace(temp_path, destino)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    finally:
+        with documents.fitz_lock:
+            caderno.close()
+
+    logger.info(f"Caderno montado: {destino} ({total} páginas)")
+    return total
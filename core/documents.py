@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# Documentos sem uso mantidos abertos para a próxima consulta
+MAX_ABERTOS = 8
+
+# O PyMuPDF usa um único contexto do MuPDF para o processo inteiro: duas
+# chamadas ao fitz não podem rodar ao mesmo tempo, nem em documentos
+# diferentes. Todo código que usa o fitz (leitor, visualizador, gerador,
+# otimizador, caderno) envolve suas chamadas neste lock, trecho a trecho,
+# para não bloquear os demais por mais tempo que o necessário.
+fitz_lock = threading.RLock()
+
+
+class _Entrada:
+    def __init__(self, doc):
+        self.doc = doc
+        self.refs = 0
+        # Uma única abertura do documento, mesmo com vários pedidos simultâneos
+        self.lock = threading.Lock()
+
+
+class DocumentCache:
+    """Cache de documentos PDF abertos compartilhado pelo processo.
+
+    A chave é (caminho, mtime, tamanho): um arquivo alterado no disco é
+    reaberto e a versão antiga é fechada assim que ninguém a estiver
+    usando. Cada ``abrir`` incrementa uma contagem de referências; entre os
+    documentos sem referências, os menos usados recentemente são fechados
+    quando há mais de ``max_abertos``.
+
+    O documento não fica bloqueado durante o ``with``: quem o usa envolve
+    cada trecho de chamadas ao fitz em ``fitz_lock``, então uma leitura
+    longa página a página não impede o visualizador e os importadores de
+    usarem o fitz entre uma página e outra.
+
+    Com ``em_memoria`` o documento é aberto a partir dos bytes do arquivo,
+    lidos uma única vez, e não mantém o arquivo aberto (no Windows, a prova
+    original pode ser sobrescrita enquanto está em pré-visualização).
+    """
+
+    def __init__(self, max_abertos=MAX_ABERTOS, em_memoria=False):
+        self.max_abertos = max_abertos
+        self.em_memoria = em_memoria
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+
+    @staticmethod
+    def _chave(caminho):
+        info = os.stat(caminho)
+        return (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+
+    def _abrir_documento(self, caminho):
+        if self.em_memoria:
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+            with fitz_lock:
+                return fitz.open(stream=dados, filetype="pdf")
+        with fitz_lock:
+            return fitz.open(caminho)
+
+    @contextmanager
+    def abrir(self, caminho):
+        """Documento aberto (e já analisado) para ``caminho``; não deve ser fechado por quem usa"""
+        chave = self._chave(caminho)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                entrada = _Entrada(None)
+                self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            entrada.refs += 1
+
+        try:
+            with entrada.lock:
+                if entrada.doc is None or entrada.doc.is_closed:
+                    entrada.doc = self._abrir_documento(caminho)
+                    logger.debug(f"Documento aberto: {caminho}")
+            yield entrada.doc
+        finally:
+            with self._lock:
+                entrada.refs -= 1
+                ociosos = self._remover_ociosos()
+            self._fechar(ociosos)
+
+    @staticmethod
+    def _fechar(entradas):
+        # Fora do _lock: quem segura o fitz_lock pode estar esperando por ele
+        with fitz_lock:
+            for entrada in entradas:
+                if entrada.doc is not None and not entrada.doc.is_closed:
+                    entrada.doc.close()
+
+    def _remover_ociosos(self):
+        """Tira do cache versões antigas de arquivos alterados e o excedente do LRU (chamar com _lock)"""
+        versoes = {}
+        for chave in self._entradas:
+            versoes[chave[0]] = chave  # A última inserida é a mais recente
+        ociosas = [chave for chave, entrada in self._entradas.items()
+                   if entrada.refs == 0 and versoes[chave[0]] != chave]
+        excedente = len(self._entradas) - len(ociosas) - self.max_abertos
+        for chave, entrada in self._entradas.items():
+            if excedente <= 0:
+                break
+            if entrada.refs == 0 and chave not in ociosas:
+                ociosas.append(chave)
+                excedente -= 1
+        return [self._entradas.pop(chave) for chave in ociosas]
+
+    def limpar(self):
+        """Fecha todos os documentos sem uso"""
+        with self._lock:
+            ociosos = [self._entradas.pop(c) for c in [c for c, e in self._entradas.items() if e.refs == 0]]
+        self._fechar(ociosos)
+
+
+_cache = DocumentCache()
+
+
+def abrir(caminho):
+    """Documento compartilhado de ``caminho`` (use com ``with``)"""
+    return _cache.abrir(caminho)
+
+
+def limpar():
+    _cache.limpar()
@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from config.settings import ASSETS_DIR, CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+FONT_INDEX_FILE = os.path.join(CACHE_DIR, "font_index.json")
+FONT_INDEX_VERSION = 1
+
+# Nomes curtos usados pelas fontes do Windows (arialbd.ttf, timesbi.ttf...)
+_NOMES_WINDOWS = {
+    'arial': ('arial', False, False), 'arialbd': ('arial', True, False),
+    'ariali': ('arial', False, True), 'arialbi': ('arial', True, True),
+    'times': ('timesnewroman', False, False), 'timesbd': ('timesnewroman', True, False),
+    'timesi': ('timesnewroman', False, True), 'timesbi': ('timesnewroman', True, True),
+    'cour': ('couriernew', False, False), 'courbd': ('couriernew', True, False),
+    'couri': ('couriernew', False, True), 'courbi': ('couriernew', True, True),
+    'calibri': ('calibri', False, False), 'calibrib': ('calibri', True, False),
+    'calibrii': ('calibri', False, True), 'calibriz': ('calibri', True, True),
+    'verdana': ('verdana', False, False), 'verdanab': ('verdana', True, False),
+    'verdanai': ('verdana', False, True), 'verdanaz': ('verdana', True, True),
+}
+
+# Famílias com métricas compatíveis, na ordem de preferência. Sem nenhuma
+# delas a fonte vira apelido de Helvetica/Times/Courier (mesmas métricas);
+# DejaVu e similares mudariam as quebras de linha e a paginação. Calibri e
+# Cambria só têm Carlito e Caladea: as Liberation seguem Arial/Times.
+_SUBSTITUTOS = {
+    'arial': ['liberationsans', 'arimo', 'helvetica'],
+    'helvetica': ['arial', 'liberationsans', 'arimo'],
+    'timesnewroman': ['liberationserif', 'tinos'],
+    'couriernew': ['liberationmono', 'cousine'],
+    'calibri': ['carlito'],
+    'cambria': ['caladea'],
+}
+
+# Famílias com as mesmas larguras de Helvetica, Times e Courier
+_COMPATIVEIS_BASE14 = {
+    'arial': 'sans', 'helvetica': 'sans', 'liberationsans': 'sans', 'arimo': 'sans',
+    'timesnewroman': 'serif', 'liberationserif': 'serif', 'tinos': 'serif',
+    'couriernew': 'mono', 'liberationmono': 'mono', 'cousine': 'mono',
+}
+
+# Fontes padrão do PDF usadas quando nenhum TTF é encontrado
+_BASE14 = {
+    'sans': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique'),
+    'serif': ('Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic'),
+    'mono': ('Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique'),
+}
+
+_lock = threading.RLock()
+_indice = None
+_registradas = {}
+
+
+def _diretorios_fontes():
+    """Diretórios com fontes: os do projeto primeiro, depois os do sistema"""
+    dirs = [os.path.join(ASSETS_DIR, 'fonts'), ASSETS_DIR]
+    home = os.path.expanduser("~")
+    if sys.platform == 'win32':
+        dirs.append(os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'))
+        if os.environ.get('LOCALAPPDATA'):
+            dirs.append(os.path.join(os.environ['LOCALAPPDATA'], 'Microsoft', 'Windows', 'Fonts'))
+    elif sys.platform == 'darwin':
+        dirs += ['/Library/Fonts', '/System/Library/Fonts', os.path.join(home, 'Library', 'Fonts')]
+    else:
+        dirs += ['/usr/share/fonts', '/usr/local/share/fonts',
+                 os.path.join(home, '.fonts'), os.path.join(home, '.local', 'share', 'fonts')]
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def _familia_normalizada(nome):
+    nome = re.sub(r'[^a-z0-9]', '', nome.lower())
+    for sufixo in ('psmt', 'mt', 'ps'):
+        if nome.endswith(sufixo) and len(nome) > len(sufixo) + 2:
+            nome = nome[:-len(sufixo)]
+            break
+    return nome
+
+
+def analisar_nome(nome):
+    """Separa um nome de fonte (PDF ou arquivo) em (família, negrito, itálico).
+
+    Exemplos: ``TimesNewRomanPS-BoldMT`` -> ('timesnewroman', True, False),
+    ``ABCDEF+Arial,Italic`` -> ('arial', False, True), ``arialbd`` -> ('arial', True, False).
+    """
+    nome = re.sub(r'^[A-Z]{6}\+', '', nome.strip())
+    curto = nome.lower()
+    if curto in _NOMES_WINDOWS:
+        return _NOMES_WINDOWS[curto]
+
+    partes = re.split(r'[-,]', nome, maxsplit=1)
+    familia = partes[0]
+    estilo = partes[1].lower() if len(partes) > 1 else ''
+
+    # Estilo colado ao nome da família ("Times New Roman Bold", "ArialBoldItalic")
+    sufixo = re.search(r'(?i)[\s_]*(bold|black|heavy)?[\s_]*(italic|oblique)?[\s_]*(regular|book|normal)?$', familia)
+    if sufixo and sufixo.group(0) and len(sufixo.group(0)) < len(familia):
+        estilo += sufixo.group(0).lower()
+        familia = familia[:sufixo.start()]
+
+    negrito = any(p in estilo for p in ('bold', 'black', 'heavy'))
+    italico = any(p in estilo for p in ('italic', 'oblique'))
+    return _familia_normalizada(familia), negrito, italico
+
+
+def _chave_estilo(negrito, italico):
+    return ('bold' if negrito else '') + ('italic' if italico else '') or 'regular'
+
+
+def _assinatura(diretorios):
+    return {d: os.stat(d).st_mtime for d in diretorios}
+
+
+def _varrer(raizes):
+    """Percorre os diretórios de fontes e monta o índice família -> estilo -> caminho"""
+    fontes = {}
+    diretorios = []
+    for raiz in raizes:
+        for dirpath, _, arquivos in os.walk(raiz):
+            diretorios.append(dirpath)
+            for arquivo in arquivos:
+                base, ext = os.path.splitext(arquivo)
+                if ext.lower() != '.ttf':
+                    continue
+                familia, negrito, italico = analisar_nome(base)
+                estilos = fontes.setdefault(familia, {})
+                # O primeiro encontrado vence: fontes do projeto têm prioridade
+                estilos.setdefault(_chave_estilo(negrito, italico), os.path.join(dirpath, arquivo))
+    return fontes, diretorios
+
+
+def _carregar_indice():
+    """Carrega o índice do disco se ainda for válido, ou reconstrói e salva"""
+    try:
+        with open(FONT_INDEX_FILE, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if dados.get('version') == FONT_INDEX_VERSION and dados.get('roots') == _diretorios_fontes():
+            if _assinatura(dados['dirs']) == dados['dirs']:
+                return dados['fonts']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    raizes = _diretorios_fontes()
+    fontes, diretorios = _varrer(raizes)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(FONT_INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': FONT_INDEX_VERSION,
+                'roots': raizes,
+                'dirs': _assinatura(diretorios),
+                'fonts': fontes,
+            }, f)
+    except OSError as e:
+        logger.warning(f"Não foi possível salvar o índice de fontes: {str(e)}")
+    logger.info(f"Índice de fontes reconstruído: {len(fontes)} famílias")
+    return fontes
+
+
+def indice_fontes():
+    """Índice família -> estilo -> caminho, carregado uma vez por processo"""
+    global _indice
+    with _lock:
+        if _indice is None:
+            _indice = _carregar_indice()
+        return _indice
+
+
+def reconstruir_indice():
+    """Descarta o índice em memória e em disco e varre os diretórios novamente"""
+    global _indice
+    with _lock:
+        try:
+            os.remove(FONT_INDEX_FILE)
+        except OSError:
+            pass
+        _indice = None
+        return indice_fontes()
+
+
+def resolver_caminho(nome):
+    """Retorna o TTF mais próximo para um nome de fonte, ou None"""
+    familia, negrito, italico = analisar_nome(nome)
+    indice = indice_fontes()
+    preferidos = [_chave_estilo(negrito, italico), _chave_estilo(negrito, False),
+                  _chave_estilo(False, italico), 'regular']
+    for candidata in [familia] + _SUBSTITUTOS.get(familia, []):
+        estilos = indice.get(candidata)
+        if not estilos:
+            continue
+        for estilo in preferidos:
+            if estilo in estilos:
+                if estilo != preferidos[0]:
+                    logger.warning(f"Fonte {nome}: estilo {preferidos[0]} não encontrado, "
+                                   f"usando {estilo} ({estilos[estilo]})")
+                return estilos[estilo]
+    return None
+
+
+def _base14(nome):
+    familia, negrito, italico = analisar_nome(nome)
+    if any(p in familia for p in ('courier', 'mono', 'consolas')):
+        variantes = _BASE14['mono']
+    elif any(p in familia for p in ('times', 'serif', 'roman', 'georgia', 'cambria', 'garamond')) \
+            and 'sans' not in familia:
+        variantes = _BASE14['serif']
+    else:
+        variantes = _BASE14['sans']
+    return variantes[(1 if negrito else 0) + (2 if italico else 0)]
+
+
+def base14_equivalente(caminho):
+    """Fonte padrão do PDF com as mesmas métricas do TTF em ``caminho``, ou None"""
+    familia, negrito, italico = analisar_nome(os.path.splitext(os.path.basename(caminho))[0])
+    grupo = _COMPATIVEIS_BASE14.get(familia)
+    if grupo is None:
+        return None
+    return _BASE14[grupo][(1 if negrito else 0) + (2 if italico else 0)]
+
+
+def registrar_fonte(nome):
+    """Garante que ``nome`` possa ser usado em ``canvas.setFont`` e retorna o nome.
+
+    A fonte é registrada uma única vez por processo: com o TTF mais próximo
+    encontrado no índice ou, na falta dele, como apelido de uma fonte padrão
+    do PDF (Helvetica, Times ou Courier).
+    """
+    if not nome:
+        nome = 'Arial'
+    with _lock:
+        if nome in _registradas:
+            return _registradas[nome]
+        if nome in pdfmetrics.standardFonts or nome in pdfmetrics.getRegisteredFontNames():
+            _registradas[nome] = nome
+            return nome
+
+        caminho = resolver_caminho(nome)
+        if caminho:
+            try:
+                pdfmetrics.registerFont(TTFont(nome, caminho))
+                _registradas[nome] = nome
+                return nome
+            except Exception as e:
+                logger.warning(f"Falha ao registrar fonte {nome} ({caminho}): {str(e)}")
+
+        padrao = _base14(nome)
+        if not caminho:
+            logger.warning(f"Fonte {nome} não encontrada, usando {padrao}")
+        pdfmetrics.registerFont(pdfmetrics.Font(nome, padrao, 'WinAnsiEncoding'))
+        _registradas[nome] = nome
+        return nome
+
+
+def caminho_registrado(nome):
+    """Caminho do TTF usado para uma fonte registrada (None para fontes padrão)"""
+    fonte = pdfmetrics.getFont(registrar_fonte(nome))
+    return getattr(getattr(fonte, 'face', None), 'filename', None)
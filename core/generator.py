@@ -4,34 +4,240 @@ import json
 import time
 import io
 import tempfile
+import uuid
+import zipfile
+from contextlib import contextmanager
 from datetime import datetime
-import qrcode
+import fitz  # PyMuPDF
 from PIL import Image
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, Frame
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Spacer, ListFlowable, ListItem
-from config.settings import BASE_DIR
+from config.settings import OUTPUT_DIR
+from core import assets, documents, fonts, images, layout, optimizer, qr
 
-# Configurar logging
+# O arquivo de log é configurado pela aplicação (main.configurar_logging)
 logger = logging.getLogger(__name__)
-log_file = os.path.join(BASE_DIR, "output", "prova_generation.log")
-os.makedirs(os.path.dirname(log_file), exist_ok=True)
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+# Linha de base mínima do texto: acima do QR code do rodapé (20pt + 50pt)
+BOTTOM_MARGIN = 80
+
+
+def _nome_destino(destino):
+    return destino if isinstance(destino, str) else getattr(destino, 'name', repr(destino))
+
+
+@contextmanager
+def _destino_pdf(output_path):
+    """Destino do canvas para ``output_path``.
+
+    Streams (arquivos abertos, entradas de ZIP) são usados diretamente. Para
+    caminhos, o canvas grava num arquivo temporário no mesmo diretório, que
+    é renomeado atomicamente ao final: um PDF incompleto nunca substitui o
+    anterior.
+    """
+    if hasattr(output_path, 'write'):
+        yield output_path
+        return
+    
+    # Criar diretório de saída se não existir
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    temp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _winansi(text):
+    try:
+        text.encode('cp1252')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+class PyMuPDFCanvas:
+    """Backend de desenho com PyMuPDF (fitz).
+    
+    Implementa o subconjunto da API do ``reportlab.pdfgen.canvas.Canvas``
+    usado pelo gerador, com as mesmas coordenadas (origem no canto inferior
+    esquerdo) e as mesmas métricas de fonte. Assim cabeçalho, quebra de
+    linhas e paginação são decididos uma única vez, igual nos dois backends.
+    
+    TTFs com as métricas de Helvetica/Times/Courier (Arial, Liberation...)
+    são desenhados com a fonte padrão equivalente, sem embutir nada, quando
+    o texto cabe no WinAnsi; os demais TTFs são reduzidos aos glifos usados
+    ao salvar. Cada chamada ao fitz segura o ``documents.fitz_lock``, então
+    a geração não bloqueia o visualizador por mais que um desenho.
+    """
+    
+    # Fontes padrão do PDF -> nomes internos do PyMuPDF
+    BASE14 = {
+        'Helvetica': 'helv', 'Helvetica-Bold': 'hebo',
+        'Helvetica-Oblique': 'heit', 'Helvetica-BoldOblique': 'hebi',
+        'Times-Roman': 'tiro', 'Times-Bold': 'tibo',
+        'Times-Italic': 'tiit', 'Times-BoldItalic': 'tibi',
+        'Courier': 'cour', 'Courier-Bold': 'cobo',
+        'Courier-Oblique': 'coit', 'Courier-BoldOblique': 'cobi',
+    }
+    
+    # Cada insert_text/draw_* acrescenta um content stream à página; clean
+    # junta os de cada página num só e garbage=3 descarta os que sobraram.
+    # (Um TextWriter por página evitaria os streams, mas embute a fonte
+    # padrão inteira.)
+    OPCOES_SALVAR = {'garbage': 3, 'deflate': True, 'clean': True}
+    
+    def __init__(self, destino, pagesize=A4):
+        self._destino = destino
+        self._width, self._height = pagesize
+        with documents.fitz_lock:
+            self._doc = fitz.open()
+        self._page = None
+        self._page_fonts = set()
+        self._font_aliases = {}
+        self._title = None
+        self._font_name = 'Helvetica'
+        self._font_size = 12
+        self._fill = (0, 0, 0)
+    
+    def _pagina(self):
+        """Página atual, criada no primeiro desenho (chamar com ``documents.fitz_lock``)"""
+        if self._page is None:
+            self._page = self._doc.new_page(width=self._width, height=self._height)
+            self._page_fonts = set()
+        return self._page
+    
+    def _fitz_font(self, page, text):
+        """Nome da fonte atual na página, inserindo o TTF na primeira vez"""
+        font_name = self._font_name
+        if font_name not in self._font_aliases:
+            font = pdfmetrics.getFont(font_name)
+            filename = getattr(getattr(font, 'face', None), 'filename', None)
+            if filename:
+                base14 = fonts.base14_equivalente(filename)
+                self._font_aliases[font_name] = (f"F{len(self._font_aliases)}", filename,
+                                                 self.BASE14.get(base14) if base14 else None)
+            else:
+                face_name = getattr(font.face, 'name', 'Helvetica')
+                self._font_aliases[font_name] = (self.BASE14.get(face_name, 'helv'), None, None)
+        
+        alias, filename, base14 = self._font_aliases[font_name]
+        if base14 and _winansi(text):
+            return base14
+        if filename and alias not in self._page_fonts:
+            page.insert_font(fontname=alias, fontfile=filename)
+            self._page_fonts.add(alias)
+        return alias
+    
+    def setTitle(self, title):
+        self._title = title
+    
+    def setFont(self, psfontname, size, leading=None):
+        self._font_name = psfontname
+        self._font_size = size
+    
+    def setFillColorRGB(self, r, g, b, alpha=None):
+        self._fill = (r, g, b)
+    
+    def stringWidth(self, text, fontName=None, fontSize=None):
+        return pdfmetrics.stringWidth(text, fontName or self._font_name, fontSize or self._font_size)
+    
+    def drawString(self, x, y, text, *args, **kwargs):
+        if not text:
+            return
+        with documents.fitz_lock:
+            page = self._pagina()
+            page.insert_text(
+                (x, self._height - y), text,
+                fontname=self._fitz_font(page, text), fontsize=self._font_size, color=self._fill
+            )
+    
+    def line(self, x1, y1, x2, y2):
+        with documents.fitz_lock:
+            self._pagina().draw_line((x1, self._height - y1), (x2, self._height - y2), color=(0, 0, 0), width=1)
+    
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        rect = fitz.Rect(x, self._height - y - height, x + width, self._height - y)
+        with documents.fitz_lock:
+            self._pagina().draw_rect(
+                rect,
+                color=(0, 0, 0) if stroke else None,
+                fill=self._fill if fill else None,
+                width=1
+            )
+    
+    def drawImage(self, image, x, y, width=None, height=None, mask=None, **kwargs):
+        rect = fitz.Rect(x, self._height - y - height, x + width, self._height - y)
+        if isinstance(image, str):
+            with documents.fitz_lock:
+                self._pagina().insert_image(rect, filename=image)
+            return
+        
+        # ImageReader sobre BytesIO (QR code e pipeline de imagens): repassar
+        # os bytes codificados; senão, montar um pixmap com os dados RGB
+        stream = getattr(getattr(image, 'fp', None), 'getvalue', None)
+        with documents.fitz_lock:
+            if stream is not None:
+                try:
+                    self._pagina().insert_image(rect, stream=stream())
+                    return
+                except ValueError:
+                    pass
+            img_width, img_height = image.getSize()
+            pix = fitz.Pixmap(fitz.csRGB, img_width, img_height, image.getRGBData(), 0)
+            self._pagina().insert_image(rect, pixmap=pix)
+            del pix
+    
+    def showPage(self):
+        with documents.fitz_lock:
+            self._pagina()
+            self._page = None
+        # Como no ReportLab, cada página começa com preenchimento preto
+        self._fill = (0, 0, 0)
+    
+    def save(self):
+        with documents.fitz_lock:
+            if self._doc.page_count == 0:
+                self._pagina()
+            self._page = None
+            if self._title:
+                self._doc.set_metadata({'title': self._title})
+            if any(filename for _, filename, _ in self._font_aliases.values()):
+                optimizer.subsetar_fontes(self._doc)
+            if hasattr(self._destino, 'write'):
+                dados = self._doc.tobytes(**self.OPCOES_SALVAR)
+            else:
+                self._doc.save(self._destino, **self.OPCOES_SALVAR)
+                dados = None
+            self._doc.close()
+        if dados is not None:
+            self._destino.write(dados)
+
+
+# Backends de desenho disponíveis (options['backend'])
+BACKENDS = {
+    'reportlab': canvas.Canvas,
+    'pymupdf': PyMuPDFCanvas,
+}
+
 
 class PDFGenerator:
     def __init__(self, questions=None, options=None):
         """Inicializa o gerador PDF com questões e opções"""
         self.questions = questions or []
         self.options = options or {}
+        # Bytes antes/depois da última otimização (options['optimize'])
+        self.optimization_stats = None
         
         # Registra fontes padrão
         self._register_fonts()
@@ -41,35 +247,28 @@ class PDFGenerator:
         self.text_style = self.styles['Normal']
         
     def _register_fonts(self):
-        """Registra fontes necessárias"""
-        pdfmetrics.registerFont(TTFont('Arial', os.path.join(BASE_DIR, 'assets', 'Arial.ttf')))
+        """Registra fontes necessárias (uma única vez por processo)"""
+        for font_name in ('Arial', 'Arial-Bold'):
+            fonts.registrar_fonte(font_name)
         
+    def _create_canvas(self, destino):
+        """Cria o canvas do backend escolhido em options['backend'] (padrão: reportlab)"""
+        backend = self.options.get('backend', 'reportlab')
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de desenho desconhecido: {backend}")
+        return BACKENDS[backend](destino, pagesize=A4)
+    
     def add_qr_code(self, canvas, page_width, page_height, data="https://exemplo.com"):
         """Adiciona um QR code à página"""
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Gerar e salvar o QR code temporariamente
-            img = qr.make_image(fill_color="black", back_color="white")
-            temp_path = os.path.join(BASE_DIR, "output", "provas_geradas", "qrcode_temp.png")
-            os.makedirs(os.path.dirname(temp_path), exist_ok=True)
-            img.save(temp_path)
-            
             # Definir tamanho e posição do QR code (no rodapé, direita)
             qr_width = 50  # em pontos (cerca de 1.8 cm)
             margin = 20
             qr_x = page_width - qr_width - margin
             qr_y = margin
             
-            # Adicionar ao Canvas
-            canvas.drawImage(temp_path, qr_x, qr_y, width=qr_width, height=qr_width)
+            # Desenhar direto da memória (PNG em cache por conteúdo)
+            canvas.drawImage(qr.qr_image_reader(data), qr_x, qr_y, width=qr_width, height=qr_width)
             
             logger.info(f"QR code adicionado com sucesso: {data}")
         except Exception as e:
@@ -88,21 +287,34 @@ class PDFGenerator:
             
             # 1. Adicionar imagens com suas posições e tamanhos exatos
             for img_path in all_images:
-                if os.path.exists(img_path) and os.path.getsize(img_path) > 0:
-                    if img_path in image_sizes:
-                        size_info = image_sizes[img_path]
-                        
-                        # Converter mm para pontos para o ReportLab
-                        # 1mm = 2.83465 pontos
-                        x_pos_pt = size_info.get('x', 0) * 2.83465
-                        # Corrigido: não inverter o eixo Y
-                        y_pos_pt = size_info.get('y', 0) * 2.83465
-                        width_pt = size_info.get('width', 0) * 2.83465
-                        height_pt = size_info.get('height', 0) * 2.83465
-                        
-                        # Adicionar a imagem com posicionamento preciso
-                        canvas.drawImage(img_path, x_pos_pt, y_pos_pt, width=width_pt, height=height_pt, mask='auto')
-            
+                if not os.path.exists(img_path) or os.path.getsize(img_path) == 0:
+                    logger.error(f"Imagem do cabeçalho original ausente, omitida: {img_path}")
+                    continue
+                if img_path in image_sizes:
+                    size_info = image_sizes[img_path]
+                    
+                    # Converter mm para pontos para o ReportLab
+                    # 1mm = 2.83465 pontos
+                    x_pos_pt = size_info.get('x', 0) * 2.83465
+                    # Corrigido: não inverter o eixo Y
+                    y_pos_pt = size_info.get('y', 0) * 2.83465
+                    width_pt = size_info.get('width', 0) * 2.83465
+                    height_pt = size_info.get('height', 0) * 2.83465
+                    
+                    if width_pt <= 0 or height_pt <= 0:
+                        continue
+                    
+                    # Imagem em uso: não deve sair do armazenamento temporário
+                    assets.tocar(img_path)
+                    
+                    # Adicionar a imagem com posicionamento preciso, já reduzida
+                    # para o tamanho impresso e carregada uma vez por processo
+                    image = images.imagem_para_impressao(
+                        img_path, width_pt, height_pt,
+                        dpi=self.options.get('image_dpi', images.DPI_IMPRESSAO)
+                    )
+                    canvas.drawImage(image, x_pos_pt, y_pos_pt, width=width_pt, height=height_pt, mask='auto')
+        
             # 2. Adicionar texto com posicionamento e formatação exatos
             if exact_text_positions:
                 for text_pos in exact_text_positions:
@@ -117,18 +329,8 @@ class PDFGenerator:
                     y0 = A4[1] - y0
                     
                     # Configurar fonte
-                    font_name = text_pos.get('font', 'Arial')
-                    # Verificar se precisamos registrar essa fonte
-                    if font_name not in pdfmetrics._fonts:
-                        try:
-                            # Tentar registrar a fonte se não for padrão
-                            if font_name.lower() not in ['arial', 'helvetica', 'times-roman', 'courier']:
-                                font_path = os.path.join(BASE_DIR, 'assets', f'{font_name}.ttf')
-                                if os.path.exists(font_path):
-                                    pdfmetrics.registerFont(TTFont(font_name, font_path))
-                        except:
-                            # Fallback para Arial se não conseguir registrar a fonte
-                            font_name = 'Arial'
+                    # Resolver a fonte pelo registro (TTF mais próximo ou fonte padrão)
+                    font_name = fonts.registrar_fonte(text_pos.get('font', 'Arial'))
                     
                     # Configurar fonte no canvas
                     font_size = text_pos.get('size', 12)
@@ -169,15 +371,7 @@ class PDFGenerator:
                                     y0 = A4[1] - y0
                                     
                                     # Fonte
-                                    font_name = span.get('font', 'Arial')
-                                    if font_name not in pdfmetrics._fonts:
-                                        try:
-                                            if font_name.lower() not in ['arial', 'helvetica', 'times-roman', 'courier']:
-                                                font_path = os.path.join(BASE_DIR, 'assets', f'{font_name}.ttf')
-                                                if os.path.exists(font_path):
-                                                    pdfmetrics.registerFont(TTFont(font_name, font_path))
-                                        except:
-                                            font_name = 'Arial'
+                                    font_name = fonts.registrar_fonte(span.get('font', 'Arial'))
                                     
                                     # Tamanho e cor
                                     font_size = span.get('size', 12)
@@ -220,21 +414,11 @@ class PDFGenerator:
                             if not run_text:
                                 continue
                             
-                            font_name = run.get('font', 'Arial')
+                            font_name = fonts.registrar_fonte(run.get('font') or 'Arial')
                             font_size = run.get('size', 12)
                             if hasattr(font_size, 'pt'):
                                 font_size = font_size.pt
                             
-                            # Registrar fonte se necessário
-                            if font_name not in pdfmetrics._fonts:
-                                try:
-                                    if font_name.lower() not in ['arial', 'helvetica', 'times-roman', 'courier']:
-                                        font_path = os.path.join(BASE_DIR, 'assets', f'{font_name}.ttf')
-                                        if os.path.exists(font_path):
-                                            pdfmetrics.registerFont(TTFont(font_name, font_path))
-                                except:
-                                    font_name = 'Arial'
-                            
                             canvas.setFont(font_name, font_size)
                             total_width += canvas.stringWidth(run_text)
                         
@@ -248,7 +432,7 @@ class PDFGenerator:
                                 continue
                             
                             # Aplicar formatação
-                            font_name = run.get('font', 'Arial')
+                            font_name = fonts.registrar_fonte(run.get('font') or 'Arial')
                             font_size = run.get('size', 12)
                             if hasattr(font_size, 'pt'):
                                 font_size = font_size.pt
@@ -293,26 +477,93 @@ class PDFGenerator:
             logger.error(f"Erro ao adicionar cabeçalho original: {str(e)}")
             # Continuar mesmo com erro, para não impedir a geração do PDF
     
-    def generate_pdf(self, output_path, metadata=None):
-        """Gera um PDF formatado com questões e opções"""
-        logger.info(f"Iniciando geração de PDF: {output_path}")
+    def _estilo_questao(self, enunciado, original_format):
+        """Resolve a partir do formato original como a questão deve ser desenhada"""
+        blocos = original_format.get('blocks', [])
         
-        # Criar diretório de saída se não existir
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # Verificar se este bloco é uma tabela no formato original
+        for bloco in blocos:
+            if bloco.get('is_table', False) and enunciado in bloco.get('text', ''):
+                for tabela in original_format.get('tables', []):
+                    if tabela.get('text', '') == bloco.get('text', ''):
+                        if tabela.get('estrutura_detectada', False):
+                            linhas = tabela.get('linhas', enunciado.split('\n'))
+                            return ('tabela', 'Arial', 10, tuple(linhas))
+                        break
+                # Sem estrutura detalhada: texto simples, sem quebra automática
+                return ('texto_simples', 'Arial', 10, None)
+        
+        # Se o bloco original tiver informações de fonte, usá-las
+        for bloco in blocos:
+            if enunciado in bloco.get('text', '') and bloco.get('font_info'):
+                font_info = bloco['font_info'][0]
+                font_name = font_info.get('font', 'Arial')
+                if font_info['style'].get('bold'):
+                    font_name += '-Bold'
+                return ('texto', fonts.registrar_fonte(font_name), font_info.get('size', 10), None)
         
+        return ('texto', 'Arial', 10, None)
+    
+    def _draw_layout(self, canvas, pagina):
+        """Desenha os trechos já posicionados de uma página"""
+        current_font = None
+        for top_y, linhas in pagina:
+            y = top_y
+            for linha in linhas:
+                for op in linha.ops:
+                    if op[0] == 'texto':
+                        _, x, dy, font_name, font_size, text = op
+                        if current_font != (font_name, font_size):
+                            canvas.setFont(font_name, font_size)
+                            current_font = (font_name, font_size)
+                        canvas.drawString(x, y - dy, text)
+                    elif op[0] == 'retangulo':
+                        _, x, dy, width, height = op
+                        canvas.rect(x, y - dy, width, height)
+                    elif op[0] == 'linha':
+                        _, x1, dy1, x2, dy2 = op
+                        canvas.line(x1, y - dy1, x2, y - dy2)
+                y -= linha.avanco
+    
+    def generate_pdf(self, output_path, metadata=None):
+        """Gera um PDF formatado com questões e opções"""
+        logger.info(f"Iniciando geração de PDF: {_nome_destino(output_path)}")
+        with _destino_pdf(output_path) as destino:
+            if self.options.get('optimize') and not isinstance(destino, str):
+                # Um stream não pode ser relido: otimizar em memória antes de escrever
+                buffer = io.BytesIO()
+                self._render_pdf(buffer, metadata)
+                data, self.optimization_stats = optimizer.otimizar_bytes(buffer.getvalue())
+                destino.write(data)
+            else:
+                self._render_pdf(destino, metadata)
+                if self.options.get('optimize'):
+                    self.optimization_stats = optimizer.otimizar_arquivo(destino)
+        logger.info(f"PDF gerado com sucesso: {_nome_destino(output_path)}")
+        return output_path
+    
+    def generate_pdf_bytes(self, metadata=None):
+        """Gera a prova em memória e retorna os bytes do PDF (para pré-visualização, sem tocar o disco)"""
+        buffer = io.BytesIO()
+        self.generate_pdf(buffer, metadata)
+        return buffer.getvalue()
+    
+    def _render_pdf(self, destino, metadata=None):
+        """Desenha a prova direto no destino (caminho ou stream) do canvas"""
         # Tamanho da página
         page_width, page_height = A4
         
         # Margens
         margin = 50
         
-        # Criar um buffer para o PDF
-        buffer = io.BytesIO()
-        
-        # Criar canvas
-        c = canvas.Canvas(buffer, pagesize=A4)
+        # Criar canvas escrevendo direto no destino, sem buffer intermediário
+        c = self._create_canvas(destino)
         c.setTitle(metadata.get('title', 'Prova') if metadata else 'Prova')
         
+        qr_data = self.options.get('qr_data', "https://exemplo.com")
+        # 'guloso' (padrão) ou 'otimo' (Knuth–Plass)
+        line_breaking = self.options.get('line_breaking', 'guloso')
+        
         # Adicionar cabeçalho original se disponível
         original_format = metadata.get('formato_original', {}) if metadata else {}
         preservar_cabecalho = original_format.get('preserve_original_header', False)
@@ -353,271 +604,120 @@ class PDFGenerator:
         c.line(margin, current_y, page_width - margin, current_y)
         current_y -= 20
         
-        # Adicionar questões
-        texto_questao_estilo = ParagraphStyle(
-            'QuestaoEstilo',
-            parent=self.styles['Normal'],
-            fontName='Arial',
-            fontSize=10,
-            leading=12,
-            spaceAfter=6
-        )
+        # 1ª passada: medir todas as questões (com cache entre variantes)
+        blocos = [
+            layout.medir_questao(
+                enunciado, tuple(alternativas),
+                self._estilo_questao(enunciado, original_format),
+                page_width, margin, line_breaking
+            )
+            for enunciado, alternativas in self.questions
+        ]
+        
+        # 2ª passada: paginar sem dividir questões e desenhar
+        paginas = layout.paginar(blocos, current_y, page_height - margin, BOTTOM_MARGIN)
+        for page_num, pagina in enumerate(paginas):
+            if page_num > 0:
+                # Adicionar QR code na página anterior e abrir nova página
+                self.add_qr_code(c, page_width, page_height, data=qr_data)
+                c.showPage()
+            self._draw_layout(c, pagina)
+        
+        # Adicionar QR code na última página
+        self.add_qr_code(c, page_width, page_height, data=qr_data)
+        
+        # Finalizar o documento e salvar
+        c.showPage()
+        c.save()
+
+    def generate_gabarito(self, output_path, metadata=None):
+        """Gera a folha de gabarito com a ordem das alternativas de cada questão"""
+        logger.info(f"Iniciando geração do gabarito: {_nome_destino(output_path)}")
+        with _destino_pdf(output_path) as destino:
+            self._render_gabarito(destino, metadata)
+        logger.info(f"Gabarito gerado com sucesso: {_nome_destino(output_path)}")
+        return output_path
+    
+    def generate_gabarito_bytes(self, metadata=None):
+        """Gera o gabarito em memória e retorna os bytes do PDF"""
+        buffer = io.BytesIO()
+        self.generate_gabarito(buffer, metadata)
+        return buffer.getvalue()
+    
+    def _render_gabarito(self, destino, metadata=None):
+        """Desenha o gabarito direto no destino (caminho ou stream) do canvas"""
+        page_width, page_height = A4
+        margin = 50
+        qr_data = self.options.get('qr_data', "https://exemplo.com")
         
-        texto_alternativa_estilo = ParagraphStyle(
-            'AlternativaEstilo',
-            parent=self.styles['Normal'],
-            fontName='Arial',
-            fontSize=10,
-            leading=12,
-            leftIndent=20
-        )
+        c = self._create_canvas(destino)
+        c.setTitle((metadata.get('title', 'Prova') if metadata else 'Prova') + " - Gabarito")
+        
+        c.setFont("Arial", 12)
+        c.drawString(margin, page_height - margin, "GABARITO - ORDEM DAS ALTERNATIVAS")
+        current_y = page_height - margin - 30
         
-        # Verificar como estão formatadas as questões
         for idx, (enunciado, alternativas) in enumerate(self.questions, 1):
-            # Verificar se este bloco é uma tabela no formato original
-            is_table = False
-            table_data = None
-            
-            if 'blocks' in original_format:
-                for bloco in original_format.get('blocks', []):
-                    if bloco.get('is_table', False) and enunciado in bloco.get('text', ''):
-                        is_table = True
-                        table_data = bloco
-                        break
-            
-            # Se for uma tabela, renderizar como tabela
-            if is_table and table_data:
-                # Encontrar tabela correspondente na lista de tabelas com estrutura detalhada
-                tabela_detalhada = None
-                for tabela in original_format.get('tables', []):
-                    if tabela.get('text', '') == table_data.get('text', ''):
-                        tabela_detalhada = tabela
-                        break
-                
-                # Desenhar a tabela
-                if tabela_detalhada and tabela_detalhada.get('estrutura_detectada', False):
-                    linhas = tabela_detalhada.get('linhas', enunciado.split('\n'))
-                    
-                    # Determinar a estrutura da tabela
-                    tem_cabecalho = False
-                    if len(linhas) > 1:
-                        segunda_linha = linhas[1] if len(linhas) > 1 else ""
-                        if segunda_linha and all(c in '-+=' for c in segunda_linha if c.strip()):
-                            tem_cabecalho = True
-                    
-                    # Posição inicial e configurações
-                    table_x = margin
-                    table_y = current_y
-                    
-                    # Determinar as colunas
-                    colunas_detectadas = []
-                    for linha in linhas:
-                        if '|' in linha:
-                            # Separar por pipes
-                            cols = [col.strip() for col in linha.split('|')]
-                            # Remover células vazias nas extremidades
-                            if cols and not cols[0].strip():
-                                cols.pop(0)
-                            if cols and not cols[-1].strip():
-                                cols.pop()
-                            
-                            if len(cols) > len(colunas_detectadas):
-                                colunas_detectadas = cols
-                        elif '\t' in linha:
-                            # Separar por tabs
-                            cols = [col.strip() for col in linha.split('\t')]
-                            if len(cols) > len(colunas_detectadas):
-                                colunas_detectadas = cols
-                    
-                    # Se não encontramos colunas, tentar outra abordagem
-                    if not colunas_detectadas:
-                        import re
-                        for linha in linhas:
-                            if linha and not all(c in '-+=' for c in linha if c.strip()):
-                                # Tentar separar por múltiplos espaços
-                                cols = [col.strip() for col in re.split(r'\s{2,}', linha)]
-                                if len(cols) > len(colunas_detectadas):
-                                    colunas_detectadas = cols
-                    
-                    # Número de colunas e largura
-                    num_colunas = max(1, len(colunas_detectadas))
-                    col_width = (page_width - 2 * margin) / num_colunas
-                    
-                    # Altura da linha
-                    linha_height = 20
-                    
-                    # Filtrar linhas separadoras
-                    linhas_dados = [linha for linha in linhas if not all(c in '-+=' for c in linha.strip() if c.strip())]
-                    
-                    # Desenhar a tabela
-                    for i, linha in enumerate(linhas_dados):
-                        # Pular linhas vazias
-                        if not linha.strip():
-                            continue
-                        
-                        # Determinar se é linha de cabeçalho
-                        e_cabecalho = (tem_cabecalho and i == 0)
-                        
-                        # Detectar colunas
-                        colunas = []
-                        if '|' in linha:
-                            colunas = [col.strip() for col in linha.split('|')]
-                            # Remover células vazias nas extremidades
-                            if colunas and not colunas[0].strip():
-                                colunas.pop(0)
-                            if colunas and not colunas[-1].strip():
-                                colunas.pop()
-                        elif '\t' in linha:
-                            colunas = [col.strip() for col in linha.split('\t')]
-                        else:
-                            # Tentar separar por múltiplos espaços
-                            import re
-                            colunas = [col.strip() for col in re.split(r'\s{2,}', linha)]
-                        
-                        # Se não detectamos colunas, tratar como célula única
-                        if not colunas:
-                            colunas = [linha]
-                        
-                        # Configurar fonte
-                        if e_cabecalho:
-                            # Cabeçalho em negrito
-                            c.setFont("Arial-Bold", 10)
-                        else:
-                            c.setFont("Arial", 10)
-                        
-                        # Desenhar células
-                        for j, coluna in enumerate(colunas):
-                            if j < num_colunas:  # Limitar ao número máximo de colunas
-                                x = table_x + (j * col_width)
-                                
-                                # Desenhar borda da célula
-                                c.rect(x, table_y - linha_height, col_width, linha_height)
-                                
-                                # Desenhar texto da célula (centralizado vertical e horizontalmente)
-                                text_width = c.stringWidth(coluna)
-                                x_text = x + (col_width - text_width) / 2
-                                y_text = table_y - linha_height / 2 - 5
-                                c.drawString(x_text, y_text, coluna)
-                        
-                        # Próxima linha
-                        table_y -= linha_height
-                    
-                    # Atualizar a posição Y atual
-                    current_y = table_y - 20  # Espaço após a tabela
-                else:
-                    # Fallback - desenhar como texto normal se não tiver estrutura detalhada
-                    lines = enunciado.split('\n')
-                    c.setFont("Arial", 10)
-                    for line in lines:
-                        c.drawString(margin, current_y, line)
-                        current_y -= 15
-            else:
-                # Não é tabela, renderizar como texto normal
-                lines = enunciado.split('\n')
-                c.setFont("Arial", 10)
-                
-                # Se o bloco original tiver informações de fonte, usá-las
-                if original_format.get('blocks'):
-                    for bloco in original_format.get('blocks', []):
-                        if enunciado in bloco.get('text', ''):
-                            if bloco.get('font_info') and len(bloco['font_info']) > 0:
-                                font_info = bloco['font_info'][0]
-                                font_name = font_info.get('font', 'Arial')
-                                if font_info['style'].get('bold'):
-                                    font_name += '-Bold'
-                                font_size = font_info.get('size', 10)
-                                c.setFont(font_name if font_name in pdfmetrics._fonts else 'Arial', font_size)
-                                break
-                
-                # Renderizar linhas do enunciado preservando quebras
-                for line in lines:
-                    # Verificar se precisamos quebrar esta linha em múltiplas linhas
-                    text_width = c.stringWidth(line)
-                    available_width = page_width - 2 * margin
-                    
-                    if text_width <= available_width:
-                        # Cabe em uma linha
-                        c.drawString(margin, current_y, line)
-                        current_y -= 15
-                    else:
-                        # Quebrar em múltiplas linhas
-                        words = line.split()
-                        current_line = ""
-                        
-                        for word in words:
-                            test_line = current_line + " " + word if current_line else word
-                            if c.stringWidth(test_line) <= available_width:
-                                current_line = test_line
-                            else:
-                                c.drawString(margin, current_y, current_line)
-                                current_y -= 15
-                                current_line = word
-                        
-                        if current_line:  # Última linha do parágrafo
-                            c.drawString(margin, current_y, current_line)
-                            current_y -= 15
-            
-            # Espaço entre enunciado e alternativas
-            current_y -= 5
-            
-            # Alternativas
+            primeira_linha = enunciado.strip().split('\n')[0][:90]
             c.setFont("Arial", 10)
+            c.drawString(margin, current_y, f"Questão {idx}: {primeira_linha}")
+            current_y -= 15
             for alternativa in alternativas:
-                # Preservar quebras de linha das alternativas
-                alt_lines = alternativa.split('\n')
-                for i, alt_line in enumerate(alt_lines):
-                    indent = margin + 20 if i == 0 else margin + 30  # Indentação para a primeira linha e subsequentes
-                    
-                    # Verificar se esta linha cabe na largura disponível
-                    text_width = c.stringWidth(alt_line)
-                    available_width = page_width - indent - margin
-                    
-                    if text_width <= available_width:
-                        # Cabe em uma linha
-                        c.drawString(indent, current_y, alt_line)
-                        current_y -= 15
-                    else:
-                        # Quebrar em múltiplas linhas
-                        words = alt_line.split()
-                        current_line = ""
-                        
-                        for word in words:
-                            test_line = current_line + " " + word if current_line else word
-                            if c.stringWidth(test_line) <= available_width:
-                                current_line = test_line
-                            else:
-                                c.drawString(indent, current_y, current_line)
-                                current_y -= 15
-                                current_line = word
-                                indent = margin + 30  # Indentação para continuação
-                        
-                        if current_line:
-                            c.drawString(indent, current_y, current_line)
-                            current_y -= 15
+                c.drawString(margin + 20, current_y, alternativa.strip().split('\n')[0][:90])
+                current_y -= 12
+            current_y -= 8
             
-            # Verificar se precisamos de uma nova página
-            if current_y < 100:  # Aproximadamente 3cm do rodapé
-                # Adicionar QR code na página atual
-                self.add_qr_code(c, page_width, page_height, data="https://exemplo.com")
-                
-                # Nova página
+            if current_y < 100:
+                self.add_qr_code(c, page_width, page_height, data=qr_data)
                 c.showPage()
-                c.setFont("Arial", 10)
                 current_y = page_height - margin
-            else:
-                # Espaço entre questões na mesma página
-                current_y -= 20
-        
-        # Adicionar QR code na última página
-        self.add_qr_code(c, page_width, page_height, data="https://exemplo.com")
         
-        # Finalizar o documento e salvar
+        self.add_qr_code(c, page_width, page_height, data=qr_data)
         c.showPage()
         c.save()
-        
-        # Salvar o buffer no arquivo
-        with open(output_path, 'wb') as f:
-            f.write(buffer.getvalue())
-        
-        logger.info(f"PDF gerado com sucesso: {output_path}")
-        return output_path
+
+
+def gerar_qrcode(info_prova):
+    """Monta o conteúdo do QR code da prova (renderizado em memória pelo gerador)"""
+    return qr.montar_payload(info_prova)
+
+
+def gerar_pdf_prova(nome, questoes, qr_data, formato_original=None, opcoes=None):
+    """Gera a prova e o gabarito em OUTPUT_DIR e retorna os dois caminhos"""
+    generator = PDFGenerator(questoes, options={'qr_data': qr_data, **(opcoes or {})})
+    metadata = {'title': nome, 'formato_original': formato_original or {}}
+    
+    pdf_path = generator.generate_pdf(os.path.join(OUTPUT_DIR, f"{nome}.pdf"), metadata)
+    gabarito_path = generator.generate_gabarito(os.path.join(OUTPUT_DIR, f"{nome}_gabarito.pdf"), metadata)
+    return pdf_path, gabarito_path
+
+
+def gerar_preview_prova(nome, questoes, qr_data, formato_original=None, opcoes=None):
+    """Gera a prova só em memória e retorna os bytes do PDF"""
+    generator = PDFGenerator(questoes, options={'qr_data': qr_data, **(opcoes or {})})
+    metadata = {'title': nome, 'formato_original': formato_original or {}}
+    return generator.generate_pdf_bytes(metadata)
+
+
+def gerar_lote_zip(zip_path, variantes, formato_original=None, incluir_gabarito=True, opcoes=None):
+    """Gera várias variantes direto num único arquivo ZIP.
+
+    ``variantes`` é um iterável de (nome, questoes, qr_data) e pode ser um
+    gerador: cada PDF é escrito em streaming na sua entrada do ZIP, então só
+    uma variante fica em memória por vez. O ZIP também é gravado num arquivo
+    temporário e renomeado ao final.
+    """
+    total = 0
+    with _destino_pdf(zip_path) as destino:
+        with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for nome, questoes, qr_data in variantes:
+                generator = PDFGenerator(questoes, options={'qr_data': qr_data, **(opcoes or {})})
+                metadata = {'title': nome, 'formato_original': formato_original or {}}
+                with zf.open(f"{nome}.pdf", 'w') as entrada:
+                    generator.generate_pdf(entrada, metadata)
+                if incluir_gabarito:
+                    with zf.open(f"{nome}_gabarito.pdf", 'w') as entrada:
+                        generator.generate_gabarito(entrada, metadata)
+                total += 1
+    logger.info(f"Lote com {total} variantes gerado em: {zip_path}")
+    return zip_path
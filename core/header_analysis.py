@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import fitz  # PyMuPDF
+
+from core import assets, documents
+from core.thumbnails import digest_arquivo
+
+logger = logging.getLogger(__name__)
+
+# Proporção da primeira página considerada cabeçalho (imagens, raster)
+ALTURA_CABECALHO = 0.25
+# Região de texto lida pelos importadores (um pouco maior que o cabeçalho)
+ALTURA_TEXTO = 0.30
+DPI_RASTER = 300
+MAX_ANALISES = 32
+
+# Texto com posições e fontes, sem copiar o conteúdo das imagens para o dict
+_FLAGS_TEXTO = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+AnaliseCabecalho = namedtuple('AnaliseCabecalho', [
+    'digest',            # SHA-256 do arquivo (ou dos bytes) analisado
+    'largura',           # Tamanho da primeira página em pontos
+    'altura',
+    'altura_cabecalho',  # Limite inferior do cabeçalho em pontos
+    'blocos',            # Blocos de texto (linhas e spans) da região de texto
+    'imagens',           # Imagens da primeira página: xref, bbox e tamanho em pixels
+    'logos',             # PNG de cada imagem distinta da primeira página, na ordem do PDF
+    'raster_png',        # PNG do cabeçalho renderizado em DPI_RASTER
+])
+
+_lock = threading.Lock()
+_analises = OrderedDict()
+_digests = {}
+
+
+def _digest(origem):
+    if isinstance(origem, (bytes, bytearray)):
+        return hashlib.sha256(origem).hexdigest()
+    # Evita recalcular o hash de um arquivo que não mudou
+    info = os.stat(origem)
+    chave = (os.path.abspath(origem), info.st_mtime_ns, info.st_size)
+    digest = _digests.get(chave)
+    if digest is None:
+        digest = _digests[chave] = digest_arquivo(origem)
+    return digest
+
+
+def _blocos_texto(page, clip):
+    blocos = []
+    for block in page.get_text("dict", clip=clip, flags=_FLAGS_TEXTO).get("blocks", []):
+        if block.get("type", -1) != 0:
+            continue
+        linhas = []
+        for line in block.get("lines", []):
+            spans = [{
+                'text': span.get('text', ''),
+                'font': span.get('font', ''),
+                'size': span.get('size', 0),
+                'flags': span.get('flags', 0),  # 1=bold, 2=italic, 4=underline
+                'color': span.get('color', 0),
+                'origin': tuple(span.get('origin', ())),
+                'bbox': tuple(span.get('bbox', (0, 0, 0, 0))),
+            } for span in line.get("spans", [])]
+            linhas.append({'bbox': tuple(line.get('bbox', ())), 'spans': spans})
+        blocos.append({'bbox': tuple(block.get('bbox', ())), 'lines': linhas})
+    return blocos
+
+
+def _analisar(doc, digest):
+    if doc.page_count == 0:
+        raise ValueError("Documento sem páginas")
+    page = doc[0]
+    largura, altura = page.rect.width, page.rect.height
+    altura_cabecalho = altura * ALTURA_CABECALHO
+
+    blocos = _blocos_texto(page, fitz.Rect(0, 0, largura, altura * ALTURA_TEXTO))
+
+    imagens = []
+    for info in page.get_image_info(xrefs=True):
+        imagens.append({
+            'xref': info.get('xref', 0),
+            'bbox': tuple(info['bbox']),
+            'width': info.get('width', 0),
+            'height': info.get('height', 0),
+        })
+
+    logos = []
+    for img in page.get_images(full=True):
+        xref = img[0]
+        if not xref:
+            continue
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.width > 0 and pix.height > 0:
+                if pix.alpha or pix.n > 3:
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                logos.append(pix.tobytes("png"))
+        except Exception as e:
+            logger.warning(f"Imagem {xref} do cabeçalho ignorada: {str(e)}")
+
+    raster = page.get_pixmap(clip=fitz.Rect(0, 0, largura, int(altura_cabecalho)), dpi=DPI_RASTER)
+    return AnaliseCabecalho(digest, largura, altura, altura_cabecalho, blocos, imagens,
+                            tuple(logos), raster.tobytes("png"))
+
+
+def analisar_cabecalho(origem, doc=None):
+    """Analisa o cabeçalho da primeira página de um PDF numa única passada.
+
+    ``origem`` é o caminho do arquivo ou os bytes do PDF; ``doc`` evita
+    reabrir um documento que o chamador já tem aberto. Texto, imagens,
+    logos e o raster do cabeçalho são calculados juntos e memorizados pelo
+    hash do conteúdo, então leitor, visualizador e importadores
+    compartilham o mesmo resultado.
+    """
+    digest = _digest(origem)
+    with _lock:
+        analise = _analises.get(digest)
+        if analise is not None:
+            _analises.move_to_end(digest)
+            return analise
+
+    if doc is not None:
+        with documents.fitz_lock:
+            analise = _analisar(doc, digest)
+    elif isinstance(origem, (bytes, bytearray)):
+        with documents.fitz_lock, fitz.open(stream=origem, filetype="pdf") as doc:
+            analise = _analisar(doc, digest)
+    else:
+        with documents.abrir(origem) as doc, documents.fitz_lock:
+            analise = _analisar(doc, digest)
+
+    with _lock:
+        _analises[digest] = analise
+        while len(_analises) > MAX_ANALISES:
+            _analises.popitem(last=False)
+    return analise
+
+
+def spans(analise, limite=None):
+    """Spans de texto em ordem de leitura, opcionalmente só os que começam acima de ``limite``"""
+    return [span
+            for bloco in analise.blocos
+            for linha in bloco['lines']
+            for span in linha['spans']
+            if limite is None or span['bbox'][1] < limite]
+
+
+def texto(analise):
+    """Texto da região do cabeçalho, uma linha por linha do PDF"""
+    return "\n".join("".join(span['text'] for span in linha['spans'])
+                     for bloco in analise.blocos for linha in bloco['lines'])
+
+
+def imagens_no_cabecalho(analise):
+    return [img for img in analise.imagens if img['bbox'][1] < analise.altura_cabecalho]
+
+
+def salvar_raster(analise):
+    """Caminho de um PNG com o raster do cabeçalho (em core.assets)"""
+    return assets.gravar(analise.raster_png, ".png")
+
+
+def salvar_logos(analise):
+    """Caminhos de PNGs com as imagens da primeira página (logos iguais viram um só arquivo)"""
+    return [assets.gravar(dados, ".png") for dados in analise.logos]
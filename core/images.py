@@ -0,0 +1,74 @@
+import io
+import logging
+import os
+from functools import lru_cache
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+logger = logging.getLogger(__name__)
+
+# Resolução alvo no papel: suficiente para logos e cabeçalhos impressos
+DPI_IMPRESSAO = 200
+QUALIDADE_JPEG = 85
+# Acima deste número de cores a imagem é tratada como foto (JPEG);
+# abaixo, como desenho/texto rasterizado (Flate, sem artefatos)
+MAX_CORES_DESENHO = 1024
+
+
+def _tem_transparencia(img):
+    return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _reduzir(img, largura_pt, altura_pt, dpi):
+    """Reduz a imagem para o tamanho impresso na resolução alvo (nunca amplia)"""
+    alvo = (max(1, round(largura_pt / 72 * dpi)), max(1, round(altura_pt / 72 * dpi)))
+    if img.width > alvo[0] or img.height > alvo[1]:
+        img = img.copy()
+        img.thumbnail(alvo, Image.LANCZOS)
+    return img
+
+
+def _codificar(img):
+    """Escolhe JPEG ou PNG (Flate) pelo conteúdo e retorna (bytes, formato).
+
+    JPEG é repassado pelo ReportLab sem recodificação (DCTDecode); PNG vira
+    um stream Flate com máscara de transparência quando necessário.
+    """
+    buffer = io.BytesIO()
+    if _tem_transparencia(img):
+        img.convert('RGBA').save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue(), 'PNG'
+
+    rgb = img.convert('RGB')
+    if rgb.getcolors(maxcolors=MAX_CORES_DESENHO) is None:
+        rgb.save(buffer, format='JPEG', quality=QUALIDADE_JPEG, optimize=True)
+        return buffer.getvalue(), 'JPEG'
+
+    rgb.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue(), 'PNG'
+
+
+@lru_cache(maxsize=64)
+def _preparar(caminho, mtime_ns, tamanho, largura_pt, altura_pt, dpi):
+    with Image.open(caminho) as img:
+        img.load()
+        original = img.size
+        dados, formato = _codificar(_reduzir(img, largura_pt, altura_pt, dpi))
+
+    logger.info(f"Imagem preparada: {os.path.basename(caminho)} {original} -> {formato}, "
+                f"{tamanho} -> {len(dados)} bytes")
+    return ImageReader(io.BytesIO(dados))
+
+
+def imagem_para_impressao(caminho, largura_pt, altura_pt, dpi=DPI_IMPRESSAO):
+    """ImageReader em cache para desenhar ``caminho`` com o tamanho dado em pontos.
+
+    Cada arquivo é lido e reduzido uma única vez por processo (a chave inclui
+    mtime e tamanho, então uma imagem alterada é recarregada). Reutilizar o
+    mesmo ImageReader também permite ao ReportLab deduplicar o XObject entre
+    as páginas do documento.
+    """
+    info = os.stat(caminho)
+    return _preparar(os.path.abspath(caminho), info.st_mtime_ns, info.st_size,
+                     round(largura_pt, 1), round(altura_pt, 1), dpi)
@@ -0,0 +1,325 @@
+import logging
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from reportlab.pdfbase import pdfmetrics
+
+logger = logging.getLogger(__name__)
+
+# Latin-1 + Latin Extended-A/B: cobre todo o português sem consultas extras
+TABELA_TAMANHO = 0x250
+
+
+class TabelaAvancos:
+    """Avanços horizontais de uma fonte por caractere, em unidades de 1/1000 do corpo"""
+
+    def __init__(self, font_name):
+        self.font_name = font_name
+        self._font = pdfmetrics.getFont(font_name)
+        self.tabela = np.array([self._largura(chr(i)) for i in range(TABELA_TAMANHO)], dtype=np.float64)
+        self._extras = {}
+
+    def _largura(self, char):
+        try:
+            return self._font.stringWidth(char, 1000)
+        except Exception:
+            return 0.0
+
+    def avancos(self, texto):
+        """Vetor com o avanço de cada caractere de ``texto``"""
+        codigos = np.frombuffer(texto.encode('utf-32-le'), dtype=np.uint32)
+        dentro = codigos < TABELA_TAMANHO
+        if dentro.all():
+            return self.tabela[codigos]
+
+        resultado = np.empty(len(codigos), dtype=np.float64)
+        resultado[dentro] = self.tabela[codigos[dentro]]
+        for idx in np.flatnonzero(~dentro):
+            char = texto[idx]
+            if char not in self._extras:
+                self._extras[char] = self._largura(char)
+            resultado[idx] = self._extras[char]
+        return resultado
+
+    def largura(self, texto, font_size):
+        """Equivalente a ``stringWidth(texto, font_name, font_size)``"""
+        return float(self.avancos(texto).sum()) * font_size / 1000.0
+
+
+@lru_cache(maxsize=None)
+def tabela_avancos(font_name):
+    """Tabela de avanços da fonte, calculada uma vez por processo"""
+    return TabelaAvancos(font_name)
+
+
+def medir_palavras(palavras, font_name, font_size):
+    """Larguras de cada palavra via soma cumulativa vetorizada"""
+    if not palavras:
+        return np.zeros(0, dtype=np.float64)
+    tabela = tabela_avancos(font_name)
+    acumulado = np.concatenate(([0.0], np.cumsum(tabela.avancos(''.join(palavras)))))
+    fins = np.cumsum([len(p) for p in palavras])
+    inicios = np.concatenate(([0], fins[:-1]))
+    return (acumulado[fins] - acumulado[inicios]) * font_size / 1000.0
+
+
+def _quebra_gulosa(larguras, espaco, limite_primeira, limite):
+    """Índices de início de cada linha, preenchendo cada linha ao máximo (O(n))"""
+    inicios = [0]
+    atual = larguras[0]
+    lim = limite_primeira
+    for i in range(1, len(larguras)):
+        candidata = atual + espaco + larguras[i]
+        if candidata <= lim:
+            atual = candidata
+        else:
+            inicios.append(i)
+            atual = larguras[i]
+            lim = limite
+    return inicios
+
+
+def _quebra_otima(larguras, espaco, limite_primeira, limite):
+    """Quebra no estilo Knuth–Plass: minimiza a soma dos quadrados das sobras.
+
+    A última linha não é penalizada e uma palavra maior que a linha pode
+    ficar sozinha. Cada linha considera apenas as palavras que cabem nela,
+    então o custo é O(n·k), com k palavras por linha.
+    """
+    n = len(larguras)
+    prefixo = [0.0]
+    for w in larguras:
+        prefixo.append(prefixo[-1] + w)
+    maior_limite = max(limite_primeira, limite)
+
+    custo = [0.0] + [float('inf')] * n
+    origem = [0] * (n + 1)
+    for j in range(1, n + 1):
+        for i in range(j - 1, -1, -1):
+            largura = prefixo[j] - prefixo[i] + espaco * (j - i - 1)
+            if largura > maior_limite and i < j - 1:
+                break
+            lim = limite_primeira if i == 0 else limite
+            if largura > lim and i < j - 1:
+                continue
+            sobra = max(lim - largura, 0.0)
+            total = custo[i] + (0.0 if j == n else sobra * sobra)
+            if total < custo[j]:
+                custo[j] = total
+                origem[j] = i
+
+    inicios = []
+    j = n
+    while j > 0:
+        j = origem[j]
+        inicios.append(j)
+    return inicios[::-1]
+
+
+def quebrar_linhas(texto, font_name, font_size, largura, largura_primeira=None, metodo='guloso'):
+    """Quebra ``texto`` em linhas que cabem em ``largura`` pontos.
+
+    ``largura_primeira`` permite uma primeira linha com recuo diferente.
+    ``metodo`` é 'guloso' (padrão, igual ao comportamento anterior) ou
+    'otimo' (Knuth–Plass, parágrafos mais uniformes). Um texto que já cabe
+    numa linha é devolvido sem alterações, preservando espaços e linhas vazias.
+    """
+    if largura_primeira is None:
+        largura_primeira = largura
+
+    tabela = tabela_avancos(font_name)
+    if tabela.largura(texto, font_size) <= largura_primeira:
+        return [texto]
+
+    palavras = texto.split()
+    if not palavras:
+        return ['']
+    larguras = medir_palavras(palavras, font_name, font_size).tolist()
+    espaco = tabela.largura(' ', font_size)
+
+    if metodo == 'otimo':
+        inicios = _quebra_otima(larguras, espaco, largura_primeira, largura)
+    else:
+        inicios = _quebra_gulosa(larguras, espaco, largura_primeira, largura)
+
+    fins = inicios[1:] + [len(palavras)]
+    return [' '.join(palavras[i:j]) for i, j in zip(inicios, fins)]
+
+
+# ---------------------------------------------------------------------------
+# Medição de questões e paginação
+# ---------------------------------------------------------------------------
+
+ALTURA_LINHA = 15
+ALTURA_LINHA_TABELA = 20
+ESPACO_APOS_ENUNCIADO = 5
+ESPACO_ENTRE_QUESTOES = 20
+
+
+class LinhaLayout(namedtuple('LinhaLayout', ['ops', 'avanco', 'tinta'])):
+    """Uma linha do layout, com operações relativas ao seu topo.
+
+    ``ops`` são tuplas independentes do backend de desenho:
+    ('texto', x, dy, fonte, corpo, texto), ('retangulo', x, dy, largura, altura)
+    e ('linha', x1, dy1, x2, dy2), com ``dy`` medido para baixo a partir do
+    topo da linha (para retângulos, até o canto inferior). ``avanco`` é quanto
+    o cursor desce depois dela e ``tinta`` até onde ela desenha.
+    """
+    __slots__ = ()
+
+
+class BlocoQuestao:
+    """Uma questão já medida: a sequência de linhas e sua altura total"""
+
+    __slots__ = ('linhas', 'altura', 'altura_tinta')
+
+    def __init__(self, linhas):
+        self.linhas = tuple(linhas)
+        self.altura = 0
+        self.altura_tinta = 0
+        for linha in self.linhas:
+            if linha.ops:
+                self.altura_tinta = max(self.altura_tinta, self.altura + linha.tinta)
+            self.altura += linha.avanco
+
+
+def _colunas(linha):
+    """Separa uma linha de tabela em células (pipes, tabs ou espaços múltiplos)"""
+    if '|' in linha:
+        cols = [col.strip() for col in linha.split('|')]
+        # Remover células vazias nas extremidades
+        if cols and not cols[0].strip():
+            cols.pop(0)
+        if cols and not cols[-1].strip():
+            cols.pop()
+        return cols
+    if '\t' in linha:
+        return [col.strip() for col in linha.split('\t')]
+    return [col.strip() for col in re.split(r'\s{2,}', linha)]
+
+
+def _e_separador(linha):
+    return all(ch in '-+=' for ch in linha if ch.strip())
+
+
+def _linhas_tabela(linhas, largura_pagina, margem):
+    tem_cabecalho = len(linhas) > 1 and bool(linhas[1]) and _e_separador(linhas[1])
+
+    # Determinar as colunas pela linha com mais células
+    colunas_detectadas = []
+    for linha in linhas:
+        if '|' in linha or '\t' in linha:
+            cols = _colunas(linha)
+            if len(cols) > len(colunas_detectadas):
+                colunas_detectadas = cols
+    if not colunas_detectadas:
+        for linha in linhas:
+            if linha and not _e_separador(linha):
+                cols = _colunas(linha)
+                if len(cols) > len(colunas_detectadas):
+                    colunas_detectadas = cols
+
+    num_colunas = max(1, len(colunas_detectadas))
+    col_width = (largura_pagina - 2 * margem) / num_colunas
+    h = ALTURA_LINHA_TABELA
+
+    resultado = []
+    linhas_dados = [linha for linha in linhas if not _e_separador(linha.strip())]
+    for i, linha in enumerate(linhas_dados):
+        if not linha.strip():
+            continue
+        fonte = 'Arial-Bold' if (tem_cabecalho and i == 0) else 'Arial'
+        tabela = tabela_avancos(fonte)
+        ops = []
+        for j, coluna in enumerate(_colunas(linha) or [linha]):
+            if j < num_colunas:
+                x = margem + j * col_width
+                # Borda da célula e texto centralizado
+                ops.append(('retangulo', x, h, col_width, h))
+                x_texto = x + (col_width - tabela.largura(coluna, 10)) / 2
+                ops.append(('texto', x_texto, h / 2 + 5, fonte, 10, coluna))
+        resultado.append(LinhaLayout(tuple(ops), h, h))
+
+    # Espaço após a tabela
+    resultado.append(LinhaLayout((), h, 0))
+    return resultado
+
+
+@lru_cache(maxsize=4096)
+def medir_questao(enunciado, alternativas, estilo, largura_pagina, margem, metodo='guloso'):
+    """Monta as linhas de uma questão sem desenhá-las.
+
+    ``estilo`` é (tipo, fonte, corpo, linhas_tabela), com tipo 'texto',
+    'texto_simples' (sem quebra automática) ou 'tabela'. Todos os argumentos
+    são imutáveis para que variantes da mesma prova reaproveitem a medição.
+    """
+    tipo, font_name, font_size, linhas_tabela = estilo
+    linhas = []
+
+    if tipo == 'tabela':
+        linhas.extend(_linhas_tabela(linhas_tabela, largura_pagina, margem))
+    else:
+        largura = largura_pagina - 2 * margem
+        for line in enunciado.split('\n'):
+            partes = [line] if tipo == 'texto_simples' else \
+                quebrar_linhas(line, font_name, font_size, largura, metodo=metodo)
+            for parte in partes:
+                linhas.append(LinhaLayout((('texto', margem, 0, font_name, font_size, parte),), ALTURA_LINHA, 0))
+
+    # Espaço entre enunciado e alternativas
+    linhas.append(LinhaLayout((), ESPACO_APOS_ENUNCIADO, 0))
+
+    continuacao = margem + 30
+    for alternativa in alternativas:
+        # Preservar quebras de linha das alternativas
+        for i, alt_line in enumerate(alternativa.split('\n')):
+            recuo = margem + 20 if i == 0 else continuacao
+            partes = quebrar_linhas(alt_line, 'Arial', 10, largura_pagina - continuacao - margem,
+                                    largura_primeira=largura_pagina - recuo - margem, metodo=metodo)
+            for j, parte in enumerate(partes):
+                x = recuo if j == 0 else continuacao
+                linhas.append(LinhaLayout((('texto', x, 0, 'Arial', 10, parte),), ALTURA_LINHA, 0))
+
+    return BlocoQuestao(linhas)
+
+
+def paginar(blocos, y_inicial, y_topo, y_base, espaco=ESPACO_ENTRE_QUESTOES):
+    """Distribui questões medidas em páginas sem dividir nenhuma delas.
+
+    Retorna uma lista de páginas; cada página é uma lista de (y, linhas) com
+    a posição do topo de cada trecho. Como a ordem das questões é fixa,
+    colocar cada questão na página atual sempre que ela couber é ótimo: o
+    número de páginas é o mínimo possível e cada página fica o mais cheia
+    possível. Só uma questão maior que uma página inteira é dividida, nas
+    fronteiras de linha.
+    """
+    paginas = [[]]
+    y = y_inicial
+    for bloco in blocos:
+        if y - bloco.altura_tinta < y_base and y_topo - bloco.altura_tinta >= y_base:
+            paginas.append([])
+            y = y_topo
+
+        if y - bloco.altura_tinta >= y_base:
+            paginas[-1].append((y, bloco.linhas))
+            y -= bloco.altura + espaco
+            continue
+
+        # Questão maior que uma página: dividir nas fronteiras de linha
+        topo = y
+        atual = []
+        for linha in bloco.linhas:
+            if linha.ops and y - linha.tinta < y_base and (atual or y < y_topo):
+                if atual:
+                    paginas[-1].append((topo, tuple(atual)))
+                paginas.append([])
+                y = topo = y_topo
+                atual = []
+            atual.append(linha)
+            y -= linha.avanco
+        if atual:
+            paginas[-1].append((topo, tuple(atual)))
+        y -= espaco
+    return paginas
@@ -0,0 +1,95 @@
+import importlib.util
+import logging
+import os
+import time
+import uuid
+
+import fitz  # PyMuPDF
+
+from core import documents
+
+logger = logging.getLogger(__name__)
+
+# garbage=4 remove objetos sem uso e funde objetos duplicados (imagens e
+# fontes repetidas entre páginas); deflate comprime streams não comprimidos.
+OPCOES_SALVAR = {
+    'garbage': 4,
+    'deflate': True,
+    'deflate_images': True,
+    'deflate_fonts': True,
+}
+
+
+def subsetar_fontes(doc):
+    """Reduz as fontes embutidas aos glifos usados; retorna False se não foi possível"""
+    # Nesta versão do PyMuPDF o subsetting depende do fontTools e, sem ele,
+    # é ignorado sem erro
+    if importlib.util.find_spec("fontTools") is None:
+        logger.warning("fontTools não instalado: subsetting de fontes indisponível")
+        return False
+    try:
+        doc.subset_fonts()
+        return True
+    except Exception as e:
+        logger.warning(f"Falha no subsetting de fontes: {str(e)}")
+        return False
+
+
+def _preparar(doc, subset_fonts):
+    if subset_fonts:
+        subsetar_fontes(doc)
+
+
+def otimizar_bytes(dados, subset_fonts=True):
+    """Otimiza um PDF em memória e retorna (bytes, estatísticas)"""
+    inicio = time.perf_counter()
+    with documents.fitz_lock, fitz.open(stream=dados, filetype="pdf") as doc:
+        _preparar(doc, subset_fonts)
+        resultado = doc.tobytes(**OPCOES_SALVAR)
+    if len(resultado) >= len(dados):
+        # Nada a ganhar: mantém o PDF original
+        resultado = dados
+
+    stats = {
+        'antes': len(dados),
+        'depois': len(resultado),
+        'segundos': time.perf_counter() - inicio,
+    }
+    logger.info(f"PDF otimizado em memória: {stats['antes']} -> {stats['depois']} bytes")
+    return resultado, stats
+
+
+def otimizar_arquivo(caminho, subset_fonts=True, linearizar=True):
+    """Otimiza um PDF no próprio lugar e retorna as estatísticas antes/depois.
+
+    Além da deduplicação e compressão, o arquivo é linearizado (abre a
+    primeira página antes do resto em visualizadores e spoolers). O
+    resultado é gravado num temporário e só substitui o original se for
+    menor; uma falha deixa o arquivo original intacto.
+    """
+    inicio = time.perf_counter()
+    antes = os.path.getsize(caminho)
+    temp_path = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        with documents.fitz_lock, fitz.open(caminho) as doc:
+            _preparar(doc, subset_fonts)
+            doc.save(temp_path, linear=linearizar, **OPCOES_SALVAR)
+        if os.path.getsize(temp_path) < antes:
+            os.replace(temp_path, caminho)
+        else:
+            os.remove(temp_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    stats = {
+        'antes': antes,
+        'depois': os.path.getsize(caminho),
+        'segundos': time.perf_counter() - inicio,
+    }
+    logger.info(f"PDF otimizado: {caminho} {stats['antes']} -> {stats['depois']} bytes "
+                f"em {stats['segundos'] * 1000:.0f} ms")
+    return stats
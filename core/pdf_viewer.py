@@ -6,10 +6,388 @@ import base64
 from pathlib import Path
 import fitz  # PyMuPDF
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QApplication, 
-                            QGraphicsView, QGraphicsScene, QScrollArea, QHBoxLayout, QFrame, QPushButton, QTextEdit, QGroupBox)
-from PyQt6.QtCore import QUrl, QObject, pyqtSlot, pyqtSignal, QSize, QBuffer, QByteArray, QIODevice, Qt
-from PyQt6.QtGui import QPixmap, QImage, QPainter
+                            QGraphicsView, QGraphicsScene, QScrollArea, QHBoxLayout, QFrame, QPushButton, QTextEdit, QGroupBox,
+                            QListWidget, QListWidgetItem, QListView)
+from PyQt6.QtCore import (QUrl, QObject, pyqtSlot, pyqtSignal, QSize, QBuffer, QByteArray, QIODevice, Qt,
+                          QRect, QRunnable, QThreadPool, QTimer)
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QIcon
+import hashlib
+import math
 import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from core import documents, header_analysis, thumbnails
+
+# Largura em pixels de uma página em 100%, similar à visualização do Word
+IDEAL_WIDTH = 650
+# Limite de memória das páginas e blocos renderizados mantidos em cache
+PAGE_CACHE_BYTES = 64 * 1024 * 1024
+# Lado dos blocos (tiles) renderizados, em pixels
+TILE_SIZE = 512
+# Degraus de zoom por oitava: a resolução de renderização é arredondada
+# para 2 ** (n / 4), então zooms próximos reaproveitam os mesmos blocos
+ZOOM_STEPS_PER_OCTAVE = 4
+# Threads que carregam e renderizam as miniaturas
+THUMBNAIL_WORKERS = 3
+
+
+def zoom_bucket(scale):
+    """Degrau de zoom mais próximo de ``scale`` (pixels por ponto)"""
+    return round(math.log2(scale) * ZOOM_STEPS_PER_OCTAVE)
+
+
+def bucket_scale(bucket):
+    """Pixels por ponto usados para renderizar o degrau ``bucket``"""
+    return 2 ** (bucket / ZOOM_STEPS_PER_OCTAVE)
+
+
+class _ImageCache:
+    """LRU de QImages limitado pelo total de bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old.sizeInBytes()
+        self._items[key] = image
+        self.total_bytes += image.sizeInBytes()
+        # Sempre mantém o item recém-inserido, mesmo que sozinho passe do limite
+        while self.total_bytes > self.max_bytes and len(self._items) > 1:
+            _, evicted = self._items.popitem(last=False)
+            self.total_bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        self._items.clear()
+        self.total_bytes = 0
+
+
+class _RenderSignals(QObject):
+    """Sinais das tarefas de renderização (QRunnable não é QObject).
+
+    ``generation`` muda a cada documento carregado e ``view_generation`` a
+    cada mudança de página ou zoom; as tarefas comparam os dois antes de
+    renderizar para serem canceladas sem bloquear a interface.
+    """
+    rendered = pyqtSignal(object, QImage)
+    digested = pyqtSignal(object, str)
+    thumbnail_ready = pyqtSignal(object, QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.view_generation = 0
+
+
+class PixmapImage(QImage):
+    """QImage sobre o buffer de um ``fitz.Pixmap``, sem cópia.
+
+    Guarda uma referência ao pixmap, que precisa viver enquanto a imagem
+    existir. Não deve sair da thread que a criou nem ser passada por
+    sinais: o Qt compartilharia o buffer sem manter o pixmap vivo.
+    """
+
+    def __init__(self, pix):
+        # O MuPDF guarda o alfa já multiplicado nas cores
+        fmt = QImage.Format.Format_RGBA8888_Premultiplied if pix.alpha else QImage.Format.Format_RGB888
+        super().__init__(pix.samples_mv, pix.width, pix.height, pix.stride, fmt)
+        self.pixmap = pix
+
+
+def pixmap_to_qimage(pix, fmt=None):
+    """Converte um ``fitz.Pixmap`` numa QImage independente, com uma única cópia.
+
+    ``pix.samples`` já seria uma cópia do raster e a QImage criada sobre ela
+    seria copiada de novo (e convertida a cada desenho, pois RGB888 não é um
+    formato nativo do QPainter). Aqui o buffer do pixmap é lido diretamente
+    e convertido uma vez para ``fmt`` (padrão: RGB32, ou ARGB32
+    premultiplicado com transparência), o formato mais rápido para desenhar
+    e enviar à GPU. O resultado não depende mais do pixmap.
+    """
+    if fmt is None:
+        fmt = (QImage.Format.Format_ARGB32_Premultiplied if pix.alpha
+               else QImage.Format.Format_RGB32)
+    image = PixmapImage(pix)
+    # No mesmo formato o convertToFormat devolve uma cópia rasa, que
+    # continuaria apontando para o buffer do pixmap
+    if image.format() == fmt:
+        return image.copy()
+    return image.convertToFormat(fmt)
+
+
+# As threads de renderização e de miniaturas usam documentos próprios,
+# mas as chamadas ao fitz passam pelo ``documents.fitz_lock`` do processo
+_thread_docs = threading.local()
+
+
+def open_document(source):
+    """Abre um PDF a partir de um caminho ou de bytes em memória"""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+@contextmanager
+def _memory_document(source):
+    with documents.fitz_lock:
+        doc = open_document(source)
+    try:
+        yield doc
+    finally:
+        with documents.fitz_lock:
+            doc.close()
+
+
+def shared_document(source):
+    """Documento para uso com ``with``: do cache compartilhado (caminho) ou aberto da memória (bytes)"""
+    if isinstance(source, str):
+        return documents.abrir(source)
+    return _memory_document(source)
+
+
+def page_digest(doc, page):
+    """Resumo do que a página desenha: tamanho, streams de conteúdo, imagens e XObjects.
+
+    Páginas com o mesmo resumo têm a mesma aparência, então as
+    renderizações em cache valem entre versões diferentes do documento.
+    """
+    h = hashlib.sha1(repr((tuple(page.rect), page.rotation)).encode())
+    xrefs = list(page.get_contents())
+    xrefs += [image[0] for image in page.get_images(full=True)]
+    xrefs += [xobject[0] for xobject in page.get_xobjects()]
+    for xref in xrefs:
+        h.update(doc.xref_stream_raw(xref) or b"")
+    return h.hexdigest()
+
+
+_file_digests = OrderedDict()
+_file_digests_lock = threading.Lock()
+
+
+def _file_digest(path):
+    """``thumbnails.digest_arquivo`` memorizado por (caminho, tamanho, mtime).
+
+    As tarefas de miniatura de um mesmo arquivo esperam a primeira calcular
+    o hash em vez de lerem o arquivo cada uma.
+    """
+    info = os.stat(path)
+    key = (path, info.st_size, info.st_mtime_ns)
+    with _file_digests_lock:
+        if key not in _file_digests:
+            _file_digests[key] = thumbnails.digest_arquivo(path)
+            while len(_file_digests) > 32:
+                _file_digests.popitem(last=False)
+        return _file_digests[key]
+
+
+def _thread_document(source, generation):
+    """Documento aberto uma vez por thread de renderização (chamar com ``documents.fitz_lock``)"""
+    cached = getattr(_thread_docs, 'entry', None)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+        _thread_docs.entry = None
+    doc = open_document(source)
+    _thread_docs.entry = (generation, doc)
+    return doc
+
+
+class _RenderTask(QRunnable):
+    """Renderiza uma página inteira ou um bloco dela fora da thread da interface.
+
+    ``key`` é (resumo da página, degrau de zoom, bloco), com bloco ``None``
+    para a página inteira ou (coluna, linha) para um bloco de ``TILE_SIZE``
+    pixels. Como a chave vem do conteúdo da página, o resultado continua
+    válido mesmo que o documento seja substituído por uma nova versão.
+    O resultado chega à interface pelo sinal ``rendered`` (conexão
+    enfileirada). Com ``view_generation`` definido, a tarefa é descartada se
+    a página ou o zoom mudarem antes de ela começar.
+
+    No primeiro pedido de uma página o resumo ainda não é conhecido (chave
+    com ``None``): a tarefa só calcula o resumo e o envia por ``digested``;
+    a interface então procura a chave no cache e pede a renderização se
+    faltar.
+    """
+
+    def __init__(self, source, page_num, key, generation, view_generation, signals):
+        super().__init__()
+        self.source = source
+        self.page_num = page_num
+        self.key = key
+        self.generation = generation
+        self.view_generation = view_generation
+        self.signals = signals
+
+    def _stale(self):
+        if self.generation != self.signals.generation:
+            return True
+        return self.view_generation is not None and self.view_generation != self.signals.view_generation
+
+    def run(self):
+        image = QImage()
+        page_num = self.page_num
+        page_id, bucket, tile = self.key
+        try:
+            if not self._stale():
+                with documents.fitz_lock:
+                    doc = _thread_document(self.source, self.generation)
+                    page = doc[page_num]
+                    if page_id is None:
+                        digest = page_digest(doc, page)
+                        del page
+                        self.signals.digested.emit((self.generation, page_num), digest)
+                        return
+                    scale = bucket_scale(bucket)
+                    clip = None
+                    if tile is not None:
+                        size = TILE_SIZE / scale
+                        clip = fitz.Rect(tile[0] * size, tile[1] * size,
+                                         (tile[0] + 1) * size, (tile[1] + 1) * size) & page.rect
+                    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip)
+                    # A cópia e a liberação do pixmap também usam o contexto do MuPDF
+                    image = pixmap_to_qimage(pix)
+                    del pix, page
+        except Exception as e:
+            print(f"Erro ao renderizar página {page_num + 1}: {e}")
+        self.signals.rendered.emit(self.key, image)
+
+
+class _ThumbnailTask(QRunnable):
+    """Carrega a miniatura de uma página do cache em disco ou a renderiza.
+
+    Miniaturas novas são gravadas em ``output/cache/thumbnails`` com chave
+    (hash do arquivo, página), então reabrir a mesma prova não renderiza
+    nada nem abre o documento: o cache em disco é consultado primeiro e a
+    miniatura sai com resumo ``None``. Só quando ela falta o resumo da
+    página é calculado; páginas cujo resumo está em ``known`` (miniaturas
+    da versão anterior) são enviadas com imagem nula, para a interface
+    reaproveitar a que já tem. A leitura e a conversão dos PNGs rodam em
+    paralelo no pool; só o fitz passa pelo ``documents.fitz_lock``.
+    """
+
+    def __init__(self, source, page_num, known, generation, signals):
+        super().__init__()
+        self.source = source
+        self.page_num = page_num
+        self.known = known
+        self.generation = generation
+        self.signals = signals
+
+    def run(self):
+        if self.generation != self.signals.generation:
+            return
+        page_id = None
+        try:
+            # PDFs em memória (pré-visualização) não usam o cache em disco
+            path = None
+            if isinstance(self.source, str):
+                try:
+                    path = thumbnails.caminho_miniatura(_file_digest(self.source), self.page_num)
+                except OSError:
+                    pass
+            image = QImage(path) if path and os.path.exists(path) else QImage()
+            if image.isNull():
+                with documents.fitz_lock:
+                    doc = _thread_document(self.source, self.generation)
+                    page_id = page_digest(doc, doc[self.page_num])
+                if page_id in self.known:
+                    self.signals.thumbnail_ready.emit((self.generation, self.page_num, page_id), QImage())
+                    return
+                with documents.fitz_lock:
+                    page = _thread_document(self.source, self.generation)[self.page_num]
+                    scale = thumbnails.LARGURA_MINIATURA / page.rect.width
+                    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+                    data = pix.tobytes("png")
+                    image = pixmap_to_qimage(pix)
+                    del pix, page
+                if path:
+                    thumbnails.gravar_miniatura(path, data)
+        except Exception as e:
+            print(f"Erro ao gerar miniatura da página {self.page_num + 1}: {e}")
+            return
+        self.signals.thumbnail_ready.emit((self.generation, self.page_num, page_id), image)
+
+
+class PageCanvas(QWidget):
+    """Desenha a página atual no tamanho do zoom.
+
+    A página inteira em baixa resolução fica por baixo (ou um placeholder
+    enquanto ela renderiza) e os blocos na resolução do zoom atual são
+    desenhados por cima à medida que ficam prontos.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.page_num = 0
+        self.page_size = QSize(0, 0)
+        self.image = None
+        self.tiles = {}
+        self.tile_scale = 1.0
+
+    def set_page(self, page_num, page_size, image, tile_scale):
+        self.page_num = page_num
+        self.page_size = page_size
+        self.image = image
+        self.tiles = {}
+        self.tile_scale = tile_scale
+        self.setMinimumSize(page_size)
+        self.update()
+
+    def set_image(self, image):
+        self.image = image
+        self.update()
+
+    def add_tile(self, tile, image):
+        self.tiles[tile] = image
+        self.update(self.tile_rect(tile, image))
+
+    def page_rect(self):
+        x = max(0, (self.width() - self.page_size.width()) // 2)
+        y = max(0, (self.height() - self.page_size.height()) // 2)
+        return QRect(x, y, self.page_size.width(), self.page_size.height())
+
+    def tile_rect(self, tile, image):
+        """Área do canvas coberta por um bloco renderizado em ``tile_scale``"""
+        origin = self.page_rect().topLeft()
+        x0 = math.floor(tile[0] * TILE_SIZE * self.tile_scale)
+        y0 = math.floor(tile[1] * TILE_SIZE * self.tile_scale)
+        x1 = math.ceil((tile[0] * TILE_SIZE + image.width()) * self.tile_scale)
+        y1 = math.ceil((tile[1] * TILE_SIZE + image.height()) * self.tile_scale)
+        return QRect(origin.x() + x0, origin.y() + y0, x1 - x0, y1 - y0)
+
+    def paintEvent(self, event):
+        if self.page_size.isEmpty():
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        rect = self.page_rect()
+        if self.image is not None:
+            painter.drawImage(rect, self.image)
+        else:
+            painter.fillRect(rect, QColor("#eeeeee"))
+            painter.setPen(QColor("#757575"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, f"Carregando página {self.page_num + 1}...")
+        for tile, image in self.tiles.items():
+            target = self.tile_rect(tile, image)
+            if target.intersects(event.rect()):
+                painter.drawImage(target, image)
+        painter.end()
+
 
 class PDFHeaderViewer(QWidget):
     """
@@ -24,9 +402,33 @@ class PDFHeaderViewer(QWidget):
         self.current_pdf_path = None
         self.header_data = {}
         self.current_zoom = 1.0  # Nível de zoom inicial (100%)
-        self.pixmaps = []        # Armazenar os pixmaps de todas as páginas
+        self.page_sizes = []     # Tamanho (largura, altura) de cada página em pontos
+        self.page_ids = []       # Resumo do conteúdo de cada página (chave dos caches), None até ser calculado
+        self.thumbnail_images = {}
+        self._previous_thumbnails = {}
         self.current_page = 0    # Página atual
         self.total_pages = 0     # Total de páginas no documento
+
+        # Renderização sob demanda: uma thread em segundo plano e um cache LRU
+        # de páginas e blocos, com chave (página, degrau de zoom, bloco)
+        self.page_cache = _ImageCache(PAGE_CACHE_BYTES)
+        self._render_source = None
+        self._pending = set()
+        self._digesting = set()  # Páginas com o resumo em cálculo
+        self._render_pool = QThreadPool(self)
+        self._render_pool.setMaxThreadCount(1)
+        self._render_signals = _RenderSignals(self)
+        self._render_signals.rendered.connect(self._on_page_rendered)
+        self._render_signals.digested.connect(self._on_page_digested)
+
+        # Miniaturas: pool próprio, para não atrasar a página visível
+        self._thumbnail_pool = QThreadPool(self)
+        self._thumbnail_pool.setMaxThreadCount(THUMBNAIL_WORKERS)
+        self._render_signals.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+        # Novos blocos entram em renderização conforme a rolagem
+        self.scroll_area.horizontalScrollBar().valueChanged.connect(self._request_visible_tiles)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self._request_visible_tiles)
         
     def setup_ui(self):
         self.layout = QVBoxLayout(self)
@@ -122,12 +524,28 @@ class PDFHeaderViewer(QWidget):
         self.scroll_area = QScrollArea(self)
         self.scroll_area.setWidgetResizable(True)
         
-        # Label para exibir o PDF renderizado
-        self.pdf_label = QLabel()
-        self.pdf_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.scroll_area.setWidget(self.pdf_label)
-        
-        self.layout.addWidget(self.scroll_area)
+        # Canvas para exibir a página renderizada
+        self.page_canvas = PageCanvas()
+        self.scroll_area.setWidget(self.page_canvas)
+
+        # Barra lateral com as miniaturas das páginas
+        thumbnail_height = int(thumbnails.LARGURA_MINIATURA * 1.42)  # Proporção A4
+        self.thumbnail_list = QListWidget()
+        self.thumbnail_list.setViewMode(QListView.ViewMode.IconMode)
+        self.thumbnail_list.setFlow(QListView.Flow.TopToBottom)
+        self.thumbnail_list.setWrapping(False)
+        self.thumbnail_list.setMovement(QListView.Movement.Static)
+        self.thumbnail_list.setIconSize(QSize(thumbnails.LARGURA_MINIATURA, thumbnail_height))
+        self.thumbnail_list.setFixedWidth(thumbnails.LARGURA_MINIATURA + 40)
+        self.thumbnail_list.setSpacing(4)
+        self.thumbnail_list.currentRowChanged.connect(self.go_to_page)
+        self.thumbnail_placeholder = QPixmap(thumbnails.LARGURA_MINIATURA, thumbnail_height)
+        self.thumbnail_placeholder.fill(QColor("#eeeeee"))
+
+        view_layout = QHBoxLayout()
+        view_layout.addWidget(self.thumbnail_list)
+        view_layout.addWidget(self.scroll_area)
+        self.layout.addLayout(view_layout)
 
         # Botão para editar cabeçalho
         self.edit_header_btn = QPushButton("Editar Cabeçalho")
@@ -190,14 +608,15 @@ class PDFHeaderViewer(QWidget):
         
     def fit_to_view(self):
         """Ajusta o zoom para que o PDF caiba completamente na tela"""
-        if self.current_page < len(self.pixmaps) and self.pixmaps[self.current_page]:
+        if self.current_page < len(self.page_sizes):
             # Calcula o fator de escala para ajustar à largura e altura do scroll_area
             view_width = self.scroll_area.width() - 20  # Margem para scrollbar
             view_height = self.scroll_area.height() - 20  # Margem para scrollbar
             
-            pixmap = self.pixmaps[self.current_page]
-            scale_w = view_width / pixmap.width()
-            scale_h = view_height / pixmap.height()
+            width_pt, height_pt = self.page_sizes[self.current_page]
+            scale = self._base_scale(self.current_page)
+            scale_w = view_width / (width_pt * scale)
+            scale_h = view_height / (height_pt * scale)
             
             # Usa o menor valor para garantir que o documento inteiro caiba
             self.current_zoom = min(scale_w, scale_h)
@@ -216,10 +635,17 @@ class PDFHeaderViewer(QWidget):
             self.current_page += 1
             self.update_page()
     
+    def go_to_page(self, page_num):
+        """Navega para a página escolhida nas miniaturas"""
+        if 0 <= page_num < self.total_pages and page_num != self.current_page:
+            self.current_page = page_num
+            self.update_page()
+    
     def update_page(self):
         """Atualiza a exibição da página atual"""
         # Atualiza o texto do indicador de página
         self.page_label.setText(f"Página {self.current_page + 1} de {self.total_pages}")
+        self.thumbnail_list.setCurrentRow(self.current_page)
         
         # Atualiza os botões de navegação
         self.prev_page_btn.setEnabled(self.current_page > 0)
@@ -227,129 +653,255 @@ class PDFHeaderViewer(QWidget):
         
         # Exibe a página atual com o zoom correto
         self.update_zoom()
+
+    def _base_scale(self, page_num):
+        """Pixels por ponto em 100%: largura de página parecida com a do Word"""
+        width_pt = self.page_sizes[page_num][0]
+        return min(2.0, IDEAL_WIDTH / width_pt)
+
+    def _current_bucket(self):
+        return zoom_bucket(self._base_scale(self.current_page) * self.current_zoom)
             
     def update_zoom(self):
         """Atualiza a visualização com o zoom atual"""
-        if self.current_page < len(self.pixmaps) and self.pixmaps[self.current_page]:
+        if self.current_page < len(self.page_sizes):
             # Atualiza o texto do botão de reset de zoom
             zoom_percent = int(self.current_zoom * 100)
             self.zoom_reset_btn.setText(f"{zoom_percent}%")
+
+            # Cancela os blocos ainda não renderizados da página/zoom anterior
+            self._render_signals.view_generation += 1
+            self._render_pool.clear()
+            self._pending.clear()
+            self._digesting.clear()
             
-            # Redimensiona o pixmap de acordo com o zoom
-            pixmap = self.pixmaps[self.current_page]
-            scaled_width = int(pixmap.width() * self.current_zoom)
-            scaled_height = int(pixmap.height() * self.current_zoom)
-            
-            scaled_pixmap = pixmap.scaled(
-                scaled_width,
-                scaled_height,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
+            # A página inteira em baixa resolução serve de fundo (ou placeholder)
+            # enquanto os blocos visíveis são renderizados na resolução do zoom
+            width_pt, height_pt = self.page_sizes[self.current_page]
+            scale = self._base_scale(self.current_page) * self.current_zoom
+            bucket = self._current_bucket()
+            self.page_canvas.set_page(
+                self.current_page,
+                QSize(int(width_pt * scale), int(height_pt * scale)),
+                self.page_cache.get(self._page_key(self.current_page)),
+                scale / bucket_scale(bucket)
             )
-            
-            self.pdf_label.setPixmap(scaled_pixmap)
-            
-            # Garantir que o label seja grande o suficiente para o pixmap
-            self.pdf_label.setMinimumSize(scaled_width, scaled_height)
+            self._request(self.current_page, self._page_key(self.current_page), priority=2)
+            # Os blocos visíveis só são conhecidos depois que o scroll_area
+            # redimensionar o canvas para o novo tamanho
+            QTimer.singleShot(0, self._request_visible_tiles)
+
+            # Pré-carrega as páginas vizinhas em baixa resolução
+            for page_num in (self.current_page + 1, self.current_page - 1):
+                if 0 <= page_num < self.total_pages:
+                    self._request(page_num, self._page_key(page_num), priority=0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        QTimer.singleShot(0, self._request_visible_tiles)
+
+    def _page_key(self, page_num):
+        """Chave da página inteira, renderizada no degrau do zoom 100%"""
+        return (self.page_ids[page_num], zoom_bucket(self._base_scale(page_num)), None)
+
+    def _request_visible_tiles(self):
+        """Renderiza os blocos da página atual que cobrem a área visível"""
+        if self.current_page >= len(self.page_sizes) or self.page_ids[self.current_page] is None:
+            return
+        bucket = self._current_bucket()
+        if bucket <= self._page_key(self.current_page)[1]:
+            return  # A página inteira já tem resolução suficiente
+
+        page_rect = self.page_canvas.page_rect()
+        visible = self.page_canvas.visibleRegion().boundingRect() & page_rect
+        if visible.isEmpty():
+            return
+        # Converte a área visível para pixels da renderização no degrau atual
+        factor = 1 / self.page_canvas.tile_scale
+        x0 = (visible.left() - page_rect.left()) * factor
+        y0 = (visible.top() - page_rect.top()) * factor
+        x1 = (visible.right() + 1 - page_rect.left()) * factor
+        y1 = (visible.bottom() + 1 - page_rect.top()) * factor
+        for ty in range(int(y0 // TILE_SIZE), int(math.ceil(y1 / TILE_SIZE))):
+            for tx in range(int(x0 // TILE_SIZE), int(math.ceil(x1 / TILE_SIZE))):
+                key = (self.page_ids[self.current_page], bucket, (tx, ty))
+                image = self.page_cache.get(key)
+                if image is not None:
+                    if (tx, ty) not in self.page_canvas.tiles:
+                        self.page_canvas.add_tile((tx, ty), image)
+                else:
+                    self._request(self.current_page, key, priority=1, cancellable=True)
+
+    def _request(self, page_num, key, priority, cancellable=False):
+        if self._render_source is None:
+            return
+        if key[0] is None:
+            # Resumo desconhecido: calcula primeiro; o pedido é refeito em _set_page_id
+            if page_num not in self._digesting:
+                self._digesting.add(page_num)
+                self._render_pool.start(_RenderTask(self._render_source, page_num, key,
+                                                    self._render_signals.generation, None,
+                                                    self._render_signals), priority)
+            return
+        if key in self.page_cache or key in self._pending:
+            return
+        self._pending.add(key)
+        view_generation = self._render_signals.view_generation if cancellable else None
+        task = _RenderTask(self._render_source, page_num, key, self._render_signals.generation,
+                           view_generation, self._render_signals)
+        self._render_pool.start(task, priority)
+
+    def _on_page_digested(self, result, page_id):
+        generation, page_num = result
+        if generation != self._render_signals.generation:
+            return
+        self._digesting.discard(page_num)
+        self._set_page_id(page_num, page_id)
+
+    def _set_page_id(self, page_num, page_id):
+        """Guarda o resumo calculado em segundo plano e refaz os pedidos que dependiam dele"""
+        if self.page_ids[page_num] is not None:
+            return
+        self.page_ids[page_num] = page_id
+        if page_num == self.current_page:
+            key = self._page_key(page_num)
+            image = self.page_cache.get(key)
+            if image is not None:
+                self.page_canvas.set_image(image)
+            else:
+                self._request(page_num, key, priority=2)
+            QTimer.singleShot(0, self._request_visible_tiles)
+        elif abs(page_num - self.current_page) == 1:
+            self._request(page_num, self._page_key(page_num), priority=0)
+
+    def _on_page_rendered(self, key, image):
+        self._pending.discard(key)
+        if image.isNull():
+            return
+        # A chave é o conteúdo da página: vale mesmo vinda de uma versão anterior
+        self.page_cache.put(key, image)
+        page_id, bucket, tile = key
+        if self.current_page >= len(self.page_ids) or page_id != self.page_ids[self.current_page]:
+            return
+        if tile is None:
+            if key == self._page_key(self.current_page):
+                self.page_canvas.set_image(image)
+        elif bucket == self._current_bucket():
+            self.page_canvas.add_tile(tile, image)
         
-    def load_pdf(self, pdf_path):
-        """Carrega um PDF e renderiza usando PyMuPDF (fitz)"""
-        self.current_pdf_path = pdf_path
-        self.pixmaps = []  # Limpa pixmaps anteriores
+    def _load_thumbnails(self, source):
+        """Cria os itens da barra lateral e enfileira as miniaturas que faltam"""
+        # Miniaturas de páginas que não mudaram são reaproveitadas da versão
+        # anterior, assim que as tarefas calculam o resumo de cada página
+        self._previous_thumbnails = {**self._previous_thumbnails, **self.thumbnail_images}
+        self.thumbnail_images = {}
+        known = frozenset(self._previous_thumbnails)
+
+        self.thumbnail_list.blockSignals(True)
+        self.thumbnail_list.clear()
+        for page_num in range(self.total_pages):
+            self.thumbnail_list.addItem(QListWidgetItem(QIcon(self.thumbnail_placeholder), str(page_num + 1)))
+        self.thumbnail_list.blockSignals(False)
+        self.thumbnail_list.setVisible(self.total_pages > 1)
+
+        for page_num in range(self.total_pages):
+            self._thumbnail_pool.start(_ThumbnailTask(source, page_num, known,
+                                                      self._render_signals.generation, self._render_signals))
+
+    def _on_thumbnail_ready(self, result, image):
+        generation, page_num, page_id = result
+        if generation != self._render_signals.generation:
+            return
+        if page_id is None:
+            # Veio do cache em disco sem calcular o resumo; só serve para esta página
+            page_id = (None, page_num)
+        else:
+            self._set_page_id(page_num, page_id)
+        if image.isNull():
+            image = self._previous_thumbnails.get(page_id)
+            if image is None:
+                return
+        self.thumbnail_images[page_id] = image
+        if len(self.thumbnail_images) == self.total_pages:
+            self._previous_thumbnails = {}
+        item = self.thumbnail_list.item(page_num)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def load_pdf(self, source, name=None, keep_view=False):
+        """Carrega um PDF (caminho ou bytes em memória) e renderiza sob demanda usando PyMuPDF (fitz).
+
+        As renderizações ficam em cache pelo conteúdo de cada página, então
+        carregar uma nova versão do mesmo documento (por exemplo, a prova
+        gerada de novo após um ajuste) só renderiza as páginas que mudaram.
+        Com ``keep_view`` a página atual e o zoom são mantidos.
+        """
+        if name is None:
+            name = source if isinstance(source, str) else ""
+        self.current_pdf_path = name
+
+        # Descarta as renderizações pendentes do documento anterior
+        self._render_signals.generation += 1
+        self._render_pool.clear()
+        self._thumbnail_pool.clear()
+        self._pending.clear()
+        self._digesting.clear()
+        self.page_sizes = []
+        self.page_ids = []
         
         try:
-            # Abre o documento PDF com PyMuPDF
-            doc = fitz.open(pdf_path)
-            self.total_pages = len(doc)
+            # Abre o documento só para ler o tamanho das páginas e o cabeçalho;
+            # o resumo de cada página é calculado em segundo plano no primeiro
+            # pedido e as páginas são renderizadas quando necessárias.
+            # Arquivos vêm do cache de documentos compartilhado com o leitor
+            with shared_document(source) as doc:
+                with documents.fitz_lock:
+                    self.total_pages = len(doc)
             
-            if self.total_pages > 0:
-                # Renderizar todas as páginas
-                for page_num in range(self.total_pages):
-                    # Pega a página
-                    page = doc[page_num]
-                    
-                    # Ajustar o fator de zoom para renderização inicial
-                    # Para documents A4, usamos um fator que gera uma visualização similar ao Word
-                    # Tamanho A4 em pixels a 96 DPI: 794 x 1123
-                    # O zoom de renderização é alto para qualidade, mas será escalado depois
-                    zoom = 2.0  # Fator de zoom para renderização em alta qualidade
-                    mat = fitz.Matrix(zoom, zoom)
-                    pix = page.get_pixmap(matrix=mat)
-
-                    # Converte para QImage
-                    img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
-
-                    # Cria um QPixmap a partir da QImage e armazena
-                    pixmap = QPixmap.fromImage(img)
-                    self.pixmaps.append(pixmap)
-                
-                # Configurar navegação de páginas
-                self.current_page = 0
+                if self.total_pages > 0:
+                    with documents.fitz_lock:
+                        self.page_sizes = [(page.rect.width, page.rect.height) for page in doc]
+                    self.page_ids = [None] * self.total_pages
+                    self._render_source = source
+                    self._load_thumbnails(source)
                 
-                # Definir zoom inicial para 100%
-                self.current_zoom = 1.0
-                
-                # Ajustar a largura do widget para simular a exibição do Word
-                if len(self.pixmaps) > 0:
-                    # Obter o tamanho disponível na área de visualização
-                    view_width = self.scroll_area.width() - 30  # Margem para scrollbar vertical
-                    
-                    # Calcula o fator de escala para melhor aproveitamento
-                    # Tamanho típico em proporção similar ao Word
-                    ideal_width = 650  # Largura ideal em pixels
+                    if keep_view:
+                        self.current_page = min(self.current_page, self.total_pages - 1)
+                    else:
+                        # Configurar navegação de páginas
+                        self.current_page = 0
                     
-                    # Obter a largura atual do pixmap em 100%
-                    pixmap_width = self.pixmaps[0].width()
-                    
-                    # Ajustar o zoom para dar uma proporção similar ao Word
-                    # Mantém-se em 100% visualmente, mas a escala real é ajustada
-                    if pixmap_width > ideal_width:
-                        scale_factor = ideal_width / pixmap_width
-                        
-                        # Aplicamos o fator de escala aos pixmaps
-                        for i, pixmap in enumerate(self.pixmaps):
-                            new_width = int(pixmap.width() * scale_factor)
-                            new_height = int(pixmap.height() * scale_factor)
-                            scaled_pixmap = pixmap.scaled(
-                                new_width, 
-                                new_height,
-                                Qt.AspectRatioMode.KeepAspectRatio,
-                                Qt.TransformationMode.SmoothTransformation
-                            )
-                            self.pixmaps[i] = scaled_pixmap
+                        # Definir zoom inicial para 100%
+                        self.current_zoom = 1.0
                 
-                # Atualizar a visualização
-                self.update_page()
+                    # Atualizar a visualização
+                    self.update_page()
                 
-                # Mostrar/ocultar controles de navegação conforme necessário
-                self.prev_page_btn.setVisible(self.total_pages > 1)
-                self.next_page_btn.setVisible(self.total_pages > 1)
-                self.page_label.setVisible(self.total_pages > 1)
+                    # Mostrar/ocultar controles de navegação conforme necessário
+                    self.prev_page_btn.setVisible(self.total_pages > 1)
+                    self.next_page_btn.setVisible(self.total_pages > 1)
+                    self.page_label.setVisible(self.total_pages > 1)
                 
-                # Se tiver apenas uma página, botões de navegação não são necessários
-                if self.total_pages <= 1:
-                    self.prev_page_btn.hide()
-                    self.next_page_btn.hide()
-                    self.page_label.hide()
+                    # Se tiver apenas uma página, botões de navegação não são necessários
+                    if self.total_pages <= 1:
+                        self.prev_page_btn.hide()
+                        self.next_page_btn.hide()
+                        self.page_label.hide()
                 
-                # Captura as informações do cabeçalho sem modificá-lo
-                self._extract_header_data(doc, doc[0])
-                # Atualiza o editor de cabeçalho se estiver visível
-                if self.header_group.isVisible():
-                    self.header_edit.setPlainText(self.get_header_text())
-
-                # Fecha o documento
-                doc.close()
+                    # Captura as informações do cabeçalho sem modificá-lo
+                    self._extract_header_data(source, doc)
+                    # Atualiza o editor de cabeçalho se estiver visível
+                    if self.header_group.isVisible():
+                        self.header_edit.setPlainText(self.get_header_text())
                 
         except Exception as e:
             print(f"Erro ao carregar PDF: {e}")
-            
-    def _extract_header_data(self, doc, page):
+
+    def _extract_header_data(self, source, doc):
         """Extrai os dados do cabeçalho sem modificar a visualização"""
         try:
-            # Definir altura do cabeçalho (25% da primeira página)
-            header_height_percentage = 0.25
-            header_height = int(page.rect.height * header_height_percentage)
+            # Análise compartilhada com o leitor e os importadores (memorizada pelo hash)
+            analise = header_analysis.analisar_cabecalho(source, doc=doc)
             
             # Criar dados estruturados para o cabeçalho
             self.header_data = {
@@ -358,58 +910,35 @@ class PDFHeaderViewer(QWidget):
                 "right_image": None
             }
             
-            # Extrair texto do cabeçalho
-            header_text_dict = page.get_text("dict", clip=fitz.Rect(0, 0, page.rect.width, header_height))
-            
-            # Extrair informações de imagens
-            image_list = []
-            for img_info in page.get_image_info():
-                if img_info['bbox'][1] < header_height:
-                    image_list.append(img_info)
-            
-            # Processar imagens se necessário
-            temp_dir = Path("output/temp")
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Dividir imagens entre esquerda e direita
-            page_center_x = page.rect.width / 2
+            # Dividir imagens entre esquerda e direita, ficando com a maior de cada lado
+            page_center_x = analise.largura / 2
             left_images = []
             right_images = []
             
-            for img_info in image_list:
+            for img_info in header_analysis.imagens_no_cabecalho(analise):
                 img_center_x = (img_info['bbox'][0] + img_info['bbox'][2]) / 2
                 if img_center_x < page_center_x:
                     left_images.append(img_info)
                 else:
                     right_images.append(img_info)
             
+            def area(img_info):
+                return (img_info['bbox'][2] - img_info['bbox'][0]) * (img_info['bbox'][3] - img_info['bbox'][1])
+            
             if left_images:
-                left_images.sort(key=lambda x: (x['bbox'][2]-x['bbox'][0])*(x['bbox'][3]-x['bbox'][1]), reverse=True)
-                left_img_info = left_images[0]
-                self.header_data["left_image"] = {
-                    "bbox": left_img_info['bbox']
-                }
+                self.header_data["left_image"] = {"bbox": max(left_images, key=area)['bbox']}
             
             if right_images:
-                right_images.sort(key=lambda x: (x['bbox'][2]-x['bbox'][0])*(x['bbox'][3]-x['bbox'][1]), reverse=True)
-                right_img_info = right_images[0]
-                self.header_data["right_image"] = {
-                    "bbox": right_img_info['bbox']
-                }
+                self.header_data["right_image"] = {"bbox": max(right_images, key=area)['bbox']}
                 
             # Extrair elementos de texto
-            if "blocks" in header_text_dict:
-                for block in header_text_dict["blocks"]:
-                    if "lines" in block:
-                        for line in block["lines"]:
-                            for span in line.get("spans", []):
-                                text_element = {
-                                    "text": span.get("text", ""),
-                                    "bbox": span.get("bbox", [0, 0, 0, 0]),
-                                    "fontSize": span.get("size", 12),
-                                    "fontName": span.get("font", ""),
-                                }
-                                self.header_data["text_elements"].append(text_element)
+            for span in header_analysis.spans(analise, limite=analise.altura_cabecalho):
+                self.header_data["text_elements"].append({
+                    "text": span["text"],
+                    "bbox": span["bbox"],
+                    "fontSize": span["size"],
+                    "fontName": span["font"],
+                })
             
             # Emite o sinal com os dados do cabeçalho
             self.header_captured.emit(
@@ -1,8 +1,268 @@
+import itertools
+import logging
 import os
 import platform
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def imprimir(path):
+logger = logging.getLogger(__name__)
+
+# Estados de trabalho do IPP (RFC 8011, job-state)
+JOB_PENDING = 3
+JOB_HELD = 4
+JOB_PROCESSING = 5
+JOB_STOPPED = 6
+JOB_CANCELED = 7
+JOB_ABORTED = 8
+JOB_COMPLETED = 9
+ESTADOS_FINAIS = (JOB_CANCELED, JOB_ABORTED, JOB_COMPLETED)
+
+NOMES_ESTADOS = {
+    JOB_PENDING: "na fila",
+    JOB_HELD: "retido",
+    JOB_PROCESSING: "imprimindo",
+    JOB_STOPPED: "parado",
+    JOB_CANCELED: "cancelado",
+    JOB_ABORTED: "abortado",
+    JOB_COMPLETED: "concluído",
+}
+
+
+class PrinterError(Exception):
+    """Exceção customizada para erros de impressão"""
+    pass
+
+
+class PrintJob:
+    """Trabalho de impressão enviado ao CUPS e seu último estado conhecido"""
+
+    def __init__(self, path, job_id=None, state=JOB_PENDING, error=None):
+        self.path = path
+        self.job_id = job_id
+        self.state = state
+        self.error = error
+
+    @property
+    def finished(self):
+        return self.error is not None or self.state in ESTADOS_FINAIS
+
+    @property
+    def state_name(self):
+        if self.error:
+            return "erro"
+        return NOMES_ESTADOS.get(self.state, str(self.state))
+
+
+class FakeCupsConnection:
+    """Dublê do ``cups.Connection`` para testes e máquinas sem impressora.
+
+    Cada consulta de estado avança o trabalho um passo (na fila -> imprimindo
+    -> concluído). Os arquivos enviados ficam em ``submitted``.
+    """
+
+    def __init__(self, default_printer="Fake_Printer", steps=(JOB_PENDING, JOB_PROCESSING, JOB_COMPLETED)):
+        self.default_printer = default_printer
+        self.steps = steps
+        self.submitted = []
+        self._jobs = {}
+        self._canceled = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def getDefault(self):
+        return self.default_printer
+
+    def printFile(self, printer, filename, title, options):
+        if not os.path.exists(filename):
+            raise PrinterError(f"Arquivo não encontrado: {filename}")
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = 0
+            self.submitted.append((printer, filename, title, dict(options)))
+        return job_id
+
+    def getJobAttributes(self, job_id):
+        with self._lock:
+            if job_id in self._canceled:
+                return {'job-id': job_id, 'job-state': JOB_CANCELED}
+            step = self._jobs[job_id]
+            self._jobs[job_id] = min(step + 1, len(self.steps) - 1)
+            return {'job-id': job_id, 'job-state': self.steps[step]}
+
+    def cancelJob(self, job_id):
+        with self._lock:
+            self._canceled.add(job_id)
+
+
+def _cups_connection():
+    import cups
+    return cups.Connection()
+
+
+class PrintService:
+    """Envia PDFs ao CUPS sem bloquear quem chama.
+
+    Os envios são feitos por um pool com no máximo ``max_concurrent``
+    trabalhos simultâneos (cada thread tem sua própria conexão, pois o
+    ``cups.Connection`` não é thread-safe). Uma thread de acompanhamento
+    consulta o estado dos trabalhos ativos e chama o ``callback`` de cada
+    um a cada mudança, com o ``PrintJob`` atualizado.
+
+    Sem o pycups (macOS, por exemplo) o arquivo é entregue ao ``lp`` e o
+    trabalho não é acompanhado.
+    """
+
+    def __init__(self, connection_factory=_cups_connection, printer=None, max_concurrent=2, poll_interval=1.0):
+        self.connection_factory = connection_factory
+        self.printer = printer
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="impressao")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active = {}
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._tracker = None
+
+    def _connection(self):
+        if not hasattr(self._local, 'connection'):
+            self._local.connection = self.connection_factory()
+        return self._local.connection
+
+    def submit(self, path, copies=1, duplex=True, title=None, callback=None):
+        """Enfileira um arquivo para impressão e retorna um Future com o PrintJob"""
+        if self._closed:
+            raise PrinterError("Serviço de impressão encerrado")
+        return self._executor.submit(self._send, os.path.abspath(path), copies, duplex, title, callback)
+
+    def submit_many(self, paths, **kwargs):
+        """Enfileira vários arquivos; a concorrência fica limitada pelo pool"""
+        return [self.submit(path, **kwargs) for path in paths]
+
+    def _send(self, path, copies, duplex, title, callback):
+        job = PrintJob(path)
+        try:
+            try:
+                connection = self._connection()
+            except ImportError:
+                return self._send_lp(job, copies, duplex, callback)
+            printer = self.printer or connection.getDefault()
+            if not printer:
+                raise PrinterError("Nenhuma impressora padrão configurada")
+
+            options = {'copies': str(copies)}
+            if duplex:
+                options['sides'] = 'two-sided-long-edge'
+            job.job_id = connection.printFile(printer, path, title or os.path.basename(path), options)
+            logger.info(f"Trabalho {job.job_id} enviado para {printer}: {path}")
+        except Exception as e:
+            job.error = str(e)
+            logger.error(f"Erro ao enviar {path} para impressão: {job.error}")
+            self._notify(callback, job)
+            return job
+
+        self._notify(callback, job)
+        with self._lock:
+            self._active[job.job_id] = (job, callback)
+            self._start_tracker()
+        self._wakeup.set()
+        return job
+
+    def _send_lp(self, job, copies, duplex, callback):
+        comando = ["lp", "-n", str(copies)]
+        if self.printer:
+            comando += ["-d", self.printer]
+        if duplex:
+            comando += ["-o", "sides=two-sided-long-edge"]
+        try:
+            saida = subprocess.run(comando + [job.path], check=True, capture_output=True, text=True).stdout
+            # "request id is Impressora-12 (1 file(s))"
+            job.job_id = saida.split()[3] if saida.startswith("request id is") else None
+            logger.info(f"Arquivo enviado ao lp: {job.path}")
+        except (OSError, subprocess.CalledProcessError) as e:
+            job.error = str(e)
+            logger.error(f"Erro ao enviar {job.path} para impressão: {job.error}")
+        self._notify(callback, job)
+        return job
+
+    def _start_tracker(self):
+        if self._tracker is None or not self._tracker.is_alive():
+            self._tracker = threading.Thread(target=self._track, name="impressao-status", daemon=True)
+            self._tracker.start()
+
+    def _track(self):
+        connection = None
+        while not self._closed:
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                connection = connection or self.connection_factory()
+            except Exception as e:
+                logger.error(f"Erro ao conectar ao CUPS: {str(e)}")
+                self._wakeup.wait(self.poll_interval)
+                continue
+
+            for job, callback in active:
+                try:
+                    state = connection.getJobAttributes(job.job_id).get('job-state', job.state)
+                except Exception as e:
+                    job.error = str(e)
+                    state = job.state
+                if state != job.state or job.error:
+                    job.state = state
+                    self._notify(callback, job)
+                if job.finished:
+                    with self._lock:
+                        self._active.pop(job.job_id, None)
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    @staticmethod
+    def _notify(callback, job):
+        if callback is None:
+            return
+        try:
+            callback(job)
+        except Exception as e:
+            logger.error(f"Erro no callback de impressão: {str(e)}")
+
+    def active_jobs(self):
+        """Trabalhos enviados que ainda não terminaram"""
+        with self._lock:
+            return [job for job, _ in self._active.values()]
+
+    def cancel(self, job_id):
+        """Pede o cancelamento de um trabalho; retorna o Future do pedido"""
+        return self._executor.submit(lambda: self._connection().cancelJob(job_id))
+
+    def shutdown(self, wait=True):
+        self._closed = True
+        self._wakeup.set()
+        self._executor.shutdown(wait=wait)
+
+
+_servico = None
+_servico_lock = threading.Lock()
+
+
+def servico_padrao():
+    """Serviço de impressão compartilhado pelo aplicativo"""
+    global _servico
+    with _servico_lock:
+        if _servico is None:
+            _servico = PrintService()
+        return _servico
+
+
+def imprimir(path, callback=None, **kwargs):
     if platform.system() == "Windows":
         os.startfile(path, "print")
-    else:
-        os.system(f"lp {path}")
+        return None
+    return servico_padrao().submit(path, callback=callback, **kwargs)
@@ -0,0 +1,41 @@
+import io
+import json
+from functools import lru_cache
+
+import qrcode
+from reportlab.lib.utils import ImageReader
+
+
+def montar_payload(info):
+    """Serializa as informações da prova no texto gravado no QR code"""
+    if isinstance(info, str):
+        return info
+    return json.dumps(info, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+@lru_cache(maxsize=256)
+def qr_png_bytes(data):
+    """Gera o PNG do QR code em memória, com cache por conteúdo.
+
+    O resultado é um ``bytes`` imutável: cada processo de trabalho mantém o
+    seu próprio cache e nenhum arquivo temporário é compartilhado, então não
+    há disputa entre gerações paralelas.
+    """
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def qr_image_reader(data):
+    """Retorna um ImageReader do ReportLab pronto para ``drawImage``"""
+    return ImageReader(io.BytesIO(qr_png_bytes(data)))
@@ -5,7 +5,7 @@ from docx.section import Section
 from docx.text.paragraph import Paragraph
 from docx.table import Table
 import os
-from config.settings import BASE_DIR
+from core import assets, documents, header_analysis
 import mimetypes
 import logging
 
@@ -15,7 +15,19 @@ class DocumentReaderError(Exception):
     """Exceção customizada para erros de leitura de documento"""
     pass
 
+class ReadCancelled(DocumentReaderError):
+    """Leitura interrompida a pedido do usuário"""
+    pass
+
 class DocumentReader:
+    @staticmethod
+    def _report(progress, cancel_event, current, total):
+        """Informa o progresso (``progress(atual, total)``) e interrompe se a leitura foi cancelada"""
+        if cancel_event is not None and cancel_event.is_set():
+            raise ReadCancelled("Leitura cancelada")
+        if progress is not None:
+            progress(current, total)
+
     @staticmethod
     def validate_file(file_path):
         """Valida o tipo do arquivo usando mimetypes"""
@@ -38,23 +50,11 @@ class DocumentReader:
     @staticmethod
     def extract_header_from_pdf(doc, first_page):
         """Extrai o cabeçalho do PDF como imagem fiel ao original"""
-        import io
-        from PIL import Image
-        import uuid
-
         try:
-            # Definir proporção do cabeçalho (ex: 25% do topo)
-            header_height_ratio = 0.25
-            header_height = int(first_page.rect.height * header_height_ratio)
-            header_rect = fitz.Rect(0, 0, first_page.rect.width, header_height)
-
-            # Renderizar a área do cabeçalho como imagem
-            header_pix = first_page.get_pixmap(clip=header_rect, dpi=300)
-            temp_dir = os.path.join(BASE_DIR, "output", "temp")
-            os.makedirs(temp_dir, exist_ok=True)
-            header_img_path = os.path.join(temp_dir, f"header_import_{uuid.uuid4().hex}.png")
-            header_pix.save(header_img_path)
-            return header_img_path  # Retorna o caminho da imagem do header
+            # A análise do cabeçalho é compartilhada (e memorizada) com o
+            # visualizador e os importadores
+            analise = header_analysis.analisar_cabecalho(doc.name, doc=doc)
+            return header_analysis.salvar_raster(analise)  # Retorna o caminho da imagem do header
         except Exception as e:
             logger.error(f"Erro ao extrair cabeçalho do PDF como imagem: {str(e)}")
             return None
@@ -103,9 +103,7 @@ class DocumentReader:
                         
                         header_content.append(para_data)
                         
-            # Extrair imagens do cabeçalho usando relacionamentos
-            temp_dir = os.path.join(BASE_DIR, "output", "temp")
-            os.makedirs(temp_dir, exist_ok=True)
+            # Extrair imagens do cabeçalho usando relacionamentos (gravadas em core.assets)
             
             # Importar bibliotecas necessárias
             import zipfile
@@ -130,12 +128,9 @@ class DocumentReader:
                                 try:
                                     # Extrair a imagem
                                     img_data = zip_file.read(img_path_in_zip.lstrip('/'))
-                                    img_filename = os.path.basename(img_path_in_zip)
-                                    img_path = os.path.join(temp_dir, f"docx_header_{img_filename}")
                                     
-                                    # Salvar a imagem
-                                    with open(img_path, 'wb') as img_file:
-                                        img_file.write(img_data)
+                                    # Salvar a imagem (nomeada pelo conteúdo)
+                                    img_path = assets.gravar(img_data, os.path.splitext(img_path_in_zip)[1])
                                     
                                     # Obter dimensões da imagem
                                     with Image.open(img_path) as img:
@@ -163,8 +158,13 @@ class DocumentReader:
         return header_content, header_images, all_images, image_sizes
 
     @staticmethod
-    def read_pdf(pdf_path):
-        """Lê um arquivo PDF e extrai seu conteúdo com máxima fidelidade"""
+    def read_pdf(pdf_path, progress=None, cancel_event=None):
+        """Lê um arquivo PDF e extrai seu conteúdo com máxima fidelidade.
+
+        ``progress(pagina, total)`` é chamado a cada página lida e
+        ``cancel_event`` (um ``threading.Event``) interrompe a leitura com
+        ``ReadCancelled`` entre uma página e outra.
+        """
         import fitz  # PyMuPDF
         
         resultado = {
@@ -184,196 +184,201 @@ class DocumentReader:
         }
         
         try:
-            # Tentar abrir o PDF com opção de reparo
-            doc = fitz.open(pdf_path)
-            
-            # Verificar se o documento foi aberto corretamente
-            if not doc or doc.is_closed or doc.page_count == 0:
-                logger.error(f"Não foi possível abrir o documento PDF: {pdf_path}")
-                raise DocumentReaderError("Não foi possível abrir o documento PDF")
+            # Documento compartilhado com o visualizador e os importadores
+            with documents.abrir(pdf_path) as doc:
+                # Verificar se o documento foi aberto corretamente
+                if not doc or doc.is_closed or doc.page_count == 0:
+                    logger.error(f"Não foi possível abrir o documento PDF: {pdf_path}")
+                    raise DocumentReaderError("Não foi possível abrir o documento PDF")
                 
-            first_page = doc[0]  # Primeira página
+                with documents.fitz_lock:
+                    first_page = doc[0]  # Primeira página
             
-            # Extrair cabeçalho com máxima fidelidade
-            header_img_path = DocumentReader.extract_header_from_pdf(doc, first_page)
+                # Extrair cabeçalho com máxima fidelidade
+                header_img_path = DocumentReader.extract_header_from_pdf(doc, first_page)
             
-            resultado['header_images'] = [header_img_path] if header_img_path else []
+                resultado['header_images'] = [header_img_path] if header_img_path else []
             
-            # Extrair o conteúdo completo do documento
-            text_blocks = []
+                # Extrair o conteúdo completo do documento
+                text_blocks = []
             
-            # Processamos página por página
-            for page_num in range(len(doc)):
-                try:
-                    page = doc[page_num]
-                    
-                    # Extrair texto com formatação
+                # Processamos página por página
+                for page_num in range(len(doc)):
+                    DocumentReader._report(progress, cancel_event, page_num, len(doc))
                     try:
-                        page_dict = page.get_text("dict")
-                    except Exception as text_err:
-                        logger.error(f"Erro ao extrair texto da página {page_num}: {str(text_err)}")
-                        page_dict = {"blocks": []}
+                        # Só as chamadas ao fitz seguram o lock global, página a página
+                        with documents.fitz_lock:
+                            page = doc[page_num]
                     
-                    for block in page_dict.get("blocks", []):
-                        if block.get("type", -1) == 0:  # Bloco de texto
-                            block_text = ""
-                            font_info = []
+                            # Extrair texto com formatação
+                            try:
+                                page_dict = page.get_text("dict")
+                            except Exception as text_err:
+                                logger.error(f"Erro ao extrair texto da página {page_num}: {str(text_err)}")
+                                page_dict = {"blocks": []}
+                    
+                        for block in page_dict.get("blocks", []):
+                            if block.get("type", -1) == 0:  # Bloco de texto
+                                block_text = ""
+                                font_info = []
                             
-                            # Processar linha a linha
-                            for line in block.get("lines", []):
-                                line_text = ""
-                                line_font_info = []
+                                # Processar linha a linha
+                                for line in block.get("lines", []):
+                                    line_text = ""
+                                    line_font_info = []
                                 
-                                # Processar span a span (cada span tem sua própria formatação)
-                                for span in line.get("spans", []):
-                                    span_text = span.get("text", "").strip()
-                                    if span_text:
-                                        line_text += span_text
+                                    # Processar span a span (cada span tem sua própria formatação)
+                                    for span in line.get("spans", []):
+                                        span_text = span.get("text", "").strip()
+                                        if span_text:
+                                            line_text += span_text
                                         
-                                        # Salvar informações de formatação
-                                        line_font_info.append({
-                                            'font': span.get("font", "Arial"),
-                                            'size': span.get("size", 12),
-                                            'flags': span.get("flags", 0),
-                                            'color': span.get("color", 0),
-                                            'style': {
-                                                'bold': bool(span.get("flags", 0) & 1),
-                                                'italic': bool(span.get("flags", 0) & 2),
-                                                'underline': bool(span.get("flags", 0) & 4)
-                                            }
-                                        })
+                                            # Salvar informações de formatação
+                                            line_font_info.append({
+                                                'font': span.get("font", "Arial"),
+                                                'size': span.get("size", 12),
+                                                'flags': span.get("flags", 0),
+                                                'color': span.get("color", 0),
+                                                'style': {
+                                                    'bold': bool(span.get("flags", 0) & 1),
+                                                    'italic': bool(span.get("flags", 0) & 2),
+                                                    'underline': bool(span.get("flags", 0) & 4)
+                                                }
+                                            })
                                 
-                                # Adicionar quebra de linha após cada linha
-                                if line_text:
-                                    block_text += line_text + "\n"
-                                    font_info.extend(line_font_info)
+                                    # Adicionar quebra de linha após cada linha
+                                    if line_text:
+                                        block_text += line_text + "\n"
+                                        font_info.extend(line_font_info)
                             
-                            # Remover quebra de linha extra no final
-                            block_text = block_text.rstrip()
+                                # Remover quebra de linha extra no final
+                                block_text = block_text.rstrip()
                             
-                            if block_text:
-                                # Verificar se este bloco é uma tabela com algoritmo melhorado
-                                is_table = False
+                                if block_text:
+                                    # Verificar se este bloco é uma tabela com algoritmo melhorado
+                                    is_table = False
                                 
-                                # Heurística aprimorada para detecção de tabelas:
-                                # 1. Detecção por padrões de formatação (tabulações, separadores)
-                                # 2. Análise de estrutura de linhas e colunas
-                                # 3. Detecção de bordas
+                                    # Heurística aprimorada para detecção de tabelas:
+                                    # 1. Detecção por padrões de formatação (tabulações, separadores)
+                                    # 2. Análise de estrutura de linhas e colunas
+                                    # 3. Detecção de bordas
                                 
-                                # Verificar padrões tabulares clássicos
-                                tab_patterns = ["\t", "|", "  ", "—", "–", "+", "-+", "+---", "----"]
-                                grid_patterns = ["+-+", "+--+", "|--|", "┌", "┐", "└", "┘", "├", "┤", "┬", "┴", "┼", "│", "─"]
+                                    # Verificar padrões tabulares clássicos
+                                    tab_patterns = ["\t", "|", "  ", "—", "–", "+", "-+", "+---", "----"]
+                                    grid_patterns = ["+-+", "+--+", "|--|", "┌", "┐", "└", "┘", "├", "┤", "┬", "┴", "┼", "│", "─"]
                                 
-                                # Verificar estrutura e padrões
-                                lines = block_text.split("\n")
+                                    # Verificar estrutura e padrões
+                                    lines = block_text.split("\n")
                                 
-                                # Avaliar alinhamento de caracteres em múltiplas linhas (indica tabela)
-                                if len(lines) > 1:
-                                    char_positions = []
-                                    alignment_score = 0
+                                    # Avaliar alinhamento de caracteres em múltiplas linhas (indica tabela)
+                                    if len(lines) > 1:
+                                        char_positions = []
+                                        alignment_score = 0
                                     
-                                    # Coletar posições dos caracteres específicos que podem indicar colunas
-                                    for line in lines:
-                                        positions = [i for i, char in enumerate(line) if char in ":|.-+"]
-                                        if positions:
-                                            char_positions.append(positions)
+                                        # Coletar posições dos caracteres específicos que podem indicar colunas
+                                        for line in lines:
+                                            positions = [i for i, char in enumerate(line) if char in ":|.-+"]
+                                            if positions:
+                                                char_positions.append(positions)
                                     
-                                    # Verificar alinhamentos verticais (colunas)
-                                    if len(char_positions) > 1:
-                                        all_positions = set()
-                                        for positions in char_positions:
-                                            all_positions.update(positions)
+                                        # Verificar alinhamentos verticais (colunas)
+                                        if len(char_positions) > 1:
+                                            all_positions = set()
+                                            for positions in char_positions:
+                                                all_positions.update(positions)
                                         
-                                        # Para cada posição, verificar quantas linhas têm um caractere nela
-                                        for pos in all_positions:
-                                            aligned_count = sum(1 for positions in char_positions if pos in positions)
-                                            if aligned_count > len(char_positions) // 2:
-                                                alignment_score += 1
+                                            # Para cada posição, verificar quantas linhas têm um caractere nela
+                                            for pos in all_positions:
+                                                aligned_count = sum(1 for positions in char_positions if pos in positions)
+                                                if aligned_count > len(char_positions) // 2:
+                                                    alignment_score += 1
                                     
-                                    # Se temos vários alinhamentos verticais, provavelmente é uma tabela
-                                    if alignment_score >= 2:
-                                        is_table = True
-                                
-                                # Verificar presença de padrões de tabela
-                                if not is_table:
-                                    # Verificar padrões comuns de grid
-                                    for pattern in grid_patterns:
-                                        if pattern in block_text:
+                                        # Se temos vários alinhamentos verticais, provavelmente é uma tabela
+                                        if alignment_score >= 2:
                                             is_table = True
-                                            break
+                                
+                                    # Verificar presença de padrões de tabela
+                                    if not is_table:
+                                        # Verificar padrões comuns de grid
+                                        for pattern in grid_patterns:
+                                            if pattern in block_text:
+                                                is_table = True
+                                                break
                                     
-                                    # Verificar padrões básicos indicando estrutura tabular
-                                    if not is_table and (
-                                        "\t" in block_text or  # Tabulações são um forte indicador
-                                        (block_text.count("\n") > 1 and  # Múltiplas linhas com padrões
-                                         any(pattern in block_text for pattern in tab_patterns))
-                                    ):
-                                        # Verificar consistência entre linhas (mesma quantidade de separadores)
-                                        if len(lines) > 1:
-                                            # Contar separadores em cada linha
-                                            separators_count = []
-                                            for line in lines:
-                                                if line.strip():  # Ignorar linhas vazias
-                                                    count = (line.count("|") + 
-                                                             line.count("\t") + 
-                                                             line.count("  "))
-                                                    separators_count.append(count)
+                                        # Verificar padrões básicos indicando estrutura tabular
+                                        if not is_table and (
+                                            "\t" in block_text or  # Tabulações são um forte indicador
+                                            (block_text.count("\n") > 1 and  # Múltiplas linhas com padrões
+                                             any(pattern in block_text for pattern in tab_patterns))
+                                        ):
+                                            # Verificar consistência entre linhas (mesma quantidade de separadores)
+                                            if len(lines) > 1:
+                                                # Contar separadores em cada linha
+                                                separators_count = []
+                                                for line in lines:
+                                                    if line.strip():  # Ignorar linhas vazias
+                                                        count = (line.count("|") + 
+                                                                 line.count("\t") + 
+                                                                 line.count("  "))
+                                                        separators_count.append(count)
                                             
-                                            # Se a maioria das linhas tem número semelhante de separadores, é uma tabela
-                                            if separators_count and len(set(separators_count)) <= 2:  # Permitir variação de 1
+                                                # Se a maioria das linhas tem número semelhante de separadores, é uma tabela
+                                                if separators_count and len(set(separators_count)) <= 2:  # Permitir variação de 1
+                                                    is_table = True
+                                
+                                    # Verificar também análise de fonte monospace e posicionamento pixel-perfect
+                                    if not is_table and block.get("font_info"):
+                                        # Verificar se usa fonte monospace (comum em tabelas)
+                                        monospace_fonts = ["Courier", "Consolas", "Monaco", "Menlo", "MonoSpace"]
+                                        for font_info in block.get("font_info", []):
+                                            if any(mono in font_info.get("font", "") for mono in monospace_fonts):
                                                 is_table = True
+                                                break
                                 
-                                # Verificar também análise de fonte monospace e posicionamento pixel-perfect
-                                if not is_table and block.get("font_info"):
-                                    # Verificar se usa fonte monospace (comum em tabelas)
-                                    monospace_fonts = ["Courier", "Consolas", "Monaco", "Menlo", "MonoSpace"]
-                                    for font_info in block.get("font_info", []):
-                                        if any(mono in font_info.get("font", "") for mono in monospace_fonts):
-                                            is_table = True
-                                            break
+                                    # Verificar caracteres de bordas internacionais
+                                    border_chars = "┌┐└┘├┤┬┴┼│─"
+                                    if not is_table and any(char in block_text for char in border_chars):
+                                        is_table = True
                                 
-                                # Verificar caracteres de bordas internacionais
-                                border_chars = "┌┐└┘├┤┬┴┼│─"
-                                if not is_table and any(char in block_text for char in border_chars):
-                                    is_table = True
+                                    # Adicionar à lista de tabelas se identificado como tabela
+                                    if is_table:
+                                        # Melhorar a estrutura de dados da tabela para preservar a formatação
+                                        tabela_estruturada = {
+                                            'text': block_text,
+                                            'bbox': block.get("bbox", [0, 0, 0, 0]),
+                                            'font_info': font_info,
+                                            'linhas': lines,
+                                            'estrutura_detectada': True
+                                        }
+                                        resultado['tables'].append(tabela_estruturada)
                                 
-                                # Adicionar à lista de tabelas se identificado como tabela
-                                if is_table:
-                                    # Melhorar a estrutura de dados da tabela para preservar a formatação
-                                    tabela_estruturada = {
+                                    # Adicionar bloco ao resultado
+                                    text_block = {
                                         'text': block_text,
                                         'bbox': block.get("bbox", [0, 0, 0, 0]),
-                                        'font_info': font_info,
-                                        'linhas': lines,
-                                        'estrutura_detectada': True
+                                        'is_table': is_table,
+                                        'font_info': font_info
                                     }
-                                    resultado['tables'].append(tabela_estruturada)
-                                
-                                # Adicionar bloco ao resultado
-                                text_block = {
-                                    'text': block_text,
-                                    'bbox': block.get("bbox", [0, 0, 0, 0]),
-                                    'is_table': is_table,
-                                    'font_info': font_info
-                                }
                                 
-                                text_blocks.append(text_block)
+                                    text_blocks.append(text_block)
                         
-                        elif block.get("type", -1) == 1:  # Bloco de imagem
-                            # As imagens já foram tratadas anteriormente
-                            pass
+                            elif block.get("type", -1) == 1:  # Bloco de imagem
+                                # As imagens já foram tratadas anteriormente
+                                pass
                             
-                except Exception as page_err:
-                    logger.error(f"Erro ao processar página {page_num}: {str(page_err)}")
-                    continue
+                    except Exception as page_err:
+                        logger.error(f"Erro ao processar página {page_num}: {str(page_err)}")
+                        continue
             
-            # Montar texto completo e armazenar blocos
-            full_text = "\n\n".join(block.get('text', '') for block in text_blocks)
-            resultado['text'] = full_text
-            resultado['blocks'] = text_blocks
+                DocumentReader._report(progress, cancel_event, len(doc), len(doc))
             
-            doc.close()
+                # Montar texto completo e armazenar blocos
+                full_text = "\n\n".join(block.get('text', '') for block in text_blocks)
+                resultado['text'] = full_text
+                resultado['blocks'] = text_blocks
         
+        except ReadCancelled:
+            raise
         except Exception as e:
             error_msg = f"Erro ao ler PDF: {str(e)}"
             logger.error(error_msg)
@@ -382,8 +387,12 @@ class DocumentReader:
         return resultado
 
     @staticmethod
-    def read_docx(docx_path):
-        """Lê um arquivo DOCX e extrai seu conteúdo com máxima fidelidade"""
+    def read_docx(docx_path, progress=None, cancel_event=None):
+        """Lê um arquivo DOCX e extrai seu conteúdo com máxima fidelidade.
+
+        ``progress`` e ``cancel_event`` funcionam como em ``read_pdf``,
+        contando parágrafos e tabelas.
+        """
         from docx import Document
         
         resultado = {
@@ -415,8 +424,12 @@ class DocumentReader:
             # Processar conteúdo do documento
             text_blocks = []
             
+            paragraphs = doc.paragraphs
+            total = len(paragraphs) + len(doc.tables)
+            
             # Processar parágrafos
-            for para in doc.paragraphs:
+            for i, para in enumerate(paragraphs):
+                DocumentReader._report(progress, cancel_event, i, total)
                 if not para.text.strip():
                     continue
                 
@@ -449,7 +462,8 @@ class DocumentReader:
                 text_blocks.append(para_data)
             
             # Processar tabelas
-            for table in doc.tables:
+            for i, table in enumerate(doc.tables, len(paragraphs)):
+                DocumentReader._report(progress, cancel_event, i, total)
                 table_data = {
                     'text': '',
                     'is_table': True,
@@ -487,11 +501,15 @@ class DocumentReader:
                     text_blocks.append(table_data)
                     resultado['tables'].append(table_data)
             
+            DocumentReader._report(progress, cancel_event, total, total)
+            
             # Montar texto completo e adicionar blocos
             full_text = "\n\n".join(block['text'] for block in text_blocks)
             resultado['text'] = full_text
             resultado['blocks'] = text_blocks
         
+        except ReadCancelled:
+            raise
         except Exception as e:
             error_msg = f"Erro ao ler DOCX: {str(e)}"
             logger.error(error_msg)
@@ -500,13 +518,13 @@ class DocumentReader:
         return resultado
 
     @staticmethod
-    def read(file_path):
+    def read(file_path, progress=None, cancel_event=None):
         """Método principal para ler documentos, detectando automaticamente o tipo"""
         ext = os.path.splitext(file_path)[1].lower()
         
         if ext == '.pdf':
-            return DocumentReader.read_pdf(file_path)
+            return DocumentReader.read_pdf(file_path, progress, cancel_event)
         elif ext in ['.docx', '.doc']:
-            return DocumentReader.read_docx(file_path)
+            return DocumentReader.read_docx(file_path, progress, cancel_event)
         else:
             raise DocumentReaderError("Formato de arquivo não suportado")
@@ -0,0 +1,41 @@
+import hashlib
+import logging
+import os
+import uuid
+
+from config.settings import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "thumbnails")
+# Largura das miniaturas em pixels
+LARGURA_MINIATURA = 100
+
+
+def digest_arquivo(caminho):
+    """SHA-256 do conteúdo do arquivo: a mesma prova reaberta (ou copiada) reaproveita o cache"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_miniatura(digest, pagina, largura=LARGURA_MINIATURA):
+    return os.path.join(THUMBNAIL_DIR, digest[:2], digest, f"{pagina}_{largura}.png")
+
+
+def gravar_miniatura(caminho, dados):
+    """Grava o PNG de forma atômica (outra thread ou processo nunca lê um arquivo pela metade)"""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temp_path = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(dados)
+        os.replace(temp_path, caminho)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar a miniatura {caminho}: {str(e)}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
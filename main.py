@@ -1,8 +1,22 @@
+import logging
+import os
 import sys
 from PyQt6 import QtWidgets
+from config.settings import BASE_DIR
 from ui.controller import MainController
 
+def configurar_logging():
+    """Log da aplicação em output/prova_generation.log"""
+    log_file = os.path.join(BASE_DIR, "output", "prova_generation.log")
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
 def main():
+    configurar_logging()
     app = QtWidgets.QApplication(sys.argv)
     window = MainController()
     window.show()
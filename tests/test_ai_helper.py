@@ -0,0 +1,129 @@
+import itertools
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from benchmarks import fake_gemini
+from core import ai_helper
+
+TEXTOS = [f"Questão {i}: qual alternativa está correta?" for i in range(5)]
+
+
+@pytest.fixture
+def servidor():
+    servidor, url = fake_gemini.iniciar(latencia=0)
+    yield servidor, url
+    servidor.shutdown()
+
+
+def _cliente(url):
+    return ai_helper.ClienteIA("teste", base_url=url, taxa=1000, rajada=1000, cache=False)
+
+
+def _resposta(texto):
+    return {"candidates": [{"content": {"parts": [{"text": texto}], "role": "model"}}]}
+
+
+def test_lote_pede_esquema_e_respeita_ids(servidor, monkeypatch):
+    servidor, url = servidor
+    cliente = _cliente(url)
+    corpos = []
+    post = cliente._post
+    monkeypatch.setattr(cliente, "_post", lambda corpo, cancel_event=None: corpos.append(corpo) or post(corpo))
+
+    assert cliente.reescrever_lote(TEXTOS) == [fake_gemini.reescrever(t) for t in TEXTOS]
+    assert servidor.config['requisicoes'] == 1
+    config = corpos[0]["generationConfig"]
+    assert config == {"responseMimeType": "application/json", "responseSchema": ai_helper.ESQUEMA_LOTE}
+
+
+def test_lote_descarta_itens_invalidos(monkeypatch):
+    cliente = _cliente("http://127.0.0.1:9")
+    itens = [
+        {"id": 2, "texto": "dois"},
+        {"id": 0, "texto": "zero"},
+        {"id": 0, "texto": "repetido"},
+        {"id": True, "texto": "booleano"},
+        {"id": 7, "texto": "fora do lote"},
+        {"id": 3, "texto": "   "},
+        {"id": 4},
+        "não é objeto",
+    ]
+    monkeypatch.setattr(cliente, "_post", lambda corpo, cancel_event=None: _resposta(json.dumps(itens)))
+    assert cliente.reescrever_lote(TEXTOS) == ["zero", None, "dois", None, None]
+
+
+@pytest.mark.parametrize("texto", ["não é JSON", json.dumps({"id": 0, "texto": "objeto"})])
+def test_lote_fora_do_esquema_gera_erro(monkeypatch, texto):
+    cliente = _cliente("http://127.0.0.1:9")
+    monkeypatch.setattr(cliente, "_post", lambda corpo, cancel_event=None: _resposta(texto))
+    with pytest.raises(ai_helper.ErroIA):
+        cliente.reescrever_lote(TEXTOS)
+
+
+def test_lote_invalido_refeito_um_a_um():
+    servidor, url = fake_gemini.iniciar(latencia=0, falhas_lote=1.0)
+    try:
+        resultados = _cliente(url)._reescrever_grupo(TEXTOS, None)
+    finally:
+        servidor.shutdown()
+    assert resultados == [fake_gemini.reescrever(t) for t in TEXTOS]
+    assert servidor.config['requisicoes'] == 1 + len(TEXTOS)
+
+
+def test_lote_curto_refaz_so_os_que_faltam(servidor, monkeypatch):
+    servidor, url = servidor
+    cliente = _cliente(url)
+    post = cliente._post
+
+    def sem_os_dois_ultimos(corpo, cancel_event=None):
+        resposta = post(corpo, cancel_event)
+        if "generationConfig" in corpo:
+            itens = json.loads(cliente._texto_resposta(resposta))[:-2]
+            resposta = _resposta(json.dumps(itens))
+        return resposta
+
+    monkeypatch.setattr(cliente, "_post", sem_os_dois_ultimos)
+    assert cliente._reescrever_grupo(TEXTOS, None) == [fake_gemini.reescrever(t) for t in TEXTOS]
+    assert servidor.config['requisicoes'] == 1 + 2
+
+
+def test_429_e_repetido(servidor, monkeypatch):
+    servidor, url = servidor
+    servidor.config['erros'] = 0.5
+    # Só a primeira requisição cai na fração de erros, e o erro sorteado é 429
+    sorteios = itertools.chain([0.0], itertools.repeat(0.99))
+    monkeypatch.setattr(fake_gemini.random, "random", lambda: next(sorteios))
+    monkeypatch.setattr(fake_gemini.random, "choice", lambda opcoes: 429)
+
+    assert _cliente(url).reescrever(TEXTOS[0]) == fake_gemini.reescrever(TEXTOS[0])
+    assert servidor.config['requisicoes'] == 2
+
+
+def test_cancelamento_antes_da_tentativa(servidor):
+    servidor, url = servidor
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(ai_helper.ReescritaCancelada):
+        _cliente(url)._reescrever_grupo(TEXTOS, cancel_event)
+    assert servidor.config['requisicoes'] == 0
+
+
+def test_modelo_sem_esquema_desliga_lotes(servidor):
+    servidor, url = servidor
+    cliente = ai_helper.ClienteIA("teste", base_url=url, modelo=fake_gemini.MODELO_SEM_JSON,
+                                  taxa=1000, rajada=1000, cache=False, max_concorrencia=1)
+
+    primeiros = [f"{t} (primeira)" for t in TEXTOS]
+    assert cliente.reescrever_varios(primeiros) == [fake_gemini.reescrever(t) for t in primeiros]
+    # O lote recusado (400, sem nova tentativa) e depois um a um
+    assert servidor.config['requisicoes'] == 1 + len(TEXTOS)
+    assert not cliente.lotes
+
+    segundos = [f"{t} (segunda)" for t in TEXTOS]
+    assert cliente.reescrever_varios(segundos) == [fake_gemini.reescrever(t) for t in segundos]
+    # Sem lote na sessão: nenhuma requisição desperdiçada
+    assert servidor.config['requisicoes'] == 1 + 2 * len(TEXTOS)
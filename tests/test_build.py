@@ -0,0 +1,57 @@
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("PyQt6.uic")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6 import QtCore, QtWidgets
+
+from ui import build
+
+
+def _importar(caminho, nome):
+    spec = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_build_gera_modulos_importaveis(tmp_path, app):
+    recursos = build.recursos_qrc()
+    rc_module = tmp_path / "resources_rc.py"
+    ui_module = tmp_path / "main_window_ui.py"
+    build.gerar_modulo_recursos(recursos, destino=str(rc_module))
+    build.gerar_modulo_ui(recursos, destino=str(ui_module))
+
+    rc = _importar(rc_module, "resources_rc_teste")
+    try:
+        for caminho_recurso in recursos:
+            assert QtCore.QFile.exists(f":/{caminho_recurso}"), caminho_recurso
+
+        ui = _importar(ui_module, "main_window_ui_teste")
+        janela = QtWidgets.QMainWindow()
+        ui.Ui_MainWindow().setupUi(janela)
+        assert janela.centralWidget() is not None
+    finally:
+        rc.qCleanupResources()
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_build_com_falha_nao_deixa_modulo(tmp_path, monkeypatch):
+    from PyQt6 import uic
+
+    def falha(*args, **kwargs):
+        raise RuntimeError("falha na compilação")
+
+    monkeypatch.setattr(uic, "compileUi", falha)
+    destino = tmp_path / "main_window_ui.py"
+    with pytest.raises(RuntimeError):
+        build.gerar_modulo_ui(build.recursos_qrc(), destino=str(destino))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from core import documents
+
+
+def _pdf(caminho, paginas=3):
+    with fitz.open() as doc:
+        for i in range(paginas):
+            doc.new_page().insert_text((72, 72), f"Página {i + 1}")
+        doc.save(caminho)
+    return str(caminho)
+
+
+def test_abrir_nao_segura_o_documento(tmp_path):
+    caminho = _pdf(tmp_path / "prova.pdf")
+    cache = documents.DocumentCache()
+    with cache.abrir(caminho) as doc:
+        # Outra thread consegue usar o mesmo documento enquanto este ``with`` dura
+        resultado = []
+        outra = threading.Thread(target=lambda: resultado.append(_contar(cache, caminho)))
+        outra.start()
+        outra.join(5)
+        assert resultado == [3]
+        with documents.fitz_lock:
+            assert doc.page_count == 3
+    cache.limpar()
+
+
+def _contar(cache, caminho):
+    with cache.abrir(caminho) as doc, documents.fitz_lock:
+        return doc.page_count
+
+
+def test_chamadas_concorrentes_ao_fitz(tmp_path):
+    caminho = _pdf(tmp_path / "prova.pdf", paginas=5)
+    cache = documents.DocumentCache()
+    erros = []
+
+    def ler():
+        try:
+            for _ in range(20):
+                with cache.abrir(caminho) as doc:
+                    for n in range(5):
+                        with documents.fitz_lock:
+                            assert "Página" in doc[n].get_text()
+        except Exception as e:
+            erros.append(e)
+
+    def renderizar():
+        try:
+            for _ in range(20):
+                with documents.fitz_lock, fitz.open(caminho) as doc:
+                    doc[0].get_pixmap()
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=alvo) for alvo in (ler, ler, renderizar, renderizar)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    cache.limpar()
+    assert erros == []
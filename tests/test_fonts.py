@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab.pdfbase import pdfmetrics
+
+from core import fonts
+
+
+@pytest.fixture
+def indice(monkeypatch):
+    monkeypatch.setattr(fonts, "_indice", {
+        'liberationsans': {'regular': '/fontes/LiberationSans-Regular.ttf'},
+        'liberationserif': {'regular': '/fontes/LiberationSerif-Regular.ttf'},
+    })
+    monkeypatch.setattr(fonts, "_registradas", {})
+
+
+@pytest.mark.parametrize("nome, padrao", [
+    ("CalibriTesteSubstituto", "Helvetica"),
+    ("CambriaTesteSubstituto", "Times-Roman"),
+])
+def test_calibri_cambria_sem_liberation(indice, caplog, monkeypatch, nome, padrao):
+    # analisar_nome reduz o nome à família calibri/cambria
+    familia = 'calibri' if nome.startswith('Calibri') else 'cambria'
+    monkeypatch.setattr(fonts, "analisar_nome", lambda n: (familia, False, False))
+    assert fonts.resolver_caminho(nome) is None
+    with caplog.at_level("WARNING", logger=fonts.logger.name):
+        assert fonts.registrar_fonte(nome) == nome
+    assert pdfmetrics.getFont(nome).face.name == padrao
+    assert padrao in caplog.text
@@ -0,0 +1,71 @@
+import gc
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+QtGui = pytest.importorskip("PyQt6.QtGui")
+
+from core import pdf_viewer
+
+QImage = QtGui.QImage
+
+
+def _pixmap(alpha):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), alpha)
+    pix.set_rect(pix.irect, (255, 0, 0, 255) if alpha else (255, 0, 0))
+    return pix
+
+
+@pytest.mark.parametrize("alpha", [False, True])
+@pytest.mark.parametrize("fmt", [None, QImage.Format.Format_RGBA8888_Premultiplied,
+                                 QImage.Format.Format_RGB888])
+def test_imagem_nao_depende_do_pixmap(alpha, fmt):
+    pix = _pixmap(alpha)
+    image = pdf_viewer.pixmap_to_qimage(pix, fmt)
+    esperado = image.pixel(1, 1)
+    assert QtGui.QColor(esperado).red() == 255
+
+    del pix
+    gc.collect()
+    # Suja a memória liberada pelo pixmap
+    lixo = [fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), alpha) for _ in range(16)]
+    for outro in lixo:
+        outro.clear_with(7)
+
+    assert image.pixel(1, 1) == esperado
+    assert all(image.pixel(x, y) == esperado for x in range(4) for y in range(4))
+
+
+class _Sinais:
+    generation = 0
+
+    def __init__(self):
+        self.emitidos = []
+        self.thumbnail_ready = self
+
+    def emit(self, result, image):
+        self.emitidos.append((result, image))
+
+
+def test_miniatura_do_cache_em_disco_nao_abre_o_documento(tmp_path, monkeypatch):
+    from core import thumbnails
+
+    monkeypatch.setattr(thumbnails, "THUMBNAIL_DIR", str(tmp_path / "miniaturas"))
+    caminho = str(tmp_path / "prova.pdf")
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), "Questão 1")
+        doc.save(caminho)
+
+    sinais = _Sinais()
+    pdf_viewer._ThumbnailTask(caminho, 0, frozenset(), 0, sinais).run()
+    (_, _, page_id), imagem = sinais.emitidos.pop()
+    assert page_id is not None and not imagem.isNull()
+
+    def sem_resumo(doc, page):
+        raise AssertionError("resumo calculado com a miniatura em disco")
+
+    monkeypatch.setattr(pdf_viewer, "page_digest", sem_resumo)
+    monkeypatch.setattr(pdf_viewer, "_thread_document", sem_resumo)
+    pdf_viewer._ThumbnailTask(caminho, 0, frozenset(), 0, sinais).run()
+    (_, pagina, page_id), imagem = sinais.emitidos.pop()
+    assert (pagina, page_id) == (0, None) and not imagem.isNull()
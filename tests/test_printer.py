@@ -0,0 +1,106 @@
+import threading
+
+from core import printer
+
+
+def _servico(conexao, **kwargs):
+    return printer.PrintService(connection_factory=lambda: conexao, poll_interval=0.01, **kwargs)
+
+
+def test_submit_envia_com_opcoes(tmp_path):
+    arquivo = tmp_path / "prova.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    conexao = printer.FakeCupsConnection()
+    servico = _servico(conexao)
+    try:
+        job = servico.submit(str(arquivo), copies=2).result(timeout=5)
+    finally:
+        servico.shutdown()
+
+    assert job.error is None
+    assert job.job_id == 1
+    impressora, nome, titulo, opcoes = conexao.submitted[0]
+    assert impressora == "Fake_Printer"
+    assert nome == str(arquivo)
+    assert titulo == "prova.pdf"
+    assert opcoes == {'copies': '2', 'sides': 'two-sided-long-edge'}
+
+
+def test_submit_arquivo_inexistente_gera_erro(tmp_path):
+    servico = _servico(printer.FakeCupsConnection())
+    try:
+        job = servico.submit(str(tmp_path / "nao_existe.pdf")).result(timeout=5)
+    finally:
+        servico.shutdown()
+    assert job.error
+    assert job.finished
+    assert servico.active_jobs() == []
+
+
+def test_acompanha_estados_ate_concluir(tmp_path):
+    arquivo = tmp_path / "prova.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    estados = []
+    concluido = threading.Event()
+
+    def callback(job):
+        estados.append(job.state)
+        if job.finished:
+            concluido.set()
+
+    servico = _servico(printer.FakeCupsConnection())
+    try:
+        servico.submit(str(arquivo), callback=callback).result(timeout=5)
+        assert concluido.wait(5)
+    finally:
+        servico.shutdown()
+
+    assert estados == [printer.JOB_PENDING, printer.JOB_PROCESSING, printer.JOB_COMPLETED]
+    assert servico.active_jobs() == []
+
+
+def test_cancel_retorna_future_e_cancela(tmp_path):
+    arquivo = tmp_path / "prova.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    cancelado = threading.Event()
+
+    def callback(job):
+        if job.state == printer.JOB_CANCELED:
+            cancelado.set()
+
+    # Sem avançar sozinho: o trabalho fica na fila até ser cancelado
+    conexao = printer.FakeCupsConnection(steps=(printer.JOB_PENDING,))
+    servico = _servico(conexao)
+    try:
+        job = servico.submit(str(arquivo), callback=callback).result(timeout=5)
+        futuro = servico.cancel(job.job_id)
+        futuro.result(timeout=5)
+        assert cancelado.wait(5)
+    finally:
+        servico.shutdown()
+
+    assert job.state_name == "cancelado"
+
+
+def test_sem_pycups_usa_lp(tmp_path, monkeypatch):
+    arquivo = tmp_path / "prova.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    chamadas = []
+
+    def run(comando, **kwargs):
+        chamadas.append(comando)
+        return printer.subprocess.CompletedProcess(comando, 0, stdout="request id is Fake-7 (1 file(s))\n")
+
+    def sem_cups():
+        raise ImportError("No module named 'cups'")
+
+    monkeypatch.setattr(printer.subprocess, "run", run)
+    servico = printer.PrintService(connection_factory=sem_cups, poll_interval=0.01)
+    try:
+        job = servico.submit(str(arquivo)).result(timeout=5)
+    finally:
+        servico.shutdown()
+
+    assert job.error is None
+    assert job.job_id == "Fake-7"
+    assert chamadas == [["lp", "-n", "1", "-o", "sides=two-sided-long-edge", str(arquivo)]]
@@ -0,0 +1,161 @@
+"""Compila a interface para módulos Python (etapa de build).
+
+Gera a partir de ``ui/main_window.ui`` e ``ui/resources.qrc``:
+
+- ``ui/main_window_ui.py``: classe ``Ui_MainWindow`` (``uic.compileUi``),
+  com os ícones do .ui apontando para o recurso compilado;
+- ``ui/resources_rc.py``: ícones e tema embutidos no formato de recursos
+  do Qt, registrados ao importar o módulo (o PyQt6 não traz o pyrcc).
+
+Sem esses módulos o MainController volta a carregar o .ui, o tema e os
+ícones do disco.
+
+Uso: python -m ui.build
+"""
+import io
+import os
+import struct
+import uuid
+import xml.etree.ElementTree as ET
+
+from config.settings import BASE_DIR
+
+UI_DIR = os.path.join(BASE_DIR, "ui")
+UI_FILE = os.path.join(UI_DIR, "main_window.ui")
+QRC_FILE = os.path.join(UI_DIR, "resources.qrc")
+UI_MODULE = os.path.join(UI_DIR, "main_window_ui.py")
+RC_MODULE = os.path.join(UI_DIR, "resources_rc.py")
+
+# Flags dos nós da árvore de recursos
+_DIRETORIO = 0x02
+# QLocale.Language.C / QLocale.Territory.AnyTerritory
+_IDIOMA_C = 1
+_TERRITORIO_QUALQUER = 0
+
+
+def recursos_qrc(caminho=QRC_FILE):
+    """{caminho no recurso (sem ':'), arquivo no disco} declarados no .qrc"""
+    raiz = ET.fromstring(open(caminho, 'rb').read())
+    base = os.path.dirname(caminho)
+    recursos = {}
+    for qresource in raiz.iter('qresource'):
+        prefixo = qresource.get('prefix', '/').strip('/')
+        for arquivo in qresource.iter('file'):
+            nome = arquivo.get('alias') or arquivo.text.strip()
+            caminho_recurso = "/".join(p for p in (prefixo, nome) if p)
+            recursos[caminho_recurso] = os.path.join(base, arquivo.text.strip())
+    return recursos
+
+
+def _qt_hash(nome):
+    """Hash usado pelo Qt para procurar nomes nos recursos (por unidade UTF-16)"""
+    h = 0
+    for (unidade,) in struct.iter_unpack(">H", nome.encode('utf-16-be')):
+        h = (h << 4) + unidade
+        h ^= (h & 0xf0000000) >> 23
+        h &= 0x0fffffff
+    return h
+
+
+def compilar_recursos(recursos):
+    """(struct, names, data) no formato 1 do rcc, para qRegisterResourceData"""
+    arvore = {}
+    for caminho_recurso, arquivo in recursos.items():
+        no = arvore
+        partes = caminho_recurso.split("/")
+        for parte in partes[:-1]:
+            no = no.setdefault(parte, {})
+        no[partes[-1]] = arquivo
+
+    names, data = io.BytesIO(), io.BytesIO()
+    offsets_nome = {}
+
+    def offset_nome(nome):
+        if nome not in offsets_nome:
+            offsets_nome[nome] = names.tell()
+            codificado = nome.encode('utf-16-be')
+            names.write(struct.pack(">HI", len(codificado) // 2, _qt_hash(nome)))
+            names.write(codificado)
+        return offsets_nome[nome]
+
+    # Nós em largura: os filhos de cada diretório ficam contíguos e ordenados
+    # pelo hash do nome, que é como o QResource os procura
+    nos = [("", arvore)]
+    entradas = []
+    i = 0
+    while i < len(nos):
+        nome, conteudo = nos[i]
+        if isinstance(conteudo, dict):
+            filhos = sorted(conteudo.items(), key=lambda item: _qt_hash(item[0]))
+            entradas.append(struct.pack(">IHII", offset_nome(nome) if nome else 0, _DIRETORIO,
+                                        len(filhos), len(nos)))
+            nos.extend(filhos)
+        else:
+            with open(conteudo, 'rb') as f:
+                dados = f.read()
+            entradas.append(struct.pack(">IHHHI", offset_nome(nome), 0,
+                                        _TERRITORIO_QUALQUER, _IDIOMA_C, data.tell()))
+            data.write(struct.pack(">I", len(dados)))
+            data.write(dados)
+        i += 1
+    return b"".join(entradas), names.getvalue(), data.getvalue()
+
+
+def _gravar_modulo(destino, escrever):
+    """Grava ``destino`` por um arquivo temporário: um build que falha não deixa módulo pela metade"""
+    temp_path = f"{destino}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            escrever(f)
+        os.replace(temp_path, destino)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def gerar_modulo_recursos(recursos, destino=RC_MODULE):
+    estrutura, nomes, dados = compilar_recursos(recursos)
+
+    def escrever(f):
+        f.write("# Gerado por ui/build.py a partir de ui/resources.qrc; não editar\n")
+        f.write("from PyQt6 import QtCore\n\n")
+        f.write(f"qt_resource_data = {dados!r}\n\n")
+        f.write(f"qt_resource_name = {nomes!r}\n\n")
+        f.write(f"qt_resource_struct = {estrutura!r}\n\n\n")
+        f.write("def qInitResources():\n"
+                "    QtCore.qRegisterResourceData(0x01, qt_resource_struct, qt_resource_name, qt_resource_data)\n\n\n"
+                "def qCleanupResources():\n"
+                "    QtCore.qUnregisterResourceData(0x01, qt_resource_struct, qt_resource_name, qt_resource_data)\n\n\n"
+                "qInitResources()\n")
+
+    _gravar_modulo(destino, escrever)
+
+
+def gerar_modulo_ui(recursos, origem=UI_FILE, destino=UI_MODULE):
+    """Compila o .ui trocando os ícones do disco pelos caminhos no recurso"""
+    from PyQt6 import uic
+
+    por_arquivo = {os.path.normcase(os.path.abspath(arquivo)): caminho_recurso
+                   for caminho_recurso, arquivo in recursos.items()}
+    arvore = ET.parse(origem)
+    for elemento in arvore.iter():
+        if elemento.tag in ('iconset', 'normaloff', 'pixmap') and elemento.text and elemento.text.strip():
+            arquivo = os.path.normcase(os.path.abspath(os.path.join(UI_DIR, elemento.text.strip())))
+            if arquivo in por_arquivo:
+                elemento.text = f":/{por_arquivo[arquivo]}"
+
+    ui_xml = io.StringIO(ET.tostring(arvore.getroot(), encoding='unicode'))
+    _gravar_modulo(destino, lambda f: uic.compileUi(ui_xml, f))
+
+
+def main():
+    recursos = recursos_qrc()
+    gerar_modulo_recursos(recursos)
+    print(f"Recursos compilados ({len(recursos)} arquivos): {RC_MODULE}")
+    gerar_modulo_ui(recursos)
+    print(f"Interface compilada: {UI_MODULE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
-from core import reader, randomizer, generator, ai_helper
-from core.pdf_viewer import PDFHeaderViewer
-from PyQt6 import uic, QtWidgets, QtGui
-from PyQt6.QtCore import Qt, QTimer
+# Módulos pesados (PyMuPDF, reportlab, requests, python-docx) são importados
+# no primeiro uso, para a janela abrir sem esperar por eles
+from core import randomizer
+from ui.workers import LoadProvaWorker, GeneratePipelineWorker, PreviewVariantWorker
+from PyQt6 import QtWidgets, QtGui
+from PyQt6.QtCore import Qt, QTimer, QThreadPool, QFile, QIODevice, pyqtSignal
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QApplication
 from PyQt6.QtGui import QIcon, QColor, QPixmap
 from config.settings import BASE_DIR, ASSETS_DIR, GEMINI_API_KEY
+import copy
 import os
 import json
+import re
+
+# Interface e recursos compilados por ui/build.py; sem eles, o .ui, o tema e
+# os ícones são carregados do disco
+try:
+    from ui.main_window_ui import Ui_MainWindow
+    from ui import resources_rc  # noqa: F401 (registra os recursos ao importar)
+except Exception as e:
+    if not isinstance(e, ImportError):
+        print(f"Aviso: interface compilada indisponível ({e}); usando ui/main_window.ui")
+    Ui_MainWindow = None
 
 class ErrorDialog(QDialog):
     def __init__(self, title, message, parent=None):
@@ -51,20 +65,31 @@ class ProvaController:
         self.formato_original = None
 
     def carregar_prova(self, caminho):
+        resultado, questoes = self.ler_prova(caminho)
+        self.formato_original = resultado
+        return questoes
+
+    def ler_prova(self, caminho, progress=None, cancel_event=None):
+        """Lê e processa a prova sem alterar o estado do controller.
+
+        Pode rodar fora da thread da interface; retorna (formato, questões)
+        para serem aplicados depois por quem chamou.
+        """
+        from core import reader
         if caminho.endswith(".pdf"):
-            resultado = reader.DocumentReader.read_pdf(caminho)
+            resultado = reader.DocumentReader.read_pdf(caminho, progress, cancel_event)
         elif caminho.endswith(".docx"):
-            resultado = reader.DocumentReader.read_docx(caminho)
+            resultado = reader.DocumentReader.read_docx(caminho, progress, cancel_event)
         else:
             raise Exception("Formato não suportado")
             
-        self.formato_original = resultado
-        return self.processar_questoes(resultado['text'])
+        return resultado, self.processar_questoes(resultado['text'], resultado)
 
-    def processar_questoes(self, texto):
+    def processar_questoes(self, texto, formato=None):
         """Processa as questões mantendo a formatação original"""
+        formato = self.formato_original if formato is None else formato
         questoes = []
-        blocos = self.formato_original.get('blocks', [])
+        blocos = formato.get('blocks', [])
         
         questao_atual = None
         alternativas_atuais = []
@@ -110,7 +135,7 @@ class ProvaController:
                 if questao_atual is not None:
                     # Verificar se temos informações detalhadas da tabela no formato original
                     tabela_detalhada = None
-                    for tabela in self.formato_original.get('tables', []):
+                    for tabela in formato.get('tables', []):
                         if tabela.get('text', '') == texto_bloco:
                             tabela_detalhada = tabela
                             break
@@ -225,8 +250,8 @@ class ProvaController:
             questoes.append((questao_atual, alternativas_atuais))
         
         # Guardar informações sobre o formato original
-        self.formato_original['tem_numeracao_propria'] = tem_numeracao_propria
-        self.formato_original['tem_palavra_questao'] = tem_palavra_questao
+        formato['tem_numeracao_propria'] = tem_numeracao_propria
+        formato['tem_palavra_questao'] = tem_palavra_questao
         
         return questoes
 
@@ -240,12 +265,12 @@ class ProvaController:
         else:
             return questoes
 
-    def aplicar_ia(self, questoes, api_key):
-        novas = []
-        for enunciado, alternativas in questoes:
-            novo = ai_helper.substituir_por_sinonimos(enunciado, api_key)
-            novas.append((novo, alternativas))
-        return novas
+    def aplicar_ia(self, questoes, api_key, progress=None, cancel_event=None):
+        """Reescreve os enunciados em paralelo (ver ai_helper.ClienteIA)"""
+        from core import ai_helper
+        enunciados = [enunciado for enunciado, _ in questoes]
+        novos = ai_helper.cliente(api_key).reescrever_varios(enunciados, progress, cancel_event)
+        return [(novo, alternativas) for novo, (_, alternativas) in zip(novos, questoes)]
 
     def gerar_info_prova(self):
         """Gera informações para o QR Code"""
@@ -255,17 +280,28 @@ class ProvaController:
             'ia_utilizada': self.ui.aiCheckBox.isChecked()
         }
 
-class MainController(QtWidgets.QMainWindow):
+class MainController(QtWidgets.QMainWindow, Ui_MainWindow or object):
+    # Atualizações de impressão chegam de threads do serviço de impressão
+    print_status_changed = pyqtSignal(str)
+    
     def __init__(self):
         super().__init__()
         # Load UI
-        ui_file = os.path.join(BASE_DIR, "ui", "main_window.ui")
-        uic.loadUi(ui_file, self)
-        
-        # Load theme
-        theme_file = os.path.join(BASE_DIR, "ui", "styles", "theme.qss")
-        with open(theme_file, "r") as f:
-            self.setStyleSheet(f.read())
+        if Ui_MainWindow is not None:
+            self.setupUi(self)
+            theme = QFile(":/styles/theme.qss")
+            theme.open(QIODevice.OpenModeFlag.ReadOnly)
+            self.setStyleSheet(bytes(theme.readAll()).decode("utf-8"))
+            theme.close()
+        else:
+            from PyQt6 import uic
+            ui_file = os.path.join(BASE_DIR, "ui", "main_window.ui")
+            uic.loadUi(ui_file, self)
+            
+            # Load theme
+            theme_file = os.path.join(BASE_DIR, "ui", "styles", "theme.qss")
+            with open(theme_file, "r") as f:
+                self.setStyleSheet(f.read())
         
         # Setup UI elements
         self.setup_ui()
@@ -276,6 +312,17 @@ class MainController(QtWidgets.QMainWindow):
         
         self.last_qrcode_data = None
         self.last_gabarito_path = None
+        self.last_print_paths = []
+        
+        # Pré-visualização de variante em memória
+        self.preview_questoes = None
+        self.variant_dialog = None
+        self.variant_viewer = None
+        self._preview_worker = None
+        
+        # Carregamento e geração da prova em segundo plano
+        self._load_worker = None
+        self._generate_worker = None
         
         # Initial state
         self.apiKeyInput.hide()
@@ -286,7 +333,10 @@ class MainController(QtWidgets.QMainWindow):
         
     def setup_ui(self):
         self.setWindowTitle("ProvaGuard")
-        icons_dir = os.path.join(BASE_DIR, "ui", "assets", "icons")
+        if Ui_MainWindow is not None:
+            icons_dir = ":/icons/assets/icons"
+        else:
+            icons_dir = os.path.join(BASE_DIR, "ui", "assets", "icons")
         
         try:
             # Configurar ícones usando caminhos absolutos e verificando existência
@@ -299,8 +349,8 @@ class MainController(QtWidgets.QMainWindow):
             }
             
             for name, file in icons.items():
-                icon_path = os.path.join(icons_dir, file)
-                if not os.path.exists(icon_path):
+                icon_path = f"{icons_dir}/{file}"
+                if not QFile.exists(icon_path):
                     print(f"Aviso: Ícone não encontrado: {icon_path}")
                     continue
                     
@@ -336,10 +386,32 @@ class MainController(QtWidgets.QMainWindow):
         self.shuffleCombo.setEnabled(False)
         self.aiCheckBox.setEnabled(False)
 
+        # Quantidade de variantes geradas de uma vez
+        self.variantsSpin = QtWidgets.QSpinBox()
+        self.variantsSpin.setRange(1, 100)
+        self.variantsSpin.setPrefix("Variantes: ")
+        self.variantsSpin.setEnabled(False)
+        self.mainLayout.insertWidget(self.mainLayout.indexOf(self.shuffleCombo) + 1, self.variantsSpin)
+
+        # Juntar as variantes num único PDF frente e verso
+        self.bookletCheckBox = QtWidgets.QCheckBox("Juntar variantes em um caderno (frente e verso)")
+        self.bookletCheckBox.setEnabled(False)
+        self.mainLayout.insertWidget(self.mainLayout.indexOf(self.variantsSpin) + 1, self.bookletCheckBox)
+
         # Adicionar botão de visualizar gabarito
         self.gabarito_btn = QPushButton("Ver Gabarito")
         self.gabarito_btn.setEnabled(False)
         self.buttonLayout.addWidget(self.gabarito_btn)
+
+        # Botão para pré-visualizar uma variante sem gravar em disco
+        self.preview_variant_btn = QPushButton("Pré-visualizar Variante")
+        self.preview_variant_btn.setEnabled(False)
+        self.buttonLayout.addWidget(self.preview_variant_btn)
+
+        # Botão para cancelar carregamento ou geração (visível só enquanto rodam)
+        self.cancel_btn = QPushButton("Cancelar")
+        self.cancel_btn.hide()
+        self.statusbar.addPermanentWidget(self.cancel_btn)
         
         # Configurar preview do QR Code
         self.qr_preview = QLabel()
@@ -364,10 +436,13 @@ class MainController(QtWidgets.QMainWindow):
         self.printBtn.clicked.connect(self.on_print)
         self.aiCheckBox.stateChanged.connect(self.on_ai_toggle)
         self.gabarito_btn.clicked.connect(self.on_view_gabarito)
+        self.preview_variant_btn.clicked.connect(self.on_preview_variant)
+        self.cancel_btn.clicked.connect(self.on_cancel)
         # Conectar sinais para cabeçalho e rodapé
         self.headerImageBtn.clicked.connect(self.on_select_header_image)
         self.importLogoBtn.clicked.connect(self.on_import_logo_from_doc)
         self.importHeaderBtn.clicked.connect(self.on_import_header_complete)
+        self.print_status_changed.connect(lambda message: self.statusbar.showMessage(message, 5000))
     
     def show_error(self, title, message):
         dialog = ErrorDialog(title, str(message), self)
@@ -411,34 +486,93 @@ class MainController(QtWidgets.QMainWindow):
             "Documents (*.pdf *.docx)"
         )
         if file_path:
-            try:
-                self.questoes_atuais = self.prova_controller.carregar_prova(file_path)
-                
-                # Atualizar estado do botão
-                self.uploadBtn.setProperty("loaded", True)
-                self.uploadBtn.setText("Arquivo Carregado ✓")
-                self.uploadBtn.setStyleSheet("""
-                    QPushButton[loaded="true"] {
-                        background-color: #4CAF50;
-                    }
-                """)
-                
-                # Habilitar outros controles
-                self.previewBtn.setEnabled(True)
-                self.generateBtn.setEnabled(True)
-                self.printBtn.setEnabled(True)
-                self.shuffleCombo.setEnabled(True)
-                self.aiCheckBox.setEnabled(True)
-                
-                # Mostrar mensagem de sucesso
-                self.show_success_message("Prova carregada com sucesso!")
-                self.statusbar.showMessage(f"Arquivo carregado: {os.path.basename(file_path)}", 3000)
-                
-            except Exception as e:
-                self.show_error("Erro", str(e))
-                self.uploadBtn.setProperty("loaded", False)
-                self.style().unpolish(self.uploadBtn)
-                self.style().polish(self.uploadBtn)
+            if self._load_worker is not None:
+                self._load_worker.cancel()
+            
+            # A leitura roda em segundo plano; a janela continua respondendo
+            worker = LoadProvaWorker(self.prova_controller, file_path)
+            worker.signals.progress.connect(self._on_progress)
+            worker.signals.finished.connect(lambda result, w=worker: self._on_load_finished(w, result))
+            worker.signals.failed.connect(lambda message, w=worker: self._on_load_failed(w, message))
+            worker.signals.canceled.connect(lambda w=worker: self._on_load_canceled(w))
+            self._load_worker = worker
+            
+            self.uploadBtn.setEnabled(False)
+            self.cancel_btn.show()
+            self.progressBar.setValue(0)
+            self.statusbar.showMessage(f"Carregando {os.path.basename(file_path)}...")
+            QThreadPool.globalInstance().start(worker)
+    
+    def on_cancel(self):
+        if self._load_worker is not None:
+            self._load_worker.cancel()
+            self.statusbar.showMessage("Cancelando carregamento...")
+        if self._generate_worker is not None:
+            self._generate_worker.cancel()
+            self.statusbar.showMessage("Cancelando geração...")
+    
+    def _on_progress(self, current, total):
+        if total:
+            self.progressBar.setValue(int(current * 100 / total))
+    
+    def _end_load(self, worker):
+        """Restaura os controles; ignora workers substituídos por um carregamento mais novo"""
+        if worker is not self._load_worker:
+            return False
+        self._load_worker = None
+        self.uploadBtn.setEnabled(True)
+        self.cancel_btn.setVisible(self._generate_worker is not None)
+        QTimer.singleShot(3000, lambda: self.progressBar.setValue(0))
+        return True
+    
+    def _on_load_finished(self, worker, result):
+        """Aplica o resultado da leitura (na thread da interface)"""
+        if not self._end_load(worker):
+            return
+        file_path, resultado, questoes = result
+        self.prova_controller.formato_original = resultado
+        # Imagens extraídas da prova ficam em output/temp enquanto ela estiver aberta
+        from core import assets
+        assets.fixar(list(resultado.get('all_images', [])) + list(resultado.get('header_images', [])))
+        self.questoes_atuais = questoes
+        
+        # Atualizar estado do botão
+        self.uploadBtn.setProperty("loaded", True)
+        self.uploadBtn.setText("Arquivo Carregado ✓")
+        self.uploadBtn.setStyleSheet("""
+            QPushButton[loaded="true"] {
+                background-color: #4CAF50;
+            }
+        """)
+        
+        # Habilitar outros controles
+        self.previewBtn.setEnabled(True)
+        self.generateBtn.setEnabled(True)
+        self.printBtn.setEnabled(True)
+        self.preview_variant_btn.setEnabled(True)
+        self.shuffleCombo.setEnabled(True)
+        self.variantsSpin.setEnabled(True)
+        self.bookletCheckBox.setEnabled(True)
+        self.aiCheckBox.setEnabled(True)
+        
+        # Mostrar mensagem de sucesso
+        self.progressBar.setValue(100)
+        self.show_success_message("Prova carregada com sucesso!")
+        self.statusbar.showMessage(f"Arquivo carregado: {os.path.basename(file_path)}", 3000)
+    
+    def _on_load_failed(self, worker, message):
+        if not self._end_load(worker):
+            return
+        self.statusbar.clearMessage()
+        self.show_error("Erro", message)
+        self.uploadBtn.setProperty("loaded", False)
+        self.style().unpolish(self.uploadBtn)
+        self.style().polish(self.uploadBtn)
+    
+    def _on_load_canceled(self, worker):
+        if not self._end_load(worker):
+            return
+        self.statusbar.showMessage("Carregamento cancelado", 3000)
     
     def on_preview(self):
         if not self.questoes_atuais:
@@ -458,6 +592,7 @@ class MainController(QtWidgets.QMainWindow):
         
         if original_path and os.path.exists(original_path):
             # Usar o PDFHeaderViewer para mostrar o PDF original sem modificações
+            from core.pdf_viewer import PDFHeaderViewer
             pdf_viewer = PDFHeaderViewer()
             pdf_viewer.load_pdf(original_path)
             layout.addWidget(pdf_viewer)
@@ -490,87 +625,201 @@ class MainController(QtWidgets.QMainWindow):
         if not self.questoes_atuais:
             self.show_error("Aviso", "Carregue um arquivo primeiro!")
             return
+        if self._generate_worker is not None:
+            return
             
-        questoes = self.questoes_atuais
         modo = self.shuffleCombo.currentText().lower().split()[1]
+        api_key = GEMINI_API_KEY if self.aiCheckBox.isChecked() else None
         
-        # Aplicar embaralhamento
-        questoes = self.prova_controller.aplicar_embaralhamento(questoes, modo)
+        # Widgets só podem ser lidos aqui; o formato é copiado porque a
+        # interface continua podendo alterá-lo durante a geração
+        formato_original = dict(self._formato_com_cabecalho())
+        if 'header_images' in formato_original:
+            formato_original['header_images'] = list(formato_original['header_images'])
         
-        # Aplicar IA se selecionado
-        if self.aiCheckBox.isChecked():
-            questoes = self.prova_controller.aplicar_ia(questoes, GEMINI_API_KEY)
+        # Embaralhar, reescrever, renderizar e gravar rodam em segundo plano
+        worker = GeneratePipelineWorker(
+            self.prova_controller,
+            self.questoes_atuais,
+            modo,
+            self.prova_controller.gerar_info_prova(),
+            formato_original,
+            api_key=api_key,
+            variantes=self.variantsSpin.value(),
+            caderno=self.bookletCheckBox.isChecked()
+        )
+        worker.signals.stage.connect(lambda stage: self.statusbar.showMessage(f"{stage}..."))
+        worker.signals.progress.connect(self._on_progress)
+        worker.signals.finished.connect(self._on_generate_finished)
+        worker.signals.failed.connect(self._on_generate_failed)
+        worker.signals.canceled.connect(self._on_generate_canceled)
+        self._generate_worker = worker
         
-        # Gerar QR Code e PDF
-        try:
-            os.makedirs("output/provas_geradas", exist_ok=True)
-            qr_path = "output/provas_geradas/qrcode_temp.png"
-            
-            # Gerar QR Code com informações da prova
-            info_prova = self.prova_controller.gerar_info_prova()
-            self.last_qrcode_data = generator.gerar_qrcode(info_prova, qr_path)
-            
-            # Atualizar preview do QR Code
-            pixmap = QPixmap(qr_path)
-            self.qr_preview.setPixmap(pixmap.scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio))
-            
-            # Preparar informações de cabeçalho e rodapé
-            header_footer_info = {
-                'header_text': self.headerTextInput.text(),
-                'footer_text': self.footerTextInput.text(),
-                'header_image': self.header_image_path,
-                # Informações adicionais para o cabeçalho escolar
-                'teacher_info': self.teacherInput.text(),
-                'subject': self.subjectInput.text(),
-                'block_info': self.blockInput.text(),
-                'evaluation_type': self.evaluationInput.text()
-            }
-            
-            formato_original = self.prova_controller.formato_original or {}
-            # Atualizar o formato original com as informações de cabeçalho e rodapé
-            if header_footer_info['header_text']:
-                formato_original['header_text'] = header_footer_info['header_text']
-            if header_footer_info['footer_text']:
-                formato_original['footer_text'] = header_footer_info['footer_text']
-            if header_footer_info['header_image'] and os.path.exists(header_footer_info['header_image']):
-                # Se o formato original já tinha imagens, adicionar esta nova
-                if 'header_images' not in formato_original:
-                    formato_original['header_images'] = []
+        self.generateBtn.setEnabled(False)
+        self.cancel_btn.show()
+        self.progressBar.setValue(0)
+        QThreadPool.globalInstance().start(worker)
+    
+    def _end_generate(self):
+        self._generate_worker = None
+        self.generateBtn.setEnabled(True)
+        self.cancel_btn.setVisible(self._load_worker is not None)
+        QTimer.singleShot(3000, lambda: self.progressBar.setValue(0))
+    
+    def _on_generate_finished(self, result):
+        self._end_generate()
+        gerados, self.last_qrcode_data, caderno_path = result
+        
+        # Atualizar preview do QR Code
+        from core import qr
+        pixmap = QPixmap()
+        pixmap.loadFromData(qr.qr_png_bytes(self.last_qrcode_data), "PNG")
+        self.qr_preview.setPixmap(pixmap.scaled(100, 100, Qt.AspectRatioMode.KeepAspectRatio))
+        
+        pdf_path, gabarito_path = gerados[0]
+        self.last_gabarito_path = gabarito_path
+        self.last_print_paths = [caderno_path] if caderno_path else [pdf for pdf, _ in gerados]
+        self.gabarito_btn.setEnabled(True)
+        
+        self.progressBar.setValue(100)
+        if caderno_path:
+            self.statusbar.showMessage(f"{len(gerados)} variantes geradas! Caderno: {caderno_path}", 5000)
+        elif len(gerados) > 1:
+            self.statusbar.showMessage(f"{len(gerados)} variantes geradas com sucesso! Salvas em: {os.path.dirname(pdf_path)}", 5000)
+        else:
+            self.statusbar.showMessage(f"Prova gerada com sucesso! Salva em: {pdf_path}", 5000)
+    
+    def _on_generate_failed(self, message):
+        self._end_generate()
+        self.statusbar.clearMessage()
+        self.show_error("Erro", f"Erro ao gerar prova: {message}")
+    
+    def _on_generate_canceled(self):
+        self._end_generate()
+        self.statusbar.showMessage("Geração cancelada", 3000)
+    
+    def _formato_com_cabecalho(self):
+        """Formato original acrescido das informações de cabeçalho e rodapé da tela"""
+        # Preparar informações de cabeçalho e rodapé
+        header_footer_info = {
+            'header_text': self.headerTextInput.text(),
+            'footer_text': self.footerTextInput.text(),
+            'header_image': self.header_image_path,
+            # Informações adicionais para o cabeçalho escolar
+            'teacher_info': self.teacherInput.text(),
+            'subject': self.subjectInput.text(),
+            'block_info': self.blockInput.text(),
+            'evaluation_type': self.evaluationInput.text()
+        }
+        
+        formato_original = self.prova_controller.formato_original or {}
+        # Atualizar o formato original com as informações de cabeçalho e rodapé
+        if header_footer_info['header_text']:
+            formato_original['header_text'] = header_footer_info['header_text']
+        if header_footer_info['footer_text']:
+            formato_original['footer_text'] = header_footer_info['footer_text']
+        if header_footer_info['header_image'] and os.path.exists(header_footer_info['header_image']):
+            # Se o formato original já tinha imagens, adicionar esta nova
+            if 'header_images' not in formato_original:
+                formato_original['header_images'] = []
+            # Chamado a cada geração/atualização: não repetir a mesma imagem
+            if header_footer_info['header_image'] not in formato_original['header_images']:
                 formato_original['header_images'].append(header_footer_info['header_image'])
-                
-            # Adicionar informações extras para o cabeçalho escolar
-            formato_original['teacher_info'] = header_footer_info['teacher_info']
-            formato_original['subject'] = header_footer_info['subject']
-            formato_original['block_info'] = header_footer_info['block_info']
-            formato_original['evaluation_type'] = header_footer_info['evaluation_type']
-            
-            # Gerar PDF e gabarito
-            pdf_path, gabarito_path = generator.gerar_pdf_prova(
-                "prova_gerada", 
-                questoes, 
-                qr_path,
-                formato_original
-            )
             
-            self.last_gabarito_path = gabarito_path
-            self.gabarito_btn.setEnabled(True)
+        # Adicionar informações extras para o cabeçalho escolar
+        formato_original['teacher_info'] = header_footer_info['teacher_info']
+        formato_original['subject'] = header_footer_info['subject']
+        formato_original['block_info'] = header_footer_info['block_info']
+        formato_original['evaluation_type'] = header_footer_info['evaluation_type']
+        return formato_original
+    
+    def on_preview_variant(self):
+        """Gera uma variante em memória e mostra no visualizador, sem gravar em disco"""
+        if not self.questoes_atuais:
+            self.show_error("Aviso", "Carregue um arquivo primeiro!")
+            return
+        
+        modo = self.shuffleCombo.currentText().lower().split()[1]
+        self.preview_questoes = self.prova_controller.aplicar_embaralhamento(self.questoes_atuais, modo)
+        
+        if self.variant_dialog is None:
+            self.variant_dialog = QtWidgets.QDialog(self)
+            self.variant_dialog.setWindowTitle("Pré-visualização da Variante")
+            self.variant_dialog.setMinimumSize(800, 600)
+            layout = QtWidgets.QVBoxLayout()
+            from core.pdf_viewer import PDFHeaderViewer
+            self.variant_viewer = PDFHeaderViewer()
+            layout.addWidget(self.variant_viewer)
             
-            self.statusbar.showMessage(f"Prova gerada com sucesso! Salva em: {pdf_path}", 5000)
-        except Exception as e:
-            self.show_error("Erro", f"Erro ao gerar prova: {str(e)}")
+            buttons = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Close)
+            # Atualizar gera de novo a mesma variante com os campos de cabeçalho atuais
+            refresh_btn = buttons.addButton("Atualizar", QtWidgets.QDialogButtonBox.ButtonRole.ActionRole)
+            refresh_btn.clicked.connect(lambda: self._render_variant_preview(keep_view=True))
+            buttons.rejected.connect(self.variant_dialog.hide)
+            layout.addWidget(buttons)
+            self.variant_dialog.setLayout(layout)
+        
+        self._render_variant_preview(keep_view=False)
+        self.variant_dialog.show()
+        self.variant_dialog.raise_()
+    
+    def _render_variant_preview(self, keep_view):
+        """Gera a variante atual em memória e recarrega o visualizador.
+
+        O PDF é gerado num worker; o visualizador guarda as páginas pelo
+        conteúdo, então após um ajuste só as páginas que mudaram são
+        renderizadas de novo.
+        """
+        worker = PreviewVariantWorker(
+            self.preview_questoes,
+            self.prova_controller.gerar_info_prova(),
+            copy.deepcopy(self._formato_com_cabecalho())
+        )
+        worker.signals.finished.connect(
+            lambda pdf_bytes, w=worker: self._on_preview_finished(w, pdf_bytes, keep_view))
+        worker.signals.failed.connect(lambda message, w=worker: self._on_preview_failed(w, message))
+        # Um clique novo em Atualizar substitui o pedido anterior
+        self._preview_worker = worker
+        self.statusbar.showMessage("Gerando pré-visualização...")
+        QThreadPool.globalInstance().start(worker)
+    
+    def _on_preview_finished(self, worker, pdf_bytes, keep_view):
+        if worker is not self._preview_worker:
+            return
+        self._preview_worker = None
+        self.statusbar.clearMessage()
+        self.variant_viewer.load_pdf(pdf_bytes, name="pre_visualizacao.pdf", keep_view=keep_view)
+    
+    def _on_preview_failed(self, worker, message):
+        if worker is not self._preview_worker:
+            return
+        self._preview_worker = None
+        self.statusbar.clearMessage()
+        self.show_error("Erro", f"Erro ao gerar pré-visualização: {message}")
     
     def on_print(self):
-        pdf_path = "output/provas_geradas/prova_gerada.pdf"
-        if not os.path.exists(pdf_path):
+        pdf_paths = [path for path in self.last_print_paths if os.path.exists(path)]
+        if not pdf_paths:
             self.show_error("Aviso", "Gere uma prova primeiro!")
             return
         try:
             from core import printer
-            printer.imprimir(pdf_path)
-            self.statusbar.showMessage("Prova enviada para impressão!", 3000)
+            for pdf_path in pdf_paths:
+                printer.imprimir(pdf_path, callback=self._on_print_job_update)
+            if len(pdf_paths) > 1:
+                self.statusbar.showMessage(f"{len(pdf_paths)} variantes enviadas para impressão!", 3000)
+            else:
+                self.statusbar.showMessage("Prova enviada para impressão!", 3000)
         except Exception as e:
             self.show_error("Erro", f"Erro ao imprimir: {str(e)}")
     
+    def _on_print_job_update(self, job):
+        """Chamado pelo serviço de impressão (fora da thread da interface)"""
+        if job.error:
+            self.print_status_changed.emit(f"Erro ao imprimir: {job.error}")
+        else:
+            self.print_status_changed.emit(f"Impressão #{job.job_id}: {job.state_name}")
+    
     def on_ai_toggle(self, state):
         self.apiKeyInput.setEnabled(state == Qt.CheckState.Checked.value)
     
@@ -622,32 +871,17 @@ class MainController(QtWidgets.QMainWindow):
             self.statusbar.showMessage(f"Extraindo logo de {os.path.basename(file_path)}...", 2000)
             self.progressBar.setValue(30)
             
-            # Diretório temporário para salvar imagens extraídas
-            temp_dir = os.path.join(BASE_DIR, "output", "temp")
-            os.makedirs(temp_dir, exist_ok=True)
+            # Imagens extraídas vão para o armazenamento temporário (core.assets)
+            from core import assets
             
             # Extrair logo com base no tipo de arquivo
             images = []
             if file_path.endswith(".pdf"):
-                # Extrair imagens do PDF
-                import fitz  # PyMuPDF
+                # Imagens da primeira página, da análise compartilhada do cabeçalho
                 try:
-                    doc = fitz.open(file_path)
-                    page = doc[0]  # Extrair da primeira página
-                    
-                    # Obter imagens da página
-                    for img_index, img in enumerate(page.get_images(full=True)):
-                        xref = img[0]
-                        if xref:
-                            pix = fitz.Pixmap(doc, xref)
-                            if pix.width > 0 and pix.height > 0:
-                                img_path = os.path.join(temp_dir, f"extracted_logo_{img_index}.png")
-                                if pix.alpha:
-                                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                                pix.save(img_path)
-                                images.append(img_path)
-                    
-                    doc.close()
+                    from core import header_analysis
+                    analise = header_analysis.analisar_cabecalho(file_path)
+                    images = header_analysis.salvar_logos(analise)
                 except Exception as e:
                     self.show_error("Erro", f"Erro ao extrair imagem do PDF: {str(e)}")
                     self.progressBar.setValue(0)
@@ -669,12 +903,10 @@ class MainController(QtWidgets.QMainWindow):
                         if "image" in rel.reltype:
                             image_name = rel.target_ref.split('/')[-1]
                             image_data = zip_file.read(f"word/{rel.target_ref}")
-                            img_path = os.path.join(temp_dir, f"extracted_{image_name}")
+                            img_path = assets.gravar(image_data, os.path.splitext(image_name)[1])
                             
-                            with open(img_path, "wb") as f:
-                                f.write(image_data)
-                            
-                            images.append(img_path)
+                            if img_path not in images:
+                                images.append(img_path)
                     
                     # Se não encontrou imagens, tentar cabeçalhos
                     if not images:
@@ -685,12 +917,10 @@ class MainController(QtWidgets.QMainWindow):
                                     if "image" in rel.reltype:
                                         image_name = rel.target_ref.split('/')[-1]
                                         image_data = zip_file.read(f"word/{rel.target_ref}")
-                                        img_path = os.path.join(temp_dir, f"header_{image_name}")
-                                        
-                                        with open(img_path, "wb") as f:
-                                            f.write(image_data)
+                                        img_path = assets.gravar(image_data, os.path.splitext(image_name)[1])
                                         
-                                        images.append(img_path)
+                                        if img_path not in images:
+                                            images.append(img_path)
                                         
                 except Exception as e:
                     self.show_error("Erro", f"Erro ao extrair imagem do DOCX: {str(e)}")
@@ -816,32 +1046,18 @@ class MainController(QtWidgets.QMainWindow):
             
             # Processar com base no tipo de arquivo
             if file_path.endswith(".pdf"):
-                # Extrair cabeçalho do PDF usando PyMuPDF
-                import fitz  # PyMuPDF
+                # Cabeçalho da primeira página, da análise compartilhada
                 try:
-                    doc = fitz.open(file_path)
-                    page = doc[0]  # Primeira página geralmente contém o cabeçalho
+                    from core import header_analysis
+                    analise = header_analysis.analisar_cabecalho(file_path)
                     
-                    # Extrair logo/imagens
-                    temp_dir = os.path.join(BASE_DIR, "output", "temp")
-                    os.makedirs(temp_dir, exist_ok=True)
+                    # Usar a primeira imagem da página como logo
+                    logos = header_analysis.salvar_logos(analise)
+                    if logos:
+                        logo_path = logos[0]
                     
-                    # Extrair todas as imagens do começo da página
-                    for img_index, img in enumerate(page.get_images(full=True)):
-                        xref = img[0]
-                        if xref:
-                            pix = fitz.Pixmap(doc, xref)
-                            if pix.width > 0 and pix.height > 0:
-                                img_path = os.path.join(temp_dir, f"header_import_{img_index}.png")
-                                if pix.alpha:
-                                    pix = fitz.Pixmap(fitz.csRGB, pix)
-                                pix.save(img_path)
-                                if not logo_path:  # Usar primeira imagem como logo
-                                    logo_path = img_path
-                    
-                    # Extrair texto da parte superior da página (primeiros 30% da altura)
-                    rect = fitz.Rect(0, 0, page.rect.width, page.rect.height * 0.3)
-                    header_text = page.get_text("text", clip=rect).strip()
+                    # Texto da parte superior da página (primeiros 30% da altura)
+                    header_text = header_analysis.texto(analise).strip()
                     
                     # Dividir em linhas e processar
                     lines = header_text.split('\n')
@@ -885,8 +1101,6 @@ class MainController(QtWidgets.QMainWindow):
                         # Definir o nome da escola
                         header_info['school_name'] = school_name
                     
-                    doc.close()
-                    
                 except Exception as e:
                     self.show_error("Erro", f"Erro ao extrair cabeçalho do PDF: {str(e)}")
                     self.progressBar.setValue(0)
@@ -896,14 +1110,12 @@ class MainController(QtWidgets.QMainWindow):
                 # Extrair cabeçalho do DOCX
                 import zipfile
                 from docx import Document
-                import re
                 
                 try:
                     doc = Document(file_path)
                     
-                    # Extrair imagens do cabeçalho
-                    temp_dir = os.path.join(BASE_DIR, "output", "temp")
-                    os.makedirs(temp_dir, exist_ok=True)
+                    # Extrair imagens do cabeçalho (core.assets)
+                    from core import assets
                     
                     # Verificar se há imagens no cabeçalho
                     for section in doc.sections:
@@ -916,10 +1128,7 @@ class MainController(QtWidgets.QMainWindow):
                                     # Abrir o arquivo DOCX como ZIP e extrair a imagem
                                     zip_file = zipfile.ZipFile(file_path)
                                     image_data = zip_file.read(f"word/{rel.target_ref}")
-                                    img_path = os.path.join(temp_dir, f"docx_header_{image_name}")
-                                    
-                                    with open(img_path, "wb") as f:
-                                        f.write(image_data)
+                                    img_path = assets.gravar(image_data, os.path.splitext(image_name)[1])
                                     
                                     if not logo_path:  # Usar primeira imagem como logo
                                         logo_path = img_path
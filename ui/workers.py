@@ -0,0 +1,180 @@
+import os
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """Sinais dos workers (QRunnable não é QObject).
+
+    Criados na thread da interface, então os slots conectados rodam nela
+    mesmo quando o sinal é emitido pelo worker.
+    """
+    progress = pyqtSignal(int, int)  # atual, total
+    stage = pyqtSignal(str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    canceled = pyqtSignal()
+
+
+class LoadProvaWorker(QRunnable):
+    """Lê e processa uma prova fora da thread da interface.
+
+    O resultado (caminho, formato original, questões) chega por
+    ``signals.finished`` e deve ser aplicado ao controller pelo slot, na
+    thread da interface.
+    """
+
+    def __init__(self, prova_controller, caminho):
+        super().__init__()
+        self.prova_controller = prova_controller
+        self.caminho = caminho
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        from core import reader
+        try:
+            resultado, questoes = self.prova_controller.ler_prova(
+                self.caminho,
+                progress=self.signals.progress.emit,
+                cancel_event=self.cancel_event
+            )
+        except reader.ReadCancelled:
+            self.signals.canceled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        if self.cancel_event.is_set():
+            self.signals.canceled.emit()
+            return
+        self.signals.finished.emit((self.caminho, resultado, questoes))
+
+
+class _Cancelado(Exception):
+    pass
+
+
+class GeneratePipelineWorker(QRunnable):
+    """Gera as variantes da prova fora da thread da interface.
+
+    Cada variante passa pelas etapas embaralhar, reescrever (só com IA) e
+    gerar, que grava prova e gabarito direto no disco; o cancelamento é verificado entre as etapas e
+    entre as requisições de reescrita. Com ``caderno`` as variantes são
+    juntadas ao final num único PDF para impressão frente e verso. Tudo o
+    que depende de widgets (info do QR code, formato com cabeçalho) é lido
+    antes, na thread da interface.
+    """
+
+    def __init__(self, prova_controller, questoes, modo, info_prova, formato,
+                 api_key=None, variantes=1, nome="prova_gerada", caderno=False):
+        super().__init__()
+        self.prova_controller = prova_controller
+        self.questoes = questoes
+        self.modo = modo
+        self.info_prova = info_prova
+        self.formato = formato
+        self.api_key = api_key
+        self.variantes = variantes
+        self.nome = nome
+        self.caderno = caderno
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+        self._passo = 0
+        self._total = variantes * (2 + (len(questoes) if api_key else 0)) + (1 if caderno else 0)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _avancar(self):
+        if self.cancel_event.is_set():
+            raise _Cancelado()
+        self._passo += 1
+        self.signals.progress.emit(self._passo, self._total)
+
+    def _etapa(self, nome, indice):
+        if self.cancel_event.is_set():
+            raise _Cancelado()
+        if self.variantes > 1:
+            nome = f"{nome} (variante {indice}/{self.variantes})"
+        self.signals.stage.emit(nome)
+
+    def run(self):
+        from core import ai_helper
+        try:
+            self.signals.finished.emit(self._gerar())
+        except (_Cancelado, ai_helper.ReescritaCancelada):
+            self.signals.canceled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+    def _gerar(self):
+        from core import generator
+        gerados = []
+        primeiro_qr = None
+        for indice in range(1, self.variantes + 1):
+            nome = self.nome if indice == 1 else f"{self.nome}_{indice}"
+
+            self._etapa("Embaralhando", indice)
+            questoes = self.prova_controller.aplicar_embaralhamento(self.questoes, self.modo)
+            self._avancar()
+
+            if self.api_key:
+                self._etapa("Reescrevendo com IA", indice)
+                base = self._passo
+                questoes = self.prova_controller.aplicar_ia(
+                    questoes, self.api_key,
+                    progress=lambda feitas, total: self.signals.progress.emit(base + feitas, self._total),
+                    cancel_event=self.cancel_event
+                )
+                self._passo = base + len(questoes)
+
+            self._etapa("Gerando PDF", indice)
+            info = self.info_prova if self.variantes == 1 else {**self.info_prova, 'variante': indice}
+            qr_data = generator.gerar_qrcode(info)
+            gerados.append(generator.gerar_pdf_prova(nome, questoes, qr_data, self.formato))
+            if primeiro_qr is None:
+                primeiro_qr = qr_data
+            self._avancar()
+
+        caderno_path = None
+        if self.caderno:
+            from core import booklet
+            from config.settings import OUTPUT_DIR
+            if self.cancel_event.is_set():
+                raise _Cancelado()
+            self.signals.stage.emit("Montando caderno")
+            caderno_path = os.path.join(OUTPUT_DIR, f"{self.nome}_caderno.pdf")
+            booklet.montar_caderno([pdf_path for pdf_path, _ in gerados], caderno_path, duplex=True)
+            self._avancar()
+        return gerados, primeiro_qr, caderno_path
+
+
+class PreviewVariantWorker(QRunnable):
+    """Gera o PDF da pré-visualização de variante em memória, fora da thread da interface.
+
+    Os bytes chegam por ``signals.finished``; ``load_pdf`` do visualizador é
+    chamado pelo slot, na thread da interface. Como em
+    ``GeneratePipelineWorker``, info do QR code e formato são lidos antes.
+    """
+
+    def __init__(self, questoes, info_prova, formato):
+        super().__init__()
+        self.questoes = questoes
+        self.info_prova = info_prova
+        self.formato = formato
+        self.signals = WorkerSignals()
+
+    def run(self):
+        from core import generator
+        try:
+            qr_data = generator.gerar_qrcode(self.info_prova)
+            pdf_bytes = generator.gerar_preview_prova("pre_visualizacao", self.questoes, qr_data, self.formato)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(pdf_bytes)